@@ -0,0 +1,102 @@
+# Адаптивний розподіл проб основного блоку (config.json "adaptive_allocation", за замовчуванням вимкнено).
+# Кожен тестований стимул спершу показується min_repeats разів, нейтральні — test_repeats (базова лінія).
+# Після кожного раунду для стимулу рахуються Кз з довірчим інтервалом (t-розподіл) і p t-тесту Велча проти нейтральних;
+# стимул, чий інтервал Кз не містить жодного порога Кз/Кд, а p далеко від α, вважається визначеним і вибуває.
+# Невизначені отримують ще по одному показу (найближчі до порога — першими), поки не вичерпано бюджет
+# показів або max_repeats. Правило, за яким зупинився кожен стимул, потрапляє в план сесії і звіт
+# Запуск: імпортується main012-s.py
+# Залежності: math, analysis.py
+
+import math
+from analysis import TrialAnalysis, t_critical, welch_ttest_moments
+
+# Категорії основного блоку, що не тестуються послідовно: базова лінія і буфери
+UNTESTED = ("neutral", "buffer")
+
+class AdaptiveAllocation:
+    def __init__(self, settings, test_repeats):
+        self.enabled = settings["enabled"]
+        self.min_repeats = settings["min_repeats"]
+        self.max_repeats = settings["max_repeats"]
+        self.budget_setting = settings["budget"]
+        self.alpha = settings["alpha"]
+        self.p_band = settings["p_band"]
+        self.confidence = settings["confidence"]
+        # Критичні значення t за числом ступенів свободи
+        self.t_crit = {}
+        self.test_repeats = test_repeats
+        # Пороги Кд переводяться в шкалу Кз: Кд < t рівнозначне Кз > 1/t
+        self.thresholds = sorted(set(settings["kz_thresholds"]) | {1 / t for t in settings["kd_thresholds"]})
+
+    def repeats(self, category):
+        # Кількість показів стимулу в початковому основному блоці
+        if not self.enabled or category in UNTESTED:
+            return self.test_repeats
+        return self.min_repeats
+
+    def budget(self, stimuli):
+        # Бюджет показів тестованих стимулів; за замовчуванням — не довше, ніж фіксований план
+        if self.budget_setting is not None:
+            return self.budget_setting
+        return sum(1 for _, cat in stimuli if cat not in UNTESTED) * self.test_repeats
+
+    def decisions(self, trials, stimuli):
+        # Стан кожного стимулу основного блоку за пробами етапу main: показів, валідних, Кз ± t·SE, p і статус
+        # (baseline, decided, open). Між раундами — один прохід по пробах основного блоку
+        analysis = TrialAnalysis(trials, ["main"])
+        neutral = analysis.neutral.reacts
+        neutral_mean = neutral.trimmed().mean() if neutral.n else 0
+        baseline = neutral.sample_moments()
+        groups = analysis.by_stimulus
+        result = []
+        for stim, cat in stimuli:
+            group = groups.get((cat, stim))
+            shown = group.n if group is not None else 0
+            reacts = group.reacts.trimmed() if group is not None else None
+            decision = {"stimulus": stim, "category": cat, "shown": shown, "valid": reacts.n if reacts else 0,
+                        "kz": None, "kz_half": None, "p": None, "distance": 0.0}
+            if cat in UNTESTED:
+                decision["status"] = "baseline"
+            else:
+                decision["status"] = self._status(decision, reacts, neutral_mean, baseline)
+            result.append(decision)
+        return result
+
+    def _status(self, decision, reacts, neutral_mean, baseline):
+        if reacts is None or reacts.n < 2 or not neutral_mean:
+            return "open"
+        kz = reacts.mean() / neutral_mean
+        df = reacts.n - 1
+        if df not in self.t_crit:
+            self.t_crit[df] = t_critical(df, self.confidence)
+        half = self.t_crit[df] * reacts.stdev() / math.sqrt(reacts.n) / neutral_mean
+        _, p = welch_ttest_moments(reacts.sample_moments(), baseline)
+        if math.isnan(p):
+            return "open"
+        decision.update(kz=kz, kz_half=half, p=p)
+        # Відстань до найближчого порога в напівширинах інтервалу: < 1 — поріг усередині інтервалу
+        distance = min(abs(kz - t) for t in self.thresholds) / half if half else math.inf
+        decision["distance"] = distance
+        near_p = self.alpha / self.p_band <= p <= self.alpha * self.p_band
+        return "open" if distance < 1 or near_p else "decided"
+
+    def next_round(self, decisions, stimuli):
+        # Стимули для наступного раунду: невизначені з показами < max_repeats, у межах залишку бюджету
+        spent = sum(d["shown"] for d in decisions if d["category"] not in UNTESTED)
+        left = self.budget(stimuli) - spent
+        candidates = [d for d in decisions if d["status"] == "open" and d["shown"] < self.max_repeats]
+        candidates.sort(key=lambda d: d["distance"])
+        return [(d["stimulus"], d["category"]) for d in candidates[:max(left, 0)]]
+
+    def summary(self, decisions, stimuli, rounds):
+        # Підсумок для плану сесії і звіту: параметри правила, бюджет, раунди і для кожного стимулу
+        # [стимул, категорія, показів, валідних, правило зупинки, Кз, ±, p]
+        rows = []
+        for d in decisions:
+            rule = d["status"]
+            if rule == "open":
+                rule = "max_repeats" if d["shown"] >= self.max_repeats else "budget"
+            rows.append([d["stimulus"], d["category"], d["shown"], d["valid"], rule, d["kz"], d["kz_half"], d["p"]])
+        return {"min_repeats": self.min_repeats, "max_repeats": self.max_repeats, "budget": self.budget(stimuli),
+                "alpha": self.alpha, "p_band": self.p_band, "confidence": self.confidence, "thresholds": self.thresholds,
+                "rounds": rounds, "stimuli": rows}
@@ -0,0 +1,974 @@
+# Частина 4: Таблиця проб, статистика та формування звіту
+# Винесено з main012-s.py, щоб пакетний переаналіз архіву results/ працював без tkinter
+# Залежності: json, os, sys, math, array, statistics, threading, report.py; scipy.stats (необов'язково, імпортується у фоні), resampling.py з numpy (необов'язково)
+
+import json
+import os
+import sys
+import math
+import array
+import bisect
+import statistics
+import threading
+from fractions import Fraction
+from report import Text, Heading, Paragraph, Table, render_text, write_report
+
+def _betacf(a, b, x):
+    # Ланцюговий дріб для неповної бета-функції (метод Лентца)
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 500):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((a + m2 - 1.0) * (a + m2)),
+                   -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1.0))):
+            d = 1.0 + aa * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + aa / c
+            c = c if abs(c) > tiny else tiny
+            delta = c * d
+            h *= delta
+        if abs(delta - 1.0) < 1e-16:
+            break
+    return h
+
+def _betainc(a, b, x):
+    # Регуляризована неповна бета-функція I_x(a, b)
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+def sample_moments(values):
+    # (n, середнє, дисперсія) вибірки для t-тесту; базова лінія рахується один раз на звіт, а не для кожного стимулу
+    n = len(values)
+    if n < 2:
+        return n, math.nan, math.nan
+    return n, statistics.mean(values), statistics.variance(values)
+
+def welch_ttest(a, b):
+    return welch_ttest_moments(sample_moments(a), sample_moments(b))
+
+def welch_ttest_moments(a, b):
+    # ЗМІНА ВІД 18.10.2026: Вбудований t-тест Велча; крайні випадки як у scipy.stats.ttest_ind(equal_var=False)
+    n1, mean1, var1 = a
+    n2, mean2, var2 = b
+    if n1 < 2 or n2 < 2:
+        return math.nan, math.nan
+    vn1 = var1 / n1
+    vn2 = var2 / n2
+    d = mean1 - mean2
+    denom = math.sqrt(vn1 + vn2)
+    if denom == 0:
+        return (math.nan, math.nan) if d == 0 else (math.copysign(math.inf, d), 0.0)
+    t = d / denom
+    df = (vn1 + vn2) ** 2 / (vn1 ** 2 / (n1 - 1) + vn2 ** 2 / (n2 - 1))
+    return t, _betainc(df / 2, 0.5, df / (df + t * t))
+
+def t_critical(df, confidence):
+    # Двобічне критичне значення t-розподілу: P(|T| > t) = 1 - confidence; бісекція по тій самій неповній бета-функції
+    tail = 1.0 - confidence
+    lo, hi = 0.0, 1.0
+    while _betainc(df / 2, 0.5, df / (df + hi * hi)) > tail:
+        hi *= 2
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if _betainc(df / 2, 0.5, df / (df + mid * mid)) > tail:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+class LazyTTest:
+    # ЗМІНА ВІД 18.10.2026: scipy.stats імпортується у фоновому потоці, поки йде сесія (у робочому процесі, session_worker.py);
+    # без scipy використовується welch_ttest
+    def __init__(self):
+        self.thread = None
+        self.scipy_ttest_ind = None
+        self.scipy_ttest_ind_from_stats = None
+
+    def preload(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._load, name="scipy-preload", daemon=True)
+            self.thread.start()
+
+    def _load(self):
+        try:
+            from scipy.stats import ttest_ind, ttest_ind_from_stats
+        except ImportError:
+            return
+        self.scipy_ttest_ind = ttest_ind
+        self.scipy_ttest_ind_from_stats = ttest_ind_from_stats
+
+    def __call__(self, a, b):
+        self.preload()
+        self.thread.join()
+        if self.scipy_ttest_ind is None:
+            return welch_ttest(a, b)
+        t_stat, pval = self.scipy_ttest_ind(a, b, equal_var=False)
+        return float(t_stat), float(pval)
+
+    def from_moments(self, a, b):
+        # a, b — sample_moments(...); для повторних тестів проти тієї самої базової лінії
+        self.preload()
+        self.thread.join()
+        if self.scipy_ttest_ind_from_stats is None:
+            return welch_ttest_moments(a, b)
+        if a[0] < 2 or b[0] < 2:
+            return math.nan, math.nan
+        t_stat, pval = self.scipy_ttest_ind_from_stats(a[1], math.sqrt(a[2]), a[0], b[1], math.sqrt(b[2]), b[0], equal_var=False)
+        return float(t_stat), float(pval)
+
+ttest_welch = LazyTTest()
+
+INT_NONE = -2**31
+TIMING_PHASES = ["probe", "mask", "pause"]
+TIMING_FIELDS = ["sched_on", "on", "sched_off", "off"]
+
+class TrialStore:
+    # ЗМІНА ВІД 18.10.2026: Таблиця проб у стовпцях array.array замість словника на кожну пробу.
+    # Рядки (стимул, категорія, етап, причина пропуску) інтерновані в цілі коди; None у цілих стовпцях — INT_NONE,
+    # у стовпцях таймінгу — NaN
+    MAGIC = b"PSTRIALS1\n"
+    INT_COLUMNS = [("stage", "B"), ("stimulus", "I"), ("category", "B"), ("reaction", "i"), ("t", "i"),
+                   ("press_duration", "i"), ("miss", "B"), ("reason", "B"), ("sequence_position", "I")]
+    TIMING_COLUMNS = [f"{phase}_{field}" for phase in TIMING_PHASES for field in TIMING_FIELDS]
+
+    def __init__(self):
+        self.columns = {name: array.array(code) for name, code in self.INT_COLUMNS}
+        for name in self.TIMING_COLUMNS:
+            self.columns[name] = array.array("d")
+        self.strings = {"stage": [], "stimulus": [], "category": [], "reason": [None]}
+        self.codes = {"stage": {}, "stimulus": {}, "category": {}, "reason": {None: 0}}
+
+    def __len__(self):
+        return len(self.columns["stage"])
+
+    def code(self, kind, value):
+        codes = self.codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = len(self.strings[kind])
+            value = sys.intern(value)
+            self.strings[kind].append(value)
+            codes[value] = code
+        return code
+
+    def append(self, stage, stimulus, category, reaction, t, miss, reason, sequence_position):
+        c = self.columns
+        c["stage"].append(self.code("stage", stage))
+        c["stimulus"].append(self.code("stimulus", stimulus))
+        c["category"].append(self.code("category", category))
+        c["reaction"].append(INT_NONE if reaction is None else reaction)
+        c["t"].append(INT_NONE if t is None else t)
+        c["press_duration"].append(INT_NONE)
+        c["miss"].append(1 if miss else 0)
+        c["reason"].append(self.code("reason", reason))
+        c["sequence_position"].append(sequence_position)
+        for name in self.TIMING_COLUMNS:
+            c[name].append(math.nan)
+        return len(c["stage"]) - 1
+
+    def set_press_duration(self, row, press_duration_ms):
+        self.columns["press_duration"][row] = press_duration_ms
+
+    def set_timing(self, row, timing):
+        for phase, values in timing.items():
+            for field in TIMING_FIELDS:
+                if values[field] is not None:
+                    self.columns[f"{phase}_{field}"][row] = values[field]
+
+    def truncate(self, rows):
+        for arr in self.columns.values():
+            del arr[rows:]
+
+    def column(self, name):
+        # Перегляд без копіювання; поки він живий, array не можна розширювати
+        return memoryview(self.columns[name])
+
+    def select(self, stages):
+        codes = {self.codes["stage"][stage] for stage in stages if stage in self.codes["stage"]}
+        return [i for i, code in enumerate(self.columns["stage"]) if code in codes]
+
+    def record(self, i):
+        c = self.columns
+        value = lambda name: None if c[name][i] == INT_NONE else c[name][i]
+        timing = {}
+        for phase in TIMING_PHASES:
+            if not math.isnan(c[f"{phase}_on"][i]):
+                timing[phase] = {field: (None if math.isnan(c[f"{phase}_{field}"][i]) else c[f"{phase}_{field}"][i]) for field in TIMING_FIELDS}
+        return {
+            "stimulus": self.strings["stimulus"][c["stimulus"][i]], "category": self.strings["category"][c["category"][i]],
+            "reaction": value("reaction"), "t": value("t"), "miss": bool(c["miss"][i]), "reason": self.strings["reason"][c["reason"][i]],
+            "press_duration": value("press_duration"), "stage": self.strings["stage"][c["stage"][i]],
+            "sequence_position": c["sequence_position"][i], "timing": timing
+        }
+
+    def records(self, stages=None):
+        rows = range(len(self)) if stages is None else self.select(stages)
+        return [self.record(i) for i in rows]
+
+    def save(self, path):
+        header = {"rows": len(self), "strings": self.strings,
+                  "columns": [[name, arr.typecode, arr.itemsize] for name, arr in self.columns.items()],
+                  "byteorder": sys.byteorder}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            f.write(self.MAGIC)
+            f.write(len(header_bytes).to_bytes(4, "little"))
+            f.write(header_bytes)
+            for arr in self.columns.values():
+                arr.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with open(path, "rb") as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"{path}: не є файлом таблиці проб")
+            header = json.loads(f.read(int.from_bytes(f.read(4), "little")).decode("utf-8"))
+            for name, typecode, itemsize in header["columns"]:
+                arr = array.array(typecode)
+                if arr.itemsize != itemsize:
+                    raise ValueError(f"{path}: розмір елемента стовпця {name} не збігається ({itemsize} != {arr.itemsize})")
+                arr.fromfile(f, header["rows"])
+                if header["byteorder"] != sys.byteorder:
+                    arr.byteswap()
+                store.columns[name] = arr
+        store.strings = header["strings"]
+        store.codes = {kind: {value: code for code, value in enumerate(values)} for kind, values in store.strings.items()}
+        return store
+
+def _exact(value):
+    # Fraction -> число так само, як statistics для цілих даних: ціле, якщо ділиться націло, інакше float
+    return value.numerator if value.denominator == 1 else value.numerator / value.denominator
+
+def _sqrt_frac(n, m):
+    # Коректно округлений √(n/m), як у statistics.stdev (округлення до непарного на 2·53+3 бітах)
+    q = (n.bit_length() - m.bit_length() - 109) // 2
+    if q >= 0:
+        n, m, shift, denominator = n, m << 2 * q, q, 1
+    else:
+        n, m, shift, denominator = n << -2 * q, m, 0, 1 << -q
+    a = math.isqrt(n // m)
+    return ((a | (a * a * m != n)) << shift) / denominator
+
+class Moments:
+    # ЗМІНА ВІД 18.10.2026: Накопичувач вибірки: значення, точні суми Σx і Σx² (цілі — одразу, float — частковими сумами
+    # за знаменником, як у statistics), мінімум і максимум. Середнє, дисперсія і SD з цих сум точно збігаються
+    # з statistics.mean/variance/stdev за значеннями, тож підсумки рахуються за O(1), а обрізання 3 SD
+    # переглядає значення лише тоді, коли є що обрізати
+    __slots__ = ("values", "n", "total", "total_sq", "partials", "low", "high")
+
+    def __init__(self):
+        self.values = []
+        self.n = 0
+        self.total = 0
+        self.total_sq = 0
+        self.partials = {}
+        self.low = None
+        self.high = None
+
+    def add(self, x, pos=None):
+        if pos is None:
+            self.values.append(x)
+        else:
+            self.values.insert(pos, x)
+        self._count(x, 1)
+        if self.low is None or x < self.low:
+            self.low = x
+        if self.high is None or x > self.high:
+            self.high = x
+
+    def _count(self, x, sign):
+        # Внесок значення в n і точні суми; sign=-1 — вилучення (обрізання)
+        self.n += sign
+        if type(x) is int:
+            self.total += sign * x
+            self.total_sq += sign * x * x
+            return
+        numerator, denominator = x.as_integer_ratio()
+        sums = self.partials.get(denominator)
+        if sums is None:
+            self.partials[denominator] = [numerator, numerator * numerator, 1]
+            return
+        sums[0] += sign * numerator
+        sums[1] += sign * numerator * numerator
+        sums[2] += sign
+        if not sums[2]:
+            del self.partials[denominator]
+
+    def _convert(self, value):
+        # Як statistics: для float-даних завжди float
+        return float(value) if self.partials else _exact(value)
+
+    def _sums(self):
+        if not self.partials:
+            return self.total, self.total_sq
+        total = Fraction(self.total) + sum(Fraction(sums[0], d) for d, sums in self.partials.items())
+        total_sq = Fraction(self.total_sq) + sum(Fraction(sums[1], d * d) for d, sums in self.partials.items())
+        return total, total_sq
+
+    def mean(self):
+        return self._convert(Fraction(self._sums()[0]) / self.n)
+
+    def _mss(self):
+        total, total_sq = self._sums()
+        return Fraction(self.n * total_sq - total * total) / (self.n * (self.n - 1))
+
+    def variance(self):
+        return self._convert(self._mss())
+
+    def stdev(self):
+        mss = self._mss()
+        return _sqrt_frac(mss.numerator, mss.denominator)
+
+    def sample_moments(self):
+        # Те саме, що sample_moments(values)
+        if self.n < 2:
+            return self.n, math.nan, math.nan
+        return self.n, self.mean(), self.variance()
+
+    def trimmed(self):
+        # Обрізання 3 SD (реакції далі трьох SD від середнього відкидаються); без викидів — сам накопичувач
+        if self.n < 2:
+            return self
+        mean = self.mean()
+        limit = 3 * self.stdev()
+        if limit == 0 or (abs(self.low - mean) <= limit and abs(self.high - mean) <= limit):
+            return self
+        # Викидів мало: їхній внесок віднімається від сум, а не перераховується все наново
+        kept = Moments()
+        kept.values = [v for v in self.values if abs(v - mean) <= limit]
+        kept.n = self.n
+        kept.total = self.total
+        kept.total_sq = self.total_sq
+        kept.partials = {d: list(sums) for d, sums in self.partials.items()}
+        for v in self.values:
+            if abs(v - mean) > limit:
+                kept._count(v, -1)
+        if kept.n:
+            kept.low = min(kept.values)
+            kept.high = max(kept.values)
+        return kept
+
+class TrialGroup:
+    # press_rows — номери проб для press_durations: тривалість, що приходить після проби, стає на своє місце за порядком проб
+    __slots__ = ("reacts", "press_durations", "press_rows", "after_reacts", "n", "miss", "run", "max_run")
+
+    def __init__(self):
+        self.reacts = Moments()
+        self.press_durations = Moments()
+        self.press_rows = []
+        self.after_reacts = Moments()
+        self.n = 0
+        self.miss = 0
+        self.run = 0
+        self.max_run = 0
+
+    def add_press(self, row, press_duration_ms):
+        pos = bisect.bisect(self.press_rows, row)
+        self.press_rows.insert(pos, row)
+        self.press_durations.add(press_duration_ms, None if pos == len(self.press_rows) - 1 else pos)
+
+class TrialAnalysis:
+    # ЗМІНА ВІД 18.10.2026: Накопичувачі за категорією та (категорія, стимул) разом із післядією (наступна проба —
+    # валідний буфер). Будуються одним проходом по TrialStore або наростають по пробі (append) у робочому процесі сесії,
+    # тож проміжні результати доступні посеред сесії, а підсумок — за O(стимулів). Формули ті самі, що й раніше,
+    # тому результати чисельно збігаються з повним переглядом даних для кожної групи
+    def __init__(self, store, stages):
+        self.store = store
+        self.stages = frozenset(stages)
+        self.n = 0
+        self.groups_by_category = {}
+        self.groups_by_stimulus = {}
+        # Попередня відібрана проба, що чекає на наступну для післядії: (групи, чи пропуск)
+        self.previous = None
+        # Проби, чия тривалість натискання ще може прийти (лише для append)
+        self.waiting_press = {}
+        for i in store.select(stages):
+            self._add(i)
+
+    def append(self, row):
+        # Нова проба в кінці store; проби інших етапів пропускаються
+        c = self.store.columns
+        if self.store.strings["stage"][c["stage"][row]] not in self.stages:
+            return
+        groups = self._add(row)
+        if c["press_duration"][row] == INT_NONE:
+            self.waiting_press[row] = groups
+
+    def set_press_duration(self, row, press_duration_ms):
+        groups = self.waiting_press.pop(row, None)
+        if groups is not None and press_duration_ms:
+            for group in groups:
+                group.add_press(row, press_duration_ms)
+
+    def _add(self, i):
+        c = self.store.columns
+        cat = c["category"][i]
+        reaction = c["reaction"][i]
+        press = c["press_duration"][i]
+        miss = c["miss"][i]
+        if self.previous is not None:
+            previous_groups, previous_miss = self.previous
+            if not previous_miss and self.store.strings["category"][cat] == "buffer" and not miss and reaction != INT_NONE:
+                for group in previous_groups:
+                    group.after_reacts.add(reaction)
+        cat_group = self.groups_by_category.get(cat)
+        if cat_group is None:
+            cat_group = self.groups_by_category[cat] = TrialGroup()
+        stim_key = (cat, c["stimulus"][i])
+        stim_group = self.groups_by_stimulus.get(stim_key)
+        if stim_group is None:
+            stim_group = self.groups_by_stimulus[stim_key] = TrialGroup()
+        groups = (cat_group, stim_group)
+        for group in groups:
+            group.n += 1
+            if reaction != INT_NONE and reaction:
+                group.reacts.add(reaction)
+            if press != INT_NONE and press:
+                group.add_press(i, press)
+            if miss:
+                group.miss += 1
+                group.run += 1
+                group.max_run = max(group.max_run, group.run)
+            else:
+                group.run = 0
+        self.previous = (groups, miss)
+        self.n += 1
+        return groups
+
+    @property
+    def by_category(self):
+        categories = self.store.strings["category"]
+        return {categories[cat]: group for cat, group in self.groups_by_category.items()}
+
+    @property
+    def by_stimulus(self):
+        categories = self.store.strings["category"]
+        stimuli = self.store.strings["stimulus"]
+        return {(categories[cat], stimuli[stim]): group for (cat, stim), group in self.groups_by_stimulus.items()}
+
+    @property
+    def neutral(self):
+        return self.by_category.get("neutral") or TrialGroup()
+
+    def _baseline(self):
+        # Моменти базової лінії для t-тестів — один раз на виклик, а не для кожної групи
+        neutral = self.neutral
+        press = neutral.press_durations
+        return {"reacts": neutral.reacts.n, "moments": neutral.reacts.sample_moments(),
+                "press": press.n, "press_moments": press.sample_moments(), "press_mean": press.mean() if press.n else 0}
+
+    def _summarize(self, group, neutral_mean, neutral_sd, baseline):
+        neutral_press_mean = baseline["press_mean"]
+        reacts = group.reacts.trimmed()
+        mean = reacts.mean() if reacts.n else 0
+        sd = reacts.stdev() if reacts.n > 1 else 0
+        cv = (sd / mean * 100) if mean else 0
+        press_durations = group.press_durations.trimmed()
+        press_mean = press_durations.mean() if press_durations.n else 0
+        press_sd = press_durations.stdev() if press_durations.n > 1 else 0
+        press_effect = ((neutral_press_mean - press_mean) / neutral_press_mean * 100) if neutral_press_mean and press_mean else 0
+        effect = ((neutral_mean - mean) / neutral_mean * 100) if neutral_mean else 0
+        z = ((neutral_mean - mean) / neutral_sd) if neutral_sd and mean else 0
+        t_stat, pval = ttest_welch.from_moments(reacts.sample_moments(), baseline["moments"]) if reacts.n and baseline["reacts"] else (0, 1)
+        press_t_stat, press_pval = ttest_welch.from_moments(press_durations.sample_moments(), baseline["press_moments"]) if press_durations.n and baseline["press"] else (0, 1)
+        after_reacts = group.after_reacts
+        after_mean = after_reacts.mean() if after_reacts.n else 0
+        after_sd = after_reacts.stdev() if after_reacts.n > 1 else 0
+        after_effect = ((after_mean - neutral_mean) / neutral_mean * 100) if neutral_mean and after_mean else 0
+        z_after = ((after_mean - neutral_mean) / neutral_sd) if neutral_sd and after_mean else 0
+        after_t_stat, after_pval = ttest_welch.from_moments(after_reacts.sample_moments(), baseline["moments"]) if after_reacts.n and baseline["reacts"] else (0, 1)
+        return {
+            "mean": mean, "sd": sd, "cv": cv, "n": group.n, "miss": group.miss,
+            "effect": effect, "z": z, "pval": pval,
+            "after": {"mean": after_mean, "sd": after_sd, "effect": after_effect, "z": z_after, "pval": after_pval},
+            "press_mean": press_mean, "press_sd": press_sd, "press_effect": press_effect, "press_pval": press_pval
+        }
+
+    def category_stats(self):
+        # Базова лінія категорій — нейтральні реакції без обрізання 3 SD
+        neutral = self.neutral.reacts
+        neutral_mean = neutral.mean() if neutral.n else 1
+        neutral_sd = neutral.stdev() if neutral.n > 1 else 0
+        baseline = self._baseline()
+        return {cat: self._summarize(group, neutral_mean, neutral_sd, baseline) for cat, group in self.by_category.items()}
+
+    def stimulus_stats(self, cat, neutral_stats):
+        # Базова лінія стимулів — обрізана статистика нейтральної категорії
+        neutral_mean = neutral_stats.get("mean", 1)
+        neutral_sd = neutral_stats.get("sd", 0)
+        baseline = self._baseline()
+        stats = []
+        for (stim_cat, stim), group in self.by_stimulus.items():
+            if stim_cat != cat:
+                continue
+            stim_stats = {"stimulus": stim, "category": cat}
+            stim_stats.update(self._summarize(group, neutral_mean, neutral_sd, baseline))
+            miss_pct = (group.miss / group.n * 100) if group.n else 0
+            stim_stats["miss_pct"] = miss_pct
+            stim_stats["consecutive_misses"] = group.max_run
+            stim_stats["sequence_irregularity"] = stim_stats["cv"] * 0.5 + miss_pct * 0.3 + group.max_run * 10
+            stats.append(stim_stats)
+        return stats
+
+class TimingQuality:
+    # ЗМІНА ВІД 18.10.2026: Похибки тривалості фаз (виміряний offset мінус запланований) за (категорією, фазою),
+    # частка проб поза допуском і найгірші проби. Як і TrialAnalysis, будується одним проходом або наростає по пробі
+    WORST = 5
+
+    def __init__(self, store, tolerance):
+        self.store = store
+        self.tolerance = tolerance
+        self.errors = {}
+        self.out = {}
+        self.trials = 0
+        self.out_count = 0
+        # (max |err|, номер проби, похибки фаз) за спаданням; рівні — у порядку проб
+        self.worst = []
+        for i in range(len(store)):
+            self.append(i)
+
+    def append(self, i):
+        c = self.store.columns
+        errors = {}
+        for phase in TIMING_PHASES:
+            off = c[f"{phase}_off"][i]
+            if not math.isnan(off):
+                err = errors[phase] = off - c[f"{phase}_sched_off"][i]
+                key = (c["category"][i], phase)
+                moments = self.errors.get(key)
+                if moments is None:
+                    moments = self.errors[key] = Moments()
+                    self.out[key] = 0
+                moments.add(err)
+                if abs(err) > self.tolerance:
+                    self.out[key] += 1
+        if not errors:
+            return
+        max_err = max(abs(e) for e in errors.values())
+        self.trials += 1
+        if max_err > self.tolerance:
+            self.out_count += 1
+        if len(self.worst) < self.WORST or max_err > self.worst[-1][0]:
+            pos = len(self.worst)
+            while pos and self.worst[pos - 1][0] < max_err:
+                pos -= 1
+            self.worst.insert(pos, (max_err, i, errors))
+            del self.worst[self.WORST:]
+
+    def by_category(self):
+        # [(категорія, фаза, Moments похибок, проб поза допуском)] у порядку категорій і фаз
+        categories = self.store.strings["category"]
+        return sorted((categories[cat], phase, moments, self.out[(cat, phase)]) for (cat, phase), moments in self.errors.items())
+
+# Рівні відсотка впізнання/значущості (≥ поріг) і їхні підписи у звіті
+RECOGNITION_LABELS = [(80, "Високе впізнання"), (50, "Ймовірне впізнання"), (20, "Слабке впізнання"), (None, "Невпізнаний")]
+SIGNIFICANCE_LABELS = [(80, "Висока значущість"), (50, "Ймовірна значущість"), (20, "Слабка значущість"), (None, "Незначущий")]
+# Таблиці впізнання/значущості: назва -> (заголовок, назва стовпця відсотка)
+REPORT_TABLES = {
+    "composite": ("2. Результати тестування (Композитний індекс впізнання)", "Відсоток впізнання (%)"),
+    "smirnov": ("Результати тестування (Смирнов, впізнання)", "Відсоток впізнання (%)"),
+    "kostandov": ("Результати тестування (Костандов, впізнання)", "Відсоток впізнання (%)"),
+    "luria": ("Результати тестування (Лурія, впізнання)", "Відсоток впізнання (%)"),
+    "smirnov_significance": ("Результати тестування (Смирнов, значущість)", "Відсоток значущості (%)"),
+    "kostandov_significance": ("Результати тестування (Костандов, значущість)", "Відсоток значущості (%)"),
+    "luria_significance": ("Результати тестування (Лурія, значущість)", "Відсоток значущості (%)"),
+}
+# Правила зупинки адаптивного розподілу (allocation.py) у звіті
+ALLOCATION_RULES = {"decided": "визначено", "max_repeats": "ліміт показів", "budget": "вичерпано бюджет", "baseline": "базова лінія"}
+# Числові поля стимулу в CSV/JSON звіту
+REPORT_RECORD_FIELDS = ["stimulus", "category", "n", "miss", "miss_pct", "mean", "sd", "cv", "effect", "z", "pval",
+                        "press_mean", "press_sd", "kz", "kd", "kaz", "char", "delta_tmr", "pos", "iv",
+                        "smi_percent", "kos_percent", "lur_percent"]
+
+def _median_sorted(ordered):
+    # statistics.median для вже впорядкованих значень
+    n = len(ordered)
+    if n % 2:
+        return ordered[n // 2]
+    return (ordered[n // 2 - 1] + ordered[n // 2]) / 2
+
+def _abs_rank(ordered, rank):
+    # Елемент rank (від 0) серед |значень| за зростанням; ordered — значення за зростанням
+    lo, hi = 0, len(ordered) - 1
+    for _ in range(len(ordered) - 1 - rank):
+        if -ordered[lo] > ordered[hi]:
+            lo += 1
+        else:
+            hi -= 1
+    return abs(max(-ordered[lo], ordered[hi]))
+
+def _level_label(percent, labels):
+    for threshold, label in labels:
+        if threshold is None or percent >= threshold:
+            return label
+
+class SessionAnalysisMixin:
+    # ЗМІНА ВІД 18.10.2026: Аналіз і звіт сесії. Очікує атрибути config, trials, person_info,
+    # test_end_time_str, startup_ms, session_id, norms (норми з norms.py або None), analysis і timing_quality
+    # (накопичувачі, що наростали під час сесії, або None — тоді один прохід по trials), allocation (підсумок
+    # адаптивного розподілу з плану сесії або None) та метод log(type_, msg) —
+    # їх надає PsychoSemanticTestApp, робочий процес сесії або пакетний переаналіз
+    def _analyze_respondent_state(self, all_data):
+        state_stats = {}
+        adaptation_cv = None
+        for block in ["adaptation", "main"]:
+            block_data = [d for d in all_data if d["stage"] in [block, f"{block}_repeat"]]
+            reacts = [d["reaction"] for d in block_data if d["reaction"]]
+            miss_count = len([d for d in block_data if d["miss"]])
+            n = len(block_data)
+            miss_pct = (miss_count / n * 100) if n else 0
+            mean = statistics.mean(reacts) if reacts else 0
+            sd = statistics.stdev(reacts) if len(reacts) > 1 else 0
+            cv = (sd / mean * 100) if mean else 0
+            conclusion = "Готовність" if block == "adaptation" and cv < 10 and miss_pct < 5 else "Стабільність" if block == "main" and cv < 15 and miss_pct < 5 else "Нестабільність"
+            if block == "adaptation":
+                adaptation_cv = cv
+            fatigue = ""
+            if block == "main" and adaptation_cv is not None and cv > adaptation_cv * 1.25:
+                fatigue = "Попередження: можлива втома (CV зросло на >25%)"
+            state_stats[block] = {"mean": mean, "cv": cv, "miss_pct": miss_pct, "conclusion": conclusion, "fatigue": fatigue}
+        return state_stats
+
+    def _analyze_by_category(self, analysis):
+        if not analysis.n:
+            self.log("WARNING", "Немає даних для аналізу за категоріями")
+            return {}
+        return analysis.category_stats()
+
+    def _calculate_recognition_metrics(self, stats, neutral_stats):
+        # ЗМІНА ВІД 17.07.2025: Новий метод для розрахунку метрик впізнання (Смирнов, Костандов, Лурія)
+        kz = stats["mean"] / neutral_stats.get("mean", 1) if neutral_stats.get("mean", 1) else 1  # Кз (Смирнов)
+        kd = neutral_stats.get("mean", 1) / stats["mean"] if stats["mean"] else 1  # Кд (Костандов)
+        kaz = stats["press_mean"] / neutral_stats.get("press_mean", 1) if neutral_stats.get("press_mean", 1) else 1  # КАЗ (Лурія)
+        char = stats["miss"] / stats["n"] if stats["n"] else 0  # ЧАР (Лурія)
+        delta_tmr = stats["after"]["mean"] - neutral_stats.get("mean", 0) if stats["after"]["mean"] else 0  # Післядія
+        pos = stats.get("sequence_irregularity", 0)  # POS (аналіз послідовності)
+        iv = (kz * 0.4 + (1/kd if kd else 0) * 0.3 + kaz * 0.2 + char * 0.1) * 100  # Композитний індекс (ІВ)
+        
+        # Відсоток впізнання
+        smi_percent = 0
+        if kz > 1.5:
+            smi_percent = 90
+        elif kz > 1.2:
+            smi_percent = 80
+        elif kz > 1.0:
+            smi_percent = 50
+        smi_interpret = _level_label(smi_percent, RECOGNITION_LABELS)
+        
+        kos_percent = 0
+        if kd < 0.6:
+            kos_percent = 90
+        elif kd < 0.8:
+            kos_percent = 80
+        elif kd < 1.0:
+            kos_percent = 50
+        kos_interpret = _level_label(kos_percent, RECOGNITION_LABELS)
+        
+        lur_percent = 0
+        if kaz > 1.5 or char > 0.2:
+            lur_percent = 90
+        elif kaz > 1.2 or char > 0.1:
+            lur_percent = 80
+        elif kaz > 1.0 or char > 0.05:
+            lur_percent = 50
+        lur_interpret = _level_label(lur_percent, RECOGNITION_LABELS)
+        
+        return {
+            "kz": kz, "kd": kd, "kaz": kaz, "char": char, "delta_tmr": delta_tmr, "pos": pos, "iv": iv,
+            "smi_percent": smi_percent, "smi_interpret": smi_interpret,
+            "kos_percent": kos_percent, "kos_interpret": kos_interpret,
+            "lur_percent": lur_percent, "lur_interpret": lur_interpret
+        }
+
+    def _analyze_by_stimulus(self, analysis, cat, neutral_stats):
+        stats = analysis.stimulus_stats(cat, neutral_stats)
+        for stim_stats in stats:
+            stim_stats.update(self._calculate_recognition_metrics(stim_stats, neutral_stats))  # ЗМІНА ВІД 17.07.2025: Додано метрики впізнання
+            if stim_stats["miss_pct"] > 50:
+                self.log("WARNING", f"Стимул {stim_stats['stimulus']} ({cat}) має {stim_stats['miss_pct']:.1f}% пропусків, позначено як невалідний")
+        return stats
+
+    def _analyze_all_stimuli(self, analysis):
+        # ЗМІНА ВІД 18.10.2026: Усі небуферні стимули з метриками впізнання — для індексу сесій і популяційних норм
+        neutral_stats = self._analyze_by_category(analysis).get("neutral", {})
+        stats = []
+        for cat in analysis.by_category:
+            if cat != "buffer":
+                stats.extend(self._analyze_by_stimulus(analysis, cat, neutral_stats))
+        return stats
+
+    def _report_meta(self):
+        # ЗМІНА ВІД 18.10.2026: Заголовкові дані звіту — для JSON/CSV і титулу HTML
+        return {"session_id": self.session_id, "uuid": self.person_info.get("uuid"), "start_time": self.person_info.get("start_time"),
+                "end_time": self.test_end_time_str, "startup_ms": self.startup_ms}
+
+    def _generate_report(self):
+        # ЗМІНА ВІД 18.10.2026: Текст звіту — один із рендерерів моделі звіту (report.py)
+        return render_text(self._report_meta(), self._report_blocks())
+
+    def _write_report(self, outputs):
+        # ЗМІНА ВІД 18.10.2026: Усі формати ({формат: шлях}) за один прохід по блоках звіту, одразу на диск
+        write_report(self._report_meta(), self._report_blocks(), outputs)
+
+    def _report_blocks(self):
+        # ЗМІНА ВІД 18.10.2026: Звіт як послідовність блоків report.py. Сім таблиць впізнання і значущості
+        # заповнюються за один прохід по стимулах; пороги беруться з _calculate_recognition_metrics,
+        # ширини стовпців рахує сама Table
+        yield Text("=" * 60)
+        yield Heading("                   ЗВІТ ПРО ТЕСТУВАННЯ                    ", level=1)
+        yield Text("=" * 60, "")
+
+        # Блок 1: Інформація про тестування
+        yield Heading("1. Інформація про тестування")
+        info = [f"UUID респондента: {self.person_info['uuid']}",
+                f"Дата і час початку тестування: {self.person_info['start_time']}",
+                f"Дата і час завершення тестування: {self.test_end_time_str}"]
+        if self.startup_ms is not None:
+            info.append(f"Час запуску програми до форми даних: {self.startup_ms:.0f} мс")
+        yield Text(*info, "")
+
+        # Блок 2: Результати тестування
+        analysis = self.analysis or TrialAnalysis(self.trials, ["main", "main_repeat"])
+        neutral_stats = self._analyze_by_category(analysis).get("neutral", {})
+        stats_by_stim = self._analyze_by_stimulus(analysis, "sensitive", neutral_stats)
+        if not stats_by_stim:
+            yield Text("Немає даних для сенситивних стимулів", "")
+            yield from self._timing_quality_blocks()
+            return
+
+        resampled = self._resample_effects(analysis, stats_by_stim)
+        tables = {name: [] for name in REPORT_TABLES}
+        records = []
+        for st in stats_by_stim:
+            if st["miss_pct"] > 50:
+                continue
+            stim = st["stimulus"]
+            tables["composite"].append({
+                "stimulus": stim,
+                "params": f"Кз={st['kz']:.2f}, Кд={st['kd']:.2f}, КАЗ={st['kaz']:.2f}, ЧАР={st['char']:.2f}, ΔТМР={st['delta_tmr']:.2f}, POS={st['pos']:.1f}",
+                "iv": f"{st['iv']:.1f}",
+                "interpret": _level_label(st["iv"], RECOGNITION_LABELS)
+            })
+            for name, params, percent in (("smirnov", f"Кз={st['kz']:.2f}", st["smi_percent"]),
+                                          ("kostandov", f"Кд={st['kd']:.2f}", st["kos_percent"]),
+                                          ("luria", f"КАЗ={st['kaz']:.2f}, ЧАР={st['char']:.2f}", st["lur_percent"])):
+                tables[name].append({"stimulus": stim, "params": params, "percent": f"{percent:.1f}",
+                                     "interpret": _level_label(percent, RECOGNITION_LABELS)})
+                tables[f"{name}_significance"].append({"stimulus": stim, "params": params, "percent": f"{percent:.1f}",
+                                                       "interpret": _level_label(percent, SIGNIFICANCE_LABELS)})
+            record = {key: st[key] for key in REPORT_RECORD_FIELDS}
+            if resampled is not None:
+                for key, value in resampled[stim].items():
+                    if key.endswith("_ci"):
+                        record[f"{key}_low"], record[f"{key}_high"] = value or (None, None)
+                    else:
+                        record[key] = value
+            records.append(record)
+        built = []
+        for name, (title, percent_label) in REPORT_TABLES.items():
+            sort_key = "iv" if name == "composite" else "percent"
+            rows = sorted(tables[name], key=lambda x: float(x[sort_key]), reverse=True)
+            headers = {"stimulus": "Сенситивний стимул", "params": "Параметри", sort_key: percent_label, "interpret": "Інтерпретація"}
+            built.append(Table(name, title, headers, rows, caps={"stimulus": 15},
+                               records=sorted(records, key=lambda x: x["iv"], reverse=True) if name == "composite" else None))
+        for table in built:
+            yield table
+            yield Text("")
+        if resampled is not None:
+            yield from self._resampling_blocks(built[0].records, resampled)
+        # Ширина найдовшої таблиці — для переносу висновків
+        max_table_width = max(table.text_width for table in built)
+
+        # Блок 3: Висновки
+        yield Heading("3. Висновки результатів тестування")
+        composite = built[0].rows
+        yield Heading("3.1. Висновок щодо впізнання", level=3)
+        high_recognition = [st["stimulus"] for st in composite if float(st["iv"]) >= 80]
+        probable_recognition = [st["stimulus"] for st in composite if 50 <= float(st["iv"]) < 80]
+        recognition_conclusion = "Респондент демонструє "
+        if high_recognition:
+            recognition_conclusion += f"високе впізнання для стимулів: {', '.join(high_recognition)}. "
+        if probable_recognition:
+            recognition_conclusion += f"Ймовірне впізнання для стимулів: {', '.join(probable_recognition)}. "
+        recognition_conclusion += "Емоційно значущі стимули мають вищі Кз, КАЗ та нижчі Кд, що свідчить про швидшу обробку (Костандов, 2004). "
+        recognition_conclusion += "Високий ЧАР вказує на емоційну значущість (Лурія). "
+        recognition_conclusion += "Композитний індекс (ІВ) підтверджує стабільність впізнання (Смирнов, 1995)."
+        yield Paragraph(recognition_conclusion, max_table_width)
+        yield Text("")
+
+        yield Heading("3.2. Висновок щодо значущості", level=3)
+        significance_conclusion = "Респондент демонструє "
+        if high_recognition:
+            significance_conclusion += f"високу значущість для стимулів: {', '.join(high_recognition)}. "
+        if probable_recognition:
+            significance_conclusion += f"Ймовірну значущість для стимулів: {', '.join(probable_recognition)}. "
+        significance_conclusion += "Високі значення Кз і КАЗ свідчать про емоційну значущість стимулів (Смирнов, 1995; Лурія). "
+        significance_conclusion += "Низькі Кд вказують на швидшу обробку значущих стимулів (Костандов, 2004). "
+        significance_conclusion += "Композитний індекс (ІВ) підтверджує стабільність оцінки значущості."
+        yield Paragraph(significance_conclusion, max_table_width)
+        yield Text("")
+
+        # Блок 4: Примітки
+        yield Heading("4. Примітки")
+        yield Heading("4.1. Параметри таблиць впізнання", level=3)
+        yield Text("- Кз (Смирнов, 1995): Коефіцієнт значущості, відношення середнього часу реакції до нейтрального. Кз > 1.2 вказує на впізнання.",
+                   "- Кд (Костандов, 2004): Коефіцієнт диференціації, відношення нейтрального часу до реакції. Кд < 0.8 свідчить про швидше впізнання.",
+                   "- КАЗ (Лурія): Коефіцієнт афективної значущості, відношення тривалості натискання до нейтрального. КАЗ > 1.2 вказує на емоційне впізнання.",
+                   "- ЧАР (Лурія): Частота атипових реакцій, частка пропусків. ЧАР > 0.2 свідчить про емоційну значущість.",
+                   "- ΔТМР: Післядія, різниця середнього часу реакції після стимулу та нейтрального.",
+                   "- POS: Аналіз послідовності, враховує позицію стимулу в тесті.",
+                   "- ІВ: Композитний індекс впізнання, зважена сума Кз, Кд, КАЗ, ЧАР.",
+                   "")
+        yield Heading("4.2. Параметри таблиць значущості", level=3)
+        yield Text("- Кз (Смирнов, 1995): Коефіцієнт значущості, відношення середнього часу реакції до нейтрального. Кз > 1.2 вказує на значущість.",
+                   "- Кд (Костандов, 2004): Коефіцієнт диференціації, відношення нейтрального часу до реакції. Кд < 0.8 свідчить про значущість.",
+                   "- КАЗ (Лурія): Коефіцієнт афективної значущості, відношення тривалості натискання до нейтрального. КАЗ > 1.2 вказує на значущість.",
+                   "- ЧАР (Лурія): Частота атипових реакцій, частка пропусків. ЧАР > 0.1 свідчить про значущість.",
+                   "")
+
+        yield from self._timing_quality_blocks()  # ЗМІНА ВІД 18.10.2026
+        yield from self._norm_blocks(analysis, stats_by_stim)  # ЗМІНА ВІД 18.10.2026
+        yield from self._allocation_blocks()  # ЗМІНА ВІД 18.10.2026
+
+    def _resample_effects(self, analysis, stats_by_stim):
+        # ЗМІНА ВІД 18.10.2026: Бутстреп-ДІ і перестановочні p для ефекту, z і ΔТМР (resampling.py, потрібен numpy).
+        # Ті самі вибірки, що й точкові оцінки: реакції після обрізання 3 SD і обрізана нейтральна базова лінія.
+        # Імпорт тут: numpy не потрібен до звіту і не сповільнює запуск
+        iterations = self.config.resampling_iterations
+        if not iterations:
+            return None
+        import resampling
+        if not resampling.available():
+            self.log("WARNING", "Ресемплінг пропущено: не встановлено numpy")
+            return None
+        stimuli, after = [], []
+        for st in stats_by_stim:
+            group = analysis.by_stimulus[(st["category"], st["stimulus"])]
+            stimuli.append(group.reacts.trimmed().values)
+            after.append(group.after_reacts.values)
+        results = resampling.resample_effects(stimuli, after, analysis.neutral.reacts.trimmed().values, iterations,
+                                              self.config.resampling_seed, workers=self.config.resampling_workers)
+        return {st["stimulus"]: result for st, result in zip(stats_by_stim, results)}
+
+    def _resampling_blocks(self, records, resampled):
+        ci = lambda value, interval: f"{value:.2f} [{interval[0]:.2f}; {interval[1]:.2f}]" if interval else f"{value:.2f}"
+        p = lambda value: f"{value:.4f}" if value is not None else "—"
+        table_data = []
+        for record in records:
+            result = resampled[record["stimulus"]]
+            table_data.append({
+                "stimulus": record["stimulus"],
+                "effect": ci(record["effect"], result["effect_ci"]),
+                "z": ci(record["z"], result["z_ci"]),
+                "p_perm": p(result["p_perm"]),
+                "delta_tmr": ci(record["delta_tmr"], result["delta_tmr_ci"]),
+                "delta_tmr_p_perm": p(result["delta_tmr_p_perm"])
+            })
+        headers = {"stimulus": "Сенситивний стимул", "effect": "Ефект, % [95% ДІ]", "z": "z [95% ДІ]", "p_perm": "p (перест.)",
+                   "delta_tmr": "ΔТМР, мс [95% ДІ]", "delta_tmr_p_perm": "p ΔТМР (перест.)"}
+        yield Table("resampling", f"Результати тестування (ресемплінг, {self.config.resampling_iterations} ітерацій)",
+                    headers, table_data, caps={"stimulus": 15})
+        yield Text("ДІ — перцентильний бутстреп; p — перестановочний тест різниці середніх з нейтральною базовою лінією.", "")
+
+    def _timing_quality_blocks(self):
+        # ЗМІНА ВІД 18.10.2026: Блок якості таймінгу — похибка тривалості проби/маски/паузи за категоріями
+        tolerance = self.config.timing_tolerance_ms
+        max_out_pct = self.config.timing_max_out_of_tolerance_pct
+        yield Heading(f"5. Якість таймінгу презентації (допуск ±{tolerance} мс)")
+        quality = self.timing_quality or TimingQuality(self.trials, tolerance)
+        if not quality.trials:
+            yield Text("Немає даних про таймінг")
+            return
+        table_data = []
+        for cat, phase, errs, out in quality.by_category():
+            # Одне сортування на медіану, P95 і максимум |похибки|: найбільші |err| — з обох кінців упорядкованого списку
+            ordered = sorted(errs.values)
+            p95 = _abs_rank(ordered, min(errs.n - 1, int(0.95 * errs.n)))
+            table_data.append({
+                "category": cat, "phase": phase, "n": errs.n,
+                "mean": f"{errs.mean():.2f}",
+                "sd": f"{errs.stdev():.2f}" if errs.n > 1 else "0.00",
+                "median": f"{_median_sorted(ordered):.2f}",
+                "p95": f"{p95:.2f}", "max": f"{abs(max(-ordered[0], ordered[-1])):.2f}",
+                "out": f"{out / errs.n * 100:.1f}"
+            })
+        headers = {"category": "Категорія", "phase": "Фаза", "n": "N", "mean": "Сер. похибка (мс)", "sd": "SD",
+                   "median": "Медіана", "p95": "P95 |err|", "max": "Max |err|", "out": "Поза допуском (%)"}
+        yield Table("timing", None, headers, table_data, rules=False)
+        out_pct = quality.out_count / quality.trials * 100
+        lines = ["", f"Проб поза допуском: {quality.out_count} з {quality.trials} ({out_pct:.1f}%)", "Найбільші відхилення:"]
+        for max_err, i, errors in quality.worst:
+            d = self.trials.record(i)
+            errs = ", ".join(f"{phase}={err:+.2f}" for phase, err in errors.items())
+            lines.append(f"- {d['stage']} | {d['stimulus'][:15]} ({d['category']}) | позиція {d['sequence_position']} | {errs} мс")
+        if out_pct > max_out_pct:
+            lines.append(f"Попередження: понад {max_out_pct}% проб поза допуском, сесію рекомендовано відхилити (перевантажена машина)")
+        else:
+            lines.append("Таймінг презентації в межах норми")
+        yield Text(*lines, "")
+
+    def _norm_blocks(self, analysis, stats_by_stim):
+        # ЗМІНА ВІД 18.10.2026: Ефекти сенситивних стимулів як перцентилі популяційної норми (norms.py).
+        # Якщо сесія вже входить до норми, її внесок віднімається
+        if self.norms is None or not self.norms.sessions:
+            return
+        exclude = self.norms.session_part(self.session_id, analysis, stats_by_stim)
+        yield Heading("6. Популяційні норми (перцентиль серед архівних сесій)")
+        metrics = {"kz": "Кз", "kaz": "КАЗ", "char": "ЧАР", "delta_tmr": "ΔТМР"}
+        table_data = []
+        for st in stats_by_stim:
+            if st["miss_pct"] > 50:
+                continue
+            row = {"stimulus": st["stimulus"]}
+            norm = "немає"
+            for metric in metrics:
+                ranked = self.norms.percentile(st["category"], st["stimulus"], metric, st[metric], exclude)
+                row[metric] = f"{st[metric]:.2f} (P{ranked[0]:.0f})" if ranked else f"{st[metric]:.2f}"
+                if ranked:
+                    norm = f"{ranked[2]}, n={ranked[1]}"
+            row["norm"] = norm
+            table_data.append(row)
+        if not table_data:
+            yield Text("Немає валідних сенситивних стимулів", "")
+            return
+        headers = {"stimulus": "Сенситивний стимул", "kz": "Кз (P)", "kaz": "КАЗ (P)", "char": "ЧАР (P)",
+                   "delta_tmr": "ΔТМР (P)", "norm": "Норма"}
+        yield Table("norms", None, headers, table_data, caps={"stimulus": 15}, rules=False)
+        yield Text("", f"P — частка значень норми, не більших за значення респондента (сесій у нормі: {len(self.norms.sessions) - (exclude is not None)}). "
+                   "Норма стимулу використовується, якщо в ній достатньо сесій, інакше — норма категорії.", "")
+
+    def _allocation_blocks(self):
+        # ЗМІНА ВІД 18.10.2026: Адаптивний розподіл основного блоку (allocation.py) — скільки показів отримав кожен
+        # стимул і за яким правилом зупинився; параметри правила — ті, з якими йшла сесія (з плану)
+        allocation = self.allocation
+        if not allocation:
+            return
+        yield Heading("7. Адаптивний розподіл проб основного блоку")
+        table_data = []
+        for stim, cat, shown, valid, rule, kz, kz_half, p in allocation["stimuli"]:
+            table_data.append({"stimulus": stim, "category": cat, "shown": shown, "valid": valid,
+                               "kz": "-" if kz is None else f"{kz:.2f} ± {kz_half:.2f}",
+                               "p": "-" if p is None else f"{p:.4f}", "rule": ALLOCATION_RULES[rule]})
+        headers = {"stimulus": "Стимул", "category": "Категорія", "shown": "Показів", "valid": "Валідних",
+                   "kz": "Кз ± ДІ", "p": "p", "rule": "Правило зупинки"}
+        yield Table("allocation", None, headers, table_data, caps={"stimulus": 15}, rules=False)
+        alpha, band = allocation["alpha"], allocation["p_band"]
+        thresholds = ", ".join(f"{t:.2f}" for t in allocation["thresholds"])
+        yield Text("", f"Спершу — по {allocation['min_repeats']} показів тестованого стимулу, далі раундами по одному показу "
+                   f"невизначеним (раундів: {allocation['rounds']}, бюджет показів: {allocation['budget']}, "
+                   f"не більше {allocation['max_repeats']} на стимул).",
+                   f"Визначено: {allocation['confidence'] * 100:g}% ДІ Кз (t-розподіл) не містить порогів Кз (пороги Кд — як 1/Кд): {thresholds}, "
+                   f"а p поза [{alpha / band:.4g}; {alpha * band:.4g}] навколо α={alpha}. "
+                   "Нейтральні стимули — базова лінія з фіксованою кількістю показів.", "")
@@ -0,0 +1,191 @@
+# Пакетний переаналіз архіву results/ без tkinter
+# Запуск: python batch_report.py [results] [--config config.json] [--norms results/norms.json] [--workers N] [--force]
+# Для кожної сесії results/<session_id>/ будує звіт reanalysis-<session_id>.txt (і .csv/.json/.html) поруч з оригіналами.
+# Проби беруться з trials-*.bin, а якщо його немає (аварія, Escape до збереження) — відновлюються з log-*.txt.
+# Сесії, чиї вхідні файли, конфігурація та код аналізу не змінилися, пропускаються (див. reanalysis.json)
+# Залежності: analysis.py, log_parser.py, settings.py, norms.py, report.py, session_plan.py
+
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import sys
+from analysis import TrialStore, SessionAnalysisMixin
+from log_parser import iter_log_sessions
+from report import report_outputs
+from session_plan import read_allocation
+from settings import ConfigError, Settings, load_settings
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+CODE_SOURCES = [os.path.join(CODE_DIR, "analysis.py"), os.path.join(CODE_DIR, "log_parser.py"), os.path.join(CODE_DIR, "norms.py"),
+                os.path.join(CODE_DIR, "report.py"), os.path.join(CODE_DIR, "resampling.py")]
+MANIFEST_NAME = "reanalysis.json"
+
+class SessionReanalysis(SessionAnalysisMixin):
+    def __init__(self, config, trials, person_info, test_end_time_str, session_id=None, norms=None):
+        self.config = config
+        self.trials = trials
+        self.person_info = person_info
+        self.test_end_time_str = test_end_time_str
+        self.session_id = session_id
+        self.norms = norms
+        self.startup_ms = None
+        self.analysis = None
+        self.timing_quality = None
+        self.allocation = None
+        self.warnings = []
+
+    def log(self, type_, msg):
+        self.warnings.append(f"{type_}|{msg}")
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def discover_sessions(results_dir):
+    return sorted(os.path.join(results_dir, name) for name in os.listdir(results_dir)
+                  if os.path.isfile(os.path.join(results_dir, name, "person.json")))
+
+def session_inputs(folder):
+    session_id = os.path.basename(folder)
+    inputs = {"person": os.path.join(folder, "person.json")}
+    trials_file = os.path.join(folder, f"trials-{session_id}.bin")
+    log_file = os.path.join(folder, f"log-{session_id}.txt")
+    if os.path.exists(trials_file):
+        inputs["trials"] = trials_file
+    elif os.path.exists(log_file):
+        inputs["log"] = log_file
+    report_file = os.path.join(folder, f"report-{session_id}.txt")
+    if os.path.exists(report_file):
+        inputs["report"] = report_file
+    # План сесії — джерело правил зупинки адаптивного розподілу для звіту
+    plan_file = os.path.join(folder, f"plan-{session_id}.json")
+    if os.path.exists(plan_file):
+        inputs["plan"] = plan_file
+    return inputs
+
+def inputs_fingerprint(inputs, config_digest, code_digest):
+    h = hashlib.sha256(f"{config_digest}|{code_digest}".encode())
+    for kind, path in sorted(inputs.items()):
+        st = os.stat(path)
+        h.update(f"|{kind}|{os.path.basename(path)}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+def read_end_time(report_file):
+    # Час завершення не зберігається окремо — беремо його з оригінального звіту
+    prefix = "Дата і час завершення тестування: "
+    if report_file:
+        with open(report_file, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(prefix):
+                    return line[len(prefix):].strip()
+    return "невідомо"
+
+def load_session(inputs):
+    # (trials, person_info, end_time, попередження) або None, якщо в логу немає жодної проби.
+    # Спільне для переаналізу та індексу сесій (session_index.py)
+    with open(inputs["person"], encoding="utf-8") as f:
+        person_info = json.load(f)
+    end_time = read_end_time(inputs.get("report"))
+    log_notes = []
+    if "trials" in inputs:
+        return TrialStore.load(inputs["trials"]), person_info, end_time, log_notes
+    recovered, session_count = None, 0
+    for recovered in iter_log_sessions(inputs["log"]):
+        session_count += 1
+    if recovered is None:
+        return None
+    trials = recovered.trials
+    if not inputs.get("report") and recovered.end_time:
+        end_time = f"{recovered.end_time} (останній запис логу)"
+    log_notes.append(f"WARNING|Проби відновлено з логу: {len(trials)}, нерозібраних рядків: {recovered.bad_lines}"
+                     f"{', останній рядок обрізано' if recovered.truncated else ''}")
+    if session_count > 1:
+        log_notes.append(f"WARNING|У логу {session_count} сесій, використано останню")
+    return trials, person_info, end_time, log_notes
+
+def reanalyze_session(folder, config, config_digest, code_digest, force=False, norms=None):
+    session_id = os.path.basename(folder)
+    try:
+        inputs = session_inputs(folder)
+        if "trials" not in inputs and "log" not in inputs:
+            return folder, "skipped", "немає trials-*.bin і log-*.txt"
+        fingerprint = inputs_fingerprint(inputs, config_digest, code_digest)
+        output_file = os.path.join(folder, f"reanalysis-{session_id}.txt")
+        manifest_file = os.path.join(folder, MANIFEST_NAME)
+        if not force and os.path.exists(output_file) and os.path.exists(manifest_file):
+            with open(manifest_file, encoding="utf-8") as f:
+                if json.load(f).get("fingerprint") == fingerprint:
+                    return folder, "unchanged", ""
+        loaded = load_session(inputs)
+        if loaded is None:
+            return folder, "skipped", "у log-*.txt немає проб"
+        trials, person_info, end_time, log_notes = loaded
+        session = SessionReanalysis(config, trials, person_info, end_time, session_id, norms)
+        session.warnings.extend(log_notes)
+        if "plan" in inputs:
+            session.allocation = read_allocation(inputs["plan"])
+        outputs = report_outputs(os.path.splitext(output_file)[0])
+        session._write_report(outputs)
+        manifest = {"fingerprint": fingerprint, "inputs": {kind: os.path.basename(path) for kind, path in inputs.items()},
+                    "outputs": [os.path.basename(path) for path in outputs.values()],
+                    "trials": len(trials), "warnings": session.warnings}
+        write_atomic(manifest_file, json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+        return folder, "done", ""
+    except Exception as e:
+        return folder, "error", f"{type(e).__name__}: {e}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетний переаналіз сесій results/<session_id>/")
+    parser.add_argument("results_dir", nargs="?", default="results")
+    parser.add_argument("--config", default="config.json", help="config.json для порогів таймінгу (необов'язково)")
+    parser.add_argument("--norms", help="norms.json для перцентилів відносно популяційних норм (див. norms.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="переаналізувати навіть незмінені сесії")
+    args = parser.parse_args(argv)
+    config = Settings({})
+    config_digest = ""
+    if os.path.exists(args.config):
+        # Помилка в config.json зупиняє запуск до старту процесів, а не в кожній сесії окремо
+        try:
+            config = load_settings(args.config)
+        except ConfigError as e:
+            print(e, file=sys.stderr)
+            return 2
+        config_digest = file_digest(args.config)
+    norms = None
+    if args.norms:
+        # norms.py сам імпортує цей модуль, тому імпорт тут, а не на початку файлу
+        from norms import Norms
+        norms = Norms.load(args.norms)
+        config_digest += "|" + file_digest(args.norms)
+    code_digest = "|".join(file_digest(path) for path in CODE_SOURCES)
+    sessions = discover_sessions(args.results_dir)
+    worker = functools.partial(reanalyze_session, config=config, config_digest=config_digest,
+                               code_digest=code_digest, force=args.force, norms=norms)
+    counts = {"done": 0, "unchanged": 0, "skipped": 0, "error": 0}
+    chunksize = max(1, len(sessions) // (args.workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for folder, status, message in pool.map(worker, sessions, chunksize=chunksize):
+            counts[status] += 1
+            if status in ("error", "skipped"):
+                print(f"{status.upper()}: {folder}: {message}", file=sys.stderr)
+    print(f"Сесій: {len(sessions)}, переаналізовано: {counts['done']}, без змін: {counts['unchanged']}, "
+          f"пропущено: {counts['skipped']}, помилок: {counts['error']}")
+    return 1 if counts["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+# Бенчмарки: аналіз і звіт на синтетичних сесіях та накладні витрати колбеків Tk під час показу стимулів.
+# analysis — TrialAnalysis, _analyze_by_category, _analyze_by_stimulus, _calculate_recognition_metrics і звіт
+# (з нуля, як у batch_report.py, і з готових накопичувачів, як у робочому процесі сесії)
+# для сітки «кількість проб × кількість стимулів»; текст звіту кожного випадку звіряється з еталоном
+# (benchmark_reference.json), тож прискорення не може непомітно змінити результат.
+# presentation — реальний Tk (під Xvfb): вартість кожного колбека фази проби та запізнення фаз відносно плану.
+# Результати — JSON з пласким словником metrics; compare показує регресії між двома запусками
+# Запуск: python benchmark.py analysis [--trials 1000,10000,100000,1000000] [--stimuli 10,100,1000,10000] [-o benchmark-analysis.json]
+#         xvfb-run python benchmark.py presentation [--trials 300] [-o benchmark-presentation.json]
+#         python benchmark.py compare base.json new.json [--threshold 20]
+# Залежності: analysis.py, batch_report.py, report.py, settings.py; presentation — tkinter, main012-s.py, simulate.py
+
+import argparse
+import datetime
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from analysis import TrialStore, TrialAnalysis, TimingQuality
+from batch_report import CODE_SOURCES, SessionReanalysis, file_digest, write_atomic
+from report import report_outputs
+from settings import Settings
+
+REFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_reference.json")
+# Частка сенситивних / нейтральних / позитивних серед слів синтетичної сесії і їхні середні часи реакції
+CATEGORY_RT = [("sensitive", 470), ("neutral", 420), ("positive", 430)]
+# Зміни менші за ці значення — шум вимірювання, а не регресія
+NOISE_FLOOR = {"sec": 0.005, "ms": 0.5, "us": 50}
+CALLBACKS = [("PsychoSemanticTestApp", name) for name in ("_next_stimulus", "_show_timed_stimulus", "_show_mask_after_stimulus",
+                                                          "_show_pause_after_mask", "_close_reaction_window", "_on_space")]
+CALLBACKS += [("KeyInput", "press"), ("KeyInput", "release")]
+
+def _int_list(value):
+    return [int(x) for x in value.split(",") if x]
+
+def _environment():
+    return {"created": datetime.datetime.now().isoformat(timespec="seconds"), "python": sys.version.split()[0],
+            "platform": platform.platform(), "code": {os.path.basename(path): file_digest(path)[:12] for path in CODE_SOURCES}}
+
+def synthetic_session(n_trials, n_stimuli, seed=0):
+    # Адаптація (30 буферів) і основний етап: кожне слово обгорнуте двома буферами, як у плані сесії.
+    # Пропуски ~3%, час реакції — нормальний розподіл навколо середнього категорії, таймінг фаз із запізненням до 3 мс
+    rng = random.Random(seed)
+    store = TrialStore()
+    words = [(f"w{i}", CATEGORY_RT[i % len(CATEGORY_RT)]) for i in range(n_stimuli)]
+    position = 0
+    t = 0.0
+
+    def add(stage, stimulus, category, mean_rt):
+        nonlocal position, t
+        position += 1
+        if rng.random() < 0.03:
+            row = store.append(stage, stimulus, category, None, None, True, "no_response", position)
+        else:
+            rt = max(150, int(rng.gauss(mean_rt, 60)))
+            row = store.append(stage, stimulus, category, rt, rt, False, None, position)
+            store.set_press_duration(row, max(30, int(rng.gauss(130, 30))))
+        timing = {}
+        sched = t
+        for phase, duration in (("probe", 60), ("mask", 100), ("pause", 800)):
+            on = sched + rng.random() * 3
+            timing[phase] = {"sched_on": round(sched, 3), "on": round(on, 3), "sched_off": round(on + duration, 3),
+                             "off": round(on + duration + rng.random() * 3, 3)}
+            sched = on + duration
+        store.set_timing(row, timing)
+        t = sched + 1300
+
+    for _ in range(30):
+        add("adaptation", "0101", "buffer", 420)
+    for i in range(max(0, n_trials - 30)):
+        if i % 3 == 1:
+            stimulus, (category, mean_rt) = words[(i // 3) % n_stimuli]
+            add("main", stimulus, category, mean_rt)
+        else:
+            add("main", "0101", "buffer", 420)
+    return store
+
+def _best(func, repeat):
+    # Найкращий з repeat запусків: менше залежить від сторонніх процесів
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def bench_analysis_case(n_trials, n_stimuli, repeat, workdir):
+    store = synthetic_session(n_trials, n_stimuli)
+    # Ресемплінг вимкнено: інакше час залежить від наявності numpy
+    config = Settings({"resampling_iterations": 0})
+    session = SessionReanalysis(config, store, {"uuid": "Benchmark", "start_time": "01.01.2026 09:00:00 EEST"},
+                                "01.01.2026 09:30:00 EEST", session_id=f"bench-{n_trials}x{n_stimuli}")
+    phases = {}
+    phases["analysis"], analysis = _best(lambda: TrialAnalysis(store, ["main", "main_repeat"]), repeat)
+    phases["by_category"], category_stats = _best(lambda: session._analyze_by_category(analysis), repeat)
+    neutral_stats = category_stats.get("neutral", {})
+    categories = [cat for cat in analysis.by_category if cat != "buffer"]
+    phases["by_stimulus"], stats = _best(lambda: [analysis.stimulus_stats(cat, neutral_stats) for cat in categories], repeat)
+    phases["recognition_metrics"], _ = _best(
+        lambda: [session._calculate_recognition_metrics(s, neutral_stats) for cat_stats in stats for s in cat_stats], repeat)
+    phases["generate_report"], report = _best(session._generate_report, repeat)
+    # Як у робочому процесі сесії: накопичувачі вже наповнені пробами, лишається підсумок
+    phases["timing_quality"], timing_quality = _best(lambda: TimingQuality(store, config.timing_tolerance_ms), repeat)
+    session.analysis = analysis
+    session.timing_quality = timing_quality
+    phases["finalize_report"], final_report = _best(session._generate_report, repeat)
+    outputs = report_outputs(os.path.join(workdir, "report"))
+    phases["write_report"], _ = _best(lambda: session._write_report(outputs), repeat)
+    digest = hashlib.sha256(report.encode("utf-8")).hexdigest()
+    # Звіт із накопичувачів мусить збігатися зі звітом, перерахованим з нуля, інакше еталон не збігатиметься
+    return phases, digest if final_report == report else "accumulators:" + hashlib.sha256(final_report.encode("utf-8")).hexdigest()
+
+def run_analysis(args):
+    reference = {}
+    if os.path.exists(REFERENCE_FILE):
+        with open(REFERENCE_FILE, encoding="utf-8") as f:
+            reference = json.load(f)
+    result = dict(_environment(), kind="analysis", cases=[], metrics={})
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        # Прогрів: перший випадок інакше платить за ліниві імпорти й заповнення кешів
+        bench_analysis_case(1000, 10, 1, workdir)
+        for n_trials in args.trials:
+            for n_stimuli in args.stimuli:
+                key = f"{n_trials}x{n_stimuli}"
+                phases, digest = bench_analysis_case(n_trials, n_stimuli, args.repeat, workdir)
+                expected = reference.get(key)
+                check = "missing" if expected is None else "ok" if expected == digest else "mismatch"
+                if args.update_reference:
+                    reference[key] = digest
+                    check = "updated"
+                mismatches += check == "mismatch"
+                result["cases"].append({"trials": n_trials, "stimuli": n_stimuli, "phases": phases, "digest": digest, "reference": check})
+                for phase, sec in phases.items():
+                    result["metrics"][f"{key}/{phase}_sec"] = sec
+                total = sum(phases.values())
+                print(f"{key}: " + ", ".join(f"{phase}={sec * 1000:.1f} мс" for phase, sec in phases.items())
+                      + f"; разом {total:.3f} с ({total / n_trials * 1e6:.1f} мкс/пробу), еталон: {check}")
+    if args.update_reference:
+        write_atomic(REFERENCE_FILE, (json.dumps(reference, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    write_atomic(args.output, json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"))
+    if mismatches:
+        print(f"Звіт відрізняється від еталона у {mismatches} випадках", file=sys.stderr)
+        return 1
+    return 0
+
+def _distribution(values, scale):
+    values = sorted(v * scale for v in values)
+    if not values:
+        return {}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"n": len(values), "mean": statistics.mean(values), "p50": pick(0.5), "p95": pick(0.95),
+            "p99": pick(0.99), "max": values[-1]}
+
+def presentation_config(workdir):
+    config = {"relaxation_words": {"ua": ["море"]}, "neutral_words": {"ua": ["стіл", "вікно", "двері", "стілець", "лампа", "книга"]},
+              "reference_words": {"ua": {"sensitive": ["гроші"], "neutral": ["хмара"], "cognitive": ["червоний"]}},
+              "instructions": {"ua": "Тисніть пробіл"}, "pause_interval_min": 10000, "session_seed": 1,
+              "resampling_iterations": 0}
+    with open(os.path.join(workdir, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False)
+    with open(os.path.join(workdir, "stimuli.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(f"{cat[0]}{i},{cat}" for cat in ("sensitive", "neutral", "positive") for i in range(10)))
+
+def run_presentation(args):
+    if not os.environ.get("DISPLAY"):
+        print("Потрібен дисплей: запустіть під Xvfb (xvfb-run python benchmark.py presentation)", file=sys.stderr)
+        return 2
+    import tkinter as tk
+    from simulate import APP_FILE, Respondent, respondent_params
+    output = os.path.abspath(args.output)
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench-presentation-")
+    presentation_config(workdir)
+    os.chdir(workdir)
+    spec = importlib.util.spec_from_file_location("psychosemantic_app", APP_FILE)
+    app_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_module)
+    costs = {f"{cls}.{name}": [] for cls, name in CALLBACKS}
+
+    def timed(name, method):
+        def wrapper(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return method(*a, **kw)
+            finally:
+                costs[name].append(time.perf_counter() - start)
+        return wrapper
+
+    for cls, name in CALLBACKS:
+        owner = getattr(app_module, cls)
+        setattr(owner, name, timed(f"{cls}.{name}", getattr(owner, name)))
+
+    class ListeningTk(tk.Tk):
+        # Як headless Tk у simulate.py: респондент дізнається про вікно реакції з bind
+        listener = None
+
+        def bind(self, sequence=None, func=None, add=None):
+            result = super().bind(sequence, func, add)
+            if self.listener is not None:
+                self.listener(sequence)
+            return result
+
+    class TkClock:
+        # Годинник Respondent у реальному часі: perf_counter і after справжнього Tk
+        def __init__(self, root):
+            self.root = root
+
+        @property
+        def t(self):
+            return time.perf_counter()
+
+        def at(self, t, callback, *a):
+            return self.root.after(max(0, round((t - time.perf_counter()) * 1000)), callback, *a)
+
+    root = ListeningTk()
+    respondent = Respondent(respondent_params({"form_ms": 10 ** 9, "read_ms": 10 ** 9}), random.Random(0), TkClock(root), root)
+    app = app_module.PsychoSemanticTestApp(root)
+    respondent.app = app
+    app.fio_var.set("Benchmark")
+    app.birth_var.set("01.01.1990")
+    app.consent_var.set(True)
+    app.validate_and_start()
+    root.unbind("<Return>")
+    root.focus_force()
+    # Лише основний блок потрібної довжини: без форми, відліку, адаптації й пауз; паузи між пробами — з config.json
+    app.plan.resolve_pauses(app.timing.pause_ranges)
+    main = app.plan.block("main")
+    block = [main[i % len(main)] for i in range(args.trials)]
+    app.stage = "main"
+    app.test_start_time = app.last_pause_time = time.perf_counter()
+    for cost in costs.values():
+        cost.clear()
+    root.after_idle(lambda: app._run_stimulus_block(block, next_callback=root.quit))
+    root.mainloop()
+    app._close_log()
+    root.destroy()
+    os.chdir(cwd)
+    shutil.rmtree(workdir, ignore_errors=True)
+    lateness = {}
+    for record in app.trials.records(["main"]):
+        for phase, values in record["timing"].items():
+            lateness.setdefault(f"{phase}_onset", []).append(values["on"] - values["sched_on"])
+            if values["off"] is not None:
+                lateness.setdefault(f"{phase}_offset", []).append(values["off"] - values["sched_off"])
+    result = dict(_environment(), kind="presentation", display=os.environ["DISPLAY"], tk=tk.TkVersion, trials=args.trials,
+                  callbacks={name: _distribution(values, 1e6) for name, values in costs.items()},
+                  lateness={name: _distribution(values, 1) for name, values in lateness.items()}, metrics={})
+    for name, dist in result["callbacks"].items():
+        if dist:
+            result["metrics"][f"callback/{name}/p50_us"] = dist["p50"]
+            result["metrics"][f"callback/{name}/p95_us"] = dist["p95"]
+            print(f"{name}: p50={dist['p50']:.0f} мкс, p95={dist['p95']:.0f} мкс, max={dist['max']:.0f} мкс (n={dist['n']})")
+    for name, dist in result["lateness"].items():
+        result["metrics"][f"lateness/{name}/p95_ms"] = dist["p95"]
+        print(f"{name}: запізнення p50={dist['p50']:.2f} мс, p95={dist['p95']:.2f} мс, max={dist['max']:.2f} мс")
+    write_atomic(output, json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"))
+    return 0
+
+def run_compare(args):
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)["metrics"]
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)["metrics"]
+    regressions = 0
+    for key in sorted(base.keys() & new.keys()):
+        old_value, new_value = base[key], new[key]
+        floor = NOISE_FLOOR[key.rsplit("_", 1)[1]]
+        ratio = new_value / old_value if old_value else float("inf")
+        regressed = ratio > 1 + args.threshold / 100 and new_value - old_value > floor
+        regressions += regressed
+        if regressed or args.verbose:
+            print(f"{'РЕГРЕСІЯ ' if regressed else ''}{key}: {old_value:.4g} -> {new_value:.4g} (x{ratio:.2f})")
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"лише в {'base' if key in base else 'new'}: {key}")
+    print(f"Метрик: {len(base.keys() & new.keys())}, регресій: {regressions}")
+    return 1 if regressions else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки аналізу, звіту та показу стимулів")
+    commands = parser.add_subparsers(dest="command", required=True)
+    analysis_parser = commands.add_parser("analysis", help="аналіз і звіт на синтетичних сесіях")
+    analysis_parser.add_argument("--trials", type=_int_list, default=[1000, 10000, 100000])
+    analysis_parser.add_argument("--stimuli", type=_int_list, default=[10, 100, 1000])
+    analysis_parser.add_argument("--repeat", type=int, default=3)
+    analysis_parser.add_argument("--update-reference", action="store_true", help="записати поточні звіти як еталон")
+    analysis_parser.add_argument("-o", "--output", default="benchmark-analysis.json")
+    presentation_parser = commands.add_parser("presentation", help="колбеки Tk і запізнення фаз (потрібен дисплей)")
+    presentation_parser.add_argument("--trials", type=int, default=300)
+    presentation_parser.add_argument("-o", "--output", default="benchmark-presentation.json")
+    compare_parser = commands.add_parser("compare", help="регресії між двома файлами результатів")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=20, help="допустиме сповільнення, %%")
+    compare_parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    return {"analysis": run_analysis, "presentation": run_presentation, "compare": run_compare}[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# Потоковий розбір log-*.txt у TrialStore
+# Відновлює проби сесій, які не дійшли до екрана звіту (аварія, Escape), з рядків SHOW / REACTION / MISS.
+# Лог читається по рядку, у пам'яті тримається лише поточна сесія; склеєні логи кількох сесій
+# розбиваються за рядком початку сесії, обрізаний останній рядок відкидається. Після продовження сесії з контрольної
+# точки проби, що не ввійшли до неї, відкидаються — застосунок показує їх повторно
+# Запуск: python log_parser.py log-<session_id>.txt [--save trials.bin]
+# Залежності: analysis.py
+
+import argparse
+import os
+import sys
+from analysis import TrialStore
+
+SESSION_START = "Розпочато нову сесію тесту".encode("utf-8")
+# Продовження з контрольної точки: проби після вказаної кількості не потрапили в контрольну точку і будуть повторені
+SESSION_RESUME = "Відновлення сесії: ".encode("utf-8")
+# У логах основних етапів причина пропуску пишеться українською, а в пробі зберігається код
+MISS_REASONS = {"Передчасна реакція": "premature", "Запізніла реакція": "late"}
+# Етапи адаптації зберігають у пробі саме текст причини
+RAW_REASON_STAGES = {"adaptation", "adaptation_repeat"}
+READ_BUFFER = 1 << 22
+
+class LogSession:
+    __slots__ = ("trials", "start_time", "end_time", "lines", "bad_lines", "truncated", "sequence_position", "last_rows")
+
+    def __init__(self, start_time=None):
+        self.trials = TrialStore()
+        self.start_time = start_time
+        self.end_time = start_time
+        self.lines = 0 if start_time is None else 1
+        self.bad_lines = 0
+        self.truncated = False
+        self.sequence_position = 0
+        # Остання проба кожного (етап, стимул, категорія): відпускання клавіші може прийти вже після SHOW наступної проби
+        self.last_rows = {}
+
+    def resume(self, msg):
+        # Відновлення сесії: проб=K, позиція=N
+        fields = dict(part.split("=") for part in msg[len(SESSION_RESUME):].decode("utf-8").split(", "))
+        self.trials.truncate(int(fields["проб"]))
+        self.sequence_position = int(fields["позиція"])
+        self.last_rows = {}
+
+    def show(self, msg):
+        # stage|stim|relax|start або stage|stim|cat|start|ts[|color=...]; relax-стимули не рахуються в sequence_position.
+        # Розбирається без декодування — це найчастіший рядок логу
+        if not msg.endswith(b"|relax|start"):
+            if b"|start|" not in msg:
+                raise ValueError("неповний рядок")
+            self.sequence_position += 1
+
+    def feed(self, type_, fields):
+        # Повторює логіку _record_trial / _watch_release застосунку для одного рядка REACTION / MISS
+        stage = fields[0]
+        if len(fields) < 4:
+            raise ValueError("неповний рядок")
+        if fields[-1].startswith("press_duration="):
+            # stage|stim|cat|press_duration=N — належить останній пробі того ж стимулу на тому ж етапі,
+            # навіть якщо між ними вже з'явився SHOW наступної проби
+            row = self.last_rows.get((stage, "|".join(fields[1:-2]), fields[-2]))
+            if row is None:
+                raise ValueError("press_duration без проби")
+            self.trials.set_press_duration(row, int(fields[-1][len("press_duration="):]))
+            return
+        # stage|stim|cat|t|OK|ts або stage|stim|cat|t|причина|ts
+        if len(fields) < 6:
+            raise ValueError("неповний рядок")
+        stimulus = "|".join(fields[1:-4])
+        category, t_field, status = fields[-4], fields[-3], fields[-2]
+        if type_ == b"REACTION":
+            if status != "OK":
+                raise ValueError(f"невідомий статус реакції: {status}")
+            row = self.trials.append(stage, stimulus, category, int(t_field), None, False, None, self.sequence_position)
+        elif t_field == "no_response":
+            row = self.trials.append(stage, stimulus, category, None, None, True, "no_response", self.sequence_position)
+        else:
+            reason = status if stage in RAW_REASON_STAGES else MISS_REASONS[status]
+            row = self.trials.append(stage, stimulus, category, None, int(t_field), True, reason, self.sequence_position)
+        self.last_rows[(stage, stimulus, category)] = row
+
+    def finish(self):
+        # Мітки часу під час розбору тримаються байтами, декодуються один раз наприкінці сесії
+        for name in ("start_time", "end_time"):
+            value = getattr(self, name)
+            if isinstance(value, bytes):
+                setattr(self, name, value.decode("utf-8", "replace"))
+        return self
+
+def iter_lines(f):
+    # Блоками по READ_BUFFER; залишок без перевода рядка наприкінці файлу — обірваний запис
+    tail = b""
+    while True:
+        chunk = f.read(READ_BUFFER)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield None
+
+def iter_log_sessions(path):
+    # Генератор LogSession по одній на кожну сесію у файлі; проби до першого рядка початку сесії
+    # (лог, обрізаний спереду) потрапляють у сесію без start_time
+    session = None
+    with open(path, "rb") as f:
+        for raw in iter_lines(f):
+            if raw is None:
+                if session is not None:
+                    session.truncated = True
+                break
+            parts = raw.lstrip(b"\x00").rstrip(b"\r").split(b"|", 2)
+            if len(parts) < 3:
+                if session is not None and parts[0]:
+                    session.bad_lines += 1
+                continue
+            ts, type_, msg = parts
+            if type_ == b"INFO" and msg == SESSION_START:
+                if session is not None:
+                    yield session.finish()
+                session = LogSession(ts)
+                continue
+            if session is None:
+                session = LogSession()
+            session.lines += 1
+            session.end_time = ts
+            try:
+                if type_ == b"SHOW":
+                    session.show(msg)
+                elif type_ == b"REACTION" or type_ == b"MISS":
+                    session.feed(type_, msg.decode("utf-8").split("|"))
+                elif type_ == b"INFO" and msg.startswith(SESSION_RESUME):
+                    session.resume(msg)
+            except (ValueError, IndexError, KeyError, UnicodeDecodeError):
+                session.bad_lines += 1
+    if session is not None:
+        yield session.finish()
+
+def parse_log(path):
+    # Остання сесія у файлі; у теці results/<session_id>/ лог зазвичай містить рівно одну
+    last = None
+    for session in iter_log_sessions(path):
+        last = session
+    return last
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Відновлення проб із log-*.txt")
+    parser.add_argument("log_file")
+    parser.add_argument("--save", help="зберегти проби у trials-файл (для кількох сесій додається номер)")
+    args = parser.parse_args(argv)
+    count = 0
+    for n, session in enumerate(iter_log_sessions(args.log_file), 1):
+        count = n
+        print(f"Сесія {n}: {session.start_time or 'невідомо'} — {session.end_time or 'невідомо'}, "
+              f"проб: {len(session.trials)}, рядків: {session.lines}, нерозібраних: {session.bad_lines}"
+              f"{', обрізано' if session.truncated else ''}")
+        if args.save:
+            root, ext = os.path.splitext(args.save)
+            target = args.save if n == 1 else f"{root}-{n}{ext}"
+            session.trials.save(target)
+    if not count:
+        print("Сесій не знайдено", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
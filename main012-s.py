@@ -1,7 +1,9 @@
 # Частина 1: Імпорти, конфігурація, допоміжні функції
 # Для об’єднання: розмістіть цей код на початку файлу main011-s.py
-# Залежності: tkinter, uuid, json, os, datetime, random, time, csv, statistics, scipy.stats, textwrap
+# Залежності: tkinter, uuid, json, os, datetime, random, time, csv, math, collections, analysis.py, session_plan.py, settings.py, session_index.py, norms.py, report.py, realtime.py, session_worker.py, allocation.py
 
+import time
+MODULE_T0 = time.perf_counter()
 import tkinter as tk
 from tkinter import messagebox
 import uuid
@@ -9,22 +11,21 @@ import json
 import os
 import datetime
 import random
-import time
 import csv
-import statistics
-from scipy.stats import ttest_ind
-import textwrap
+import math
+import collections
+from analysis import TrialStore, SessionAnalysisMixin, INT_NONE
+from session_plan import SessionPlan, PlannedTrial
+from report import report_outputs
+from settings import load_settings, AdaptiveTiming
+from realtime import RealtimeMode
+from session_worker import SessionWorker, read_checkpoint
+from allocation import AdaptiveAllocation, UNTESTED
 
 def load_config():
+    # ЗМІНА ВІД 18.10.2026: config.json перевіряється за схемою під час запуску (settings.py), помилка — одразу тут
     try:
-        with open('config.json', encoding='utf-8') as f:
-            config = json.load(f)
-            bg_color = config.get("bg_color", "#000000")
-            for lang in config.get("stroop_colors", {}):
-                for color in config["stroop_colors"][lang].values():
-                    if color.lower() == bg_color.lower():
-                        raise ValueError(f"Color {color} in stroop_colors matches bg_color {bg_color}, causing invisibility")
-            return config
+        return load_settings('config.json')
     except Exception as e:
         messagebox.showerror("Помилка", f"Не вдалося прочитати config.json:\n{e}")
         exit(1)
@@ -55,18 +56,308 @@ def gen_uuid():
 def now():
     return datetime.datetime.now().strftime("%d.%m.%Y %H:%M:%S EEST")  # ЗМІНА ВІД 17.07.2025: Формат дати для звіту
 
+def process_uptime():
+    # ЗМІНА ВІД 18.10.2026: Час від старту процесу (Linux /proc); без /proc — від імпорту модуля
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - MODULE_T0
+
+def find_unfinished_session(results_dir="results"):
+    # ЗМІНА ВІД 18.10.2026: Найновіша сесія з контрольними точками, яка не дійшла до звіту
+    try:
+        names = os.listdir(results_dir)
+    except OSError:
+        return None
+    candidates = []
+    for name in names:
+        checkpoint_file = os.path.join(results_dir, name, f"checkpoint-{name}.jsonl")
+        if os.path.exists(checkpoint_file) and not os.path.exists(os.path.join(results_dir, name, f"report-{name}.txt")):
+            candidates.append((os.path.getmtime(checkpoint_file), name))
+    return os.path.join(results_dir, max(candidates)[1]) if candidates else None
+
 def hide_cursor(widget):
     widget.config(cursor="none")
 
 def show_cursor(widget):
     widget.config(cursor="")
 
-class PsychoSemanticTestApp:
+class StimulusRenderer:
+    # ЗМІНА ВІД 18.10.2026: Одне полотно на всю сесію. Елементи проби, пулу масок з рамками та інфо-тексту
+    # створюються один раз, фази проби перемикаються лише зміною text/fill/state без перебудови віджетів
+    def __init__(self, master, bg_color, font_probe, font_mask, font_info, info_color, mask_frame):
+        self.master = master
+        self.bg_color = bg_color
+        self.font_probe = font_probe
+        self.font_mask = font_mask
+        self.font_info = font_info
+        self.info_color = info_color
+        self.mask_pad = mask_frame["pad"]
+        self.mask_frame_color = mask_frame["color"]
+        self.mask_frame_width = mask_frame["width"]
+        self.canvas = None
+        self.visible = set()
+        self.masks = []
+        self.mask_ids = []
+        self.mask_frame_ids = []
+
+    def set_masks(self, masks):
+        # ЗМІНА ВІД 18.10.2026: Пул масок сесії; елементи й рамки будуються одразу, якщо полотно вже є
+        self.masks = list(masks)
+        if self.canvas is not None and self.canvas.winfo_exists():
+            self._build_masks()
+
+    def _build_masks(self):
+        # Кожна маска пулу — власний текст і рамка з координатами, виміряними тут один раз; під час показу
+        # маска лише стає видимою. Прихований текст у Tk має порожній bbox, тому вимірюємо до приховування
+        stale = {item_id for item_id in self.mask_ids + self.mask_frame_ids if item_id is not None}
+        for item_id in stale:
+            self.canvas.delete(item_id)
+        self.visible -= stale
+        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
+        cx, cy = w // 2, h // 2
+        pad = self.mask_pad
+        self.mask_ids = []
+        self.mask_frame_ids = []
+        for text in self.masks:
+            # Рамка створюється перед текстом, тому текст завжди лежить над нею без lift()
+            frame_id = self.canvas.create_rectangle(cx, cy, cx, cy, outline=self.mask_frame_color, width=self.mask_frame_width, state="hidden")
+            mask_id = self.canvas.create_text(cx, cy, text=text, fill="white", font=self.font_mask)
+            bbox = self.canvas.bbox(mask_id)
+            self.canvas.itemconfigure(mask_id, state="hidden")
+            if bbox:
+                x0, y0, x1, y1 = bbox
+                self.canvas.coords(frame_id, x0-pad, y0-pad, x1+pad, y1+pad)
+            else:
+                self.canvas.delete(frame_id)
+                frame_id = None
+            self.mask_ids.append(mask_id)
+            self.mask_frame_ids.append(frame_id)
+
+    def attach(self):
+        for widget in self.master.winfo_children():
+            if widget is not self.canvas:
+                widget.destroy()
+        hide_cursor(self.master)
+        if self.canvas is not None and self.canvas.winfo_exists():
+            return self.canvas
+        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
+        cx, cy = w // 2, h // 2
+        self.canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.probe_id = self.canvas.create_text(cx, cy, text="", fill="white", font=self.font_probe, state="hidden")
+        self.info_id = self.canvas.create_text(cx, cy, text="", fill=self.info_color, font=self.font_info, state="hidden")
+        self.visible = set()
+        self.mask_ids = []
+        self.mask_frame_ids = []
+        self._build_masks()
+        return self.canvas
+
+    def _show_only(self, *item_ids):
+        for item_id in self.visible.difference(item_ids):
+            self.canvas.itemconfigure(item_id, state="hidden")
+        for item_id in item_ids:
+            if item_id not in self.visible:
+                self.canvas.itemconfigure(item_id, state="normal")
+        self.visible = set(item_ids)
+        # ЗМІНА ВІД 18.10.2026: Час появи фази фіксується після скидання кадру, а не до малювання
+        self.canvas.update_idletasks()
+        return time.perf_counter()
+
+    def show_probe(self, text, color="white"):
+        self.canvas.itemconfigure(self.probe_id, text=text, fill=color)
+        return self._show_only(self.probe_id)
+
+    def show_mask(self, index):
+        frame_id = self.mask_frame_ids[index]
+        if frame_id is None:
+            return self._show_only(self.mask_ids[index])
+        return self._show_only(self.mask_ids[index], frame_id)
+
+    def show_info(self, text):
+        self.canvas.itemconfigure(self.info_id, text=text)
+        return self._show_only(self.info_id)
+
+    def show_blank(self):
+        return self._show_only()
+
+class TrialScheduler:
+    # ЗМІНА ВІД 18.10.2026: Усі таймери сесії з абсолютними дедлайнами на time.perf_counter().
+    # Tk будить трохи раніше (spin_ms), останні мілісекунди добираються активним очікуванням,
+    # тому запізнення одного пробудження не накопичується в наступних фазах
+    def __init__(self, master, spin_ms=2):
+        self.master = master
+        self.spin_sec = spin_ms / 1000
+        self.pending = {}
+        self.next_token = 0
+        self.fired_deadline = None
+
+    def at(self, deadline, callback):
+        self.next_token += 1
+        token = self.next_token
+        self._arm(token, deadline, callback)
+        return token
+
+    def after(self, delay_ms, callback):
+        return self.at(time.perf_counter() + delay_ms / 1000, callback)
+
+    def _arm(self, token, deadline, callback):
+        delay_ms = max(0, math.ceil((deadline - time.perf_counter() - self.spin_sec) * 1000 - 1e-6))
+        self.pending[token] = self.master.after(delay_ms, lambda: self._fire(token, deadline, callback))
+
+    def _fire(self, token, deadline, callback):
+        if self.pending.pop(token, None) is None:
+            return
+        if deadline - time.perf_counter() > self.spin_sec:
+            self._arm(token, deadline, callback)
+            return
+        while time.perf_counter() < deadline:
+            pass
+        self.fired_deadline = deadline
+        try:
+            callback()
+        finally:
+            self.fired_deadline = None
+
+    def cancel(self, token):
+        after_id = self.pending.pop(token, None)
+        if after_id is not None:
+            self.master.after_cancel(after_id)
+
+    def cancel_all(self):
+        for after_id in self.pending.values():
+            self.master.after_cancel(after_id)
+        self.pending.clear()
+
+class KeyInput:
+    # ЗМІНА ВІД 18.10.2026: Пробіл з часом X-сервера (event.time, мс) на шкалі time.perf_counter(), а не з моментом,
+    # коли Tk дійшов до колбека. Зсув між шкалами — мінімум (perf_counter - event.time) за останні OFFSET_WINDOW подій:
+    # подія не може бути оброблена раніше, ніж сталася, а у вільному циклі затримка ≈ 0.
+    # Прив'язки bind_all бачать усі натискання, навіть поза вікном реакції, тож клавіша, затиснута до стимулу,
+    # і автоповтор X11 (пара KeyRelease/KeyPress з тим самим часом) не стають новою реакцією. Відпускання
+    # підтверджується в after_idle: пара автоповтору приходить однією пачкою, і KeyPress встигає його скасувати
+    OFFSET_WINDOW = 64
+
+    def __init__(self, master, key="space"):
+        self.master = master
+        self.pending_release = None
+        self.offsets = collections.deque(maxlen=self.OFFSET_WINDOW)
+        self.wrap = 0
+        self.last_raw = None
+        self.down = False
+        self.down_time = None
+        self.release_raw = None
+        self.release_callback = None
+        self.last_event = None
+        self.last_result = None
+        self.events = []
+        master.bind_all(f"<{key}>", self.press, add="+")
+        master.bind_all(f"<KeyRelease-{key}>", self.release, add="+")
+
+    def _map(self, event):
+        now = time.perf_counter()
+        raw = getattr(event, "time", 0) or 0
+        if not raw:
+            return now, None
+        raw &= 0xFFFFFFFF
+        # Лічильник X-сервера 32-бітний і переповнюється раз на ~49 діб
+        if self.last_raw is not None and raw < self.last_raw - 2**31:
+            self.wrap += 2**32
+        self.last_raw = raw
+        server = (raw + self.wrap) / 1000
+        self.offsets.append(now - server)
+        return min(now, server + min(self.offsets)), raw
+
+    def _seen(self, kind, event):
+        # Ту саму подію отримують і прив'язка вікна реакції, і bind_all — обробляється вона один раз
+        key = (kind, getattr(event, "serial", None), getattr(event, "time", None))
+        if key == self.last_event:
+            return True
+        self.last_event = key
+        return False
+
+    def press(self, event):
+        # Час натискання або None, якщо клавіша вже натиснута (автоповтор, утримання з попередньої проби)
+        if self._seen("press", event):
+            return self.last_result
+        t, raw = self._map(event)
+        if self.pending_release is not None and raw is not None and raw == self.release_raw:
+            # Друга половина пари автоповтору: відпускання не було
+            self.master.after_cancel(self.pending_release[0])
+            self.pending_release[1][3] = True
+            self.pending_release = None
+            self.down = True
+        repeat = self.down
+        self.events.append(["press", raw, t, repeat])
+        if repeat:
+            self.last_result = None
+            return None
+        self.down = True
+        self.down_time = t
+        self.release_callback = None
+        self.last_result = t
+        return t
+
+    def release(self, event):
+        if self._seen("release", event):
+            return
+        t, raw = self._map(event)
+        entry = ["release", raw, t, not self.down]
+        self.events.append(entry)
+        if not self.down:
+            return
+        self.down = False
+        self.release_raw = raw
+        self.pending_release = (self.master.after_idle(self._confirm_release, t), entry)
+
+    def _confirm_release(self, t):
+        self.pending_release = None
+        if self.release_callback is not None:
+            self.release_callback(int((t - self.down_time) * 1000))
+            self.release_callback = None
+
+    def on_release(self, callback):
+        # callback(тривалість_мс) — для поточного натискання, навіть якщо відпущено вже після вікна реакції
+        self.release_callback = callback
+
+    def take_events(self):
+        # Сирий потік з останнього виклику: [тип, event.time, час perf_counter, автоповтор або відпускання без натискання]
+        events, self.events = self.events, []
+        return events
+
+class PsychoSemanticTestApp(SessionAnalysisMixin):
+    # ЗМІНА ВІД 18.10.2026: Наступний етап після кожного блоку — для продовження сесії з контрольної точки
+    NEXT_STAGE = {
+        "adaptation": "after_adaptation", "preparation": "start_calibration",
+        "calibration": "start_reference", "reference": "start_main", "main": "after_main",
+        # Окремі етапи повторень сесій, розпочатих до вбудованих повторів
+        "adaptation_repeat": "after_adaptation", "calibration_repeat": "start_reference",
+        "reference_repeat": "start_main", "main_repeat": "finish_test"
+    }
+    # ЗМІНА ВІД 18.10.2026: Категорії, пропуски яких повторюються в тому ж блоці, поки стимул не набере
+    # VALID_TARGET валідних реакцій або max_miss_attempts спроб
+    RETRY_CATEGORIES = {
+        "adaptation": ("buffer",), "calibration": ("neutral", "buffer"),
+        "reference": ("sensitive", "neutral", "cognitive", "buffer"),
+        "main": ("sensitive", "neutral", "positive", "buffer")
+    }
+    VALID_TARGET = 3
+
     def __init__(self, master):
         self.master = master
         self.master.title("Психосемантичний тест")
         self.config = load_config()
-        if "max_miss_attempts" not in self.config:
+        self.log_data = collections.deque(maxlen=self.config.log_tail_size)
+        self.worker = None
+        self.checkpoint_file = None
+        self.checkpoint_count = 0
+        # Останній рядок таблиці проб, уже записаний у контрольну точку
+        self.checkpoint_row = None
+        if "max_miss_attempts" in self.config.missing:
             self.log("WARNING", "Параметр max_miss_attempts не знайдено в config.json, використовується значення за замовчуванням: 5")
         self.stimuli_main = load_stimuli()
         self.session_id = None
@@ -76,33 +367,54 @@ class PsychoSemanticTestApp:
         self.stage = None
         self.log_file = None
         self.report_file = None
-        self.log_data = []
-        self.results = {
-            'preparation': [], 'calibration': [], 'calibration_repeat': [],
-            'reference': [], 'reference_repeat': [], 'main': [], 'main_repeat': []
-        }
-        self.buffer_symbols = self.config.get("buffer_symbols", "01010010110010101001011010011001")
+        self.trials = TrialStore()
+        self.current_row = None
+        self.trials_file = None
+        self.plan = None
+        self.plan_file = None
         self.test_start_time = None
         self.test_end_time = None
         self.last_pause_time = None
         self._setup_fonts_colors()
+        self.renderer = StimulusRenderer(self.master, self.bg_color, self.font_probe, self.font_mask,
+                                         self.font_info, self.info_color, self.config.mask_frame)
+        self.scheduler = TrialScheduler(self.master, self.config.timer_spin_ms)
+        self.realtime = RealtimeMode(self.config.realtime_mode)
+        self.timing = AdaptiveTiming(self.config.pause_range_ms)
+        self.allocator = AdaptiveAllocation(self.config.adaptive_allocation, self.config.test_repeats)
+        # Підсумок адаптивного розподілу з правилами зупинки стимулів для звіту; None — режим не діяв
+        self.allocation = None
+        # Черга повторів поточного блоку: скільки показів кожного (стимул, категорія) ще попереду,
+        # вставлені повтори блоку і ще не записані в контрольну точку
+        self.retry_pending = collections.Counter()
+        self.retry_categories = ()
+        self.retry_count = 0
+        self.retry_logged = 0
+        self.retries = []
+        self.keys = KeyInput(self.master)
+        self.startup_ms = None
+        self.norms = None
+        self.analysis = None
+        self.timing_quality = None
         self.show_personal_data_form()
+        self.master.after_idle(self._on_startup_ready)
         self.master.bind('<Escape>', lambda e: self._on_escape())
         self.missed_stimuli = {}
         self.press_time = None
         self.sequence_position = 0  # ЗМІНА ВІД 17.07.2025: Додано для аналізу послідовності (POS)
+        resume_folder = find_unfinished_session()
+        if resume_folder:
+            self.master.after_idle(self._offer_resume, resume_folder)
 
     def _setup_fonts_colors(self):
         cfg = self.config
-        self.border_width = cfg.get("border_width", 20)
-        self.border_color = cfg.get("border_color", "#FFD700")
+        self.border_width = cfg.border_width
+        self.border_color = cfg.border_color
         self.bg_color = "#000000"
-        font_name = cfg.get("probe_font", "Arial")
-        font_size = cfg.get("probe_font_size", 44)
-        self.font_probe = (font_name, font_size, "bold")
-        self.font_mask = (font_name, font_size, "bold")
-        self.font_info = (cfg.get("info_font", "Arial"), cfg.get("info_font_size", 32), "bold")
-        self.info_color = cfg.get("info_color", "#FFFFFF")
+        self.font_probe = (cfg.probe_font, cfg.probe_font_size, "bold")
+        self.font_mask = (cfg.probe_font, cfg.probe_font_size, "bold")
+        self.font_info = (cfg.info_font, cfg.info_font_size, "bold")
+        self.info_color = cfg.info_color
 
     def show_personal_data_form(self):
         self.clear_widgets()
@@ -133,6 +445,61 @@ class PsychoSemanticTestApp:
         btn.grid(row=4, columnspan=2, pady=(16, 12))
         self.master.bind('<Return>', lambda e: self.validate_and_start())
 
+    def _on_startup_ready(self):
+        # ЗМІНА ВІД 18.10.2026: Форма намальована і цикл подій вільний — фіксуємо час запуску;
+        # scipy для звіту вантажить уже робочий процес сесії (session_worker.py)
+        self.startup_ms = process_uptime() * 1000
+
+    def _offer_resume(self, folder):
+        # ЗМІНА ВІД 18.10.2026: Продовження перерваної сесії (аварія, Escape) з останньої завершеної проби
+        if self.session_id is not None:
+            return
+        if not messagebox.askyesno("Незавершена сесія", f"Знайдено незавершену сесію {os.path.basename(folder)}.\nПродовжити її з місця переривання?"):
+            return
+        try:
+            self._resume_session(folder)
+        except Exception as e:
+            messagebox.showerror("Помилка", f"Не вдалося відновити сесію:\n{e}")
+
+    def _resume_session(self, folder):
+        session_id = os.path.basename(folder)
+        state = read_checkpoint(os.path.join(folder, f"checkpoint-{session_id}.jsonl"))
+        with open(os.path.join(folder, "person.json"), encoding="utf-8") as f:
+            person_info = json.load(f)
+        self.person_info = person_info
+        self.lang = person_info.get("lang", "ua")
+        self.lang_var.set(self.lang)
+        self.master.unbind('<Return>')
+        self._open_session(session_id)
+        self.plan = SessionPlan.load(self.plan_file, self.config)
+        self.allocation = self.plan.allocation
+        self.renderer.set_masks(self.plan.masks)
+        self.trials = state["trials"]
+        self.missed_stimuli = state["missed"]
+        self.sequence_position = state["seq"]
+        if state["pause_range_ms"] is not None:
+            self.timing.restore(state["pause_range_ms"])
+        # Формат рядка розбирає log_parser.py: проби після цієї кількості та позиція перезаписуються повтором
+        self.log("INFO", f"Відновлення сесії: проб={len(self.trials)}, позиція={self.sequence_position}")
+        if state["stage"] is None:
+            self.show_instructions()
+            return
+        self.stage = state["stage"]
+        self.clear_widgets()
+        self.show_countdown(3, lambda: self._resume_block(state))
+
+    def _resume_block(self, state):
+        self.test_start_time = time.perf_counter() - state["ms"] / 1000
+        self.last_pause_time = time.perf_counter()
+        run_block = {"adaptation": self._run_adaptation_block, "simple": self._run_simple_block,
+                     "stimulus": self._run_stimulus_block}[state["kind"]]
+        # Повтори, вставлені в блок до аварії, відтворюються в тому ж порядку на тих самих позиціях
+        block = list(self.plan.block(self.stage))
+        for pos, rows in state["retries"]:
+            block[pos:pos] = [PlannedTrial(*row) for row in rows]
+        self.retry_count = len(state["retries"])
+        run_block(block, getattr(self, self.NEXT_STAGE[self.stage]), state["idx"])
+
     def validate_and_start(self):
         fio = self.fio_var.get().strip()
         birth = self.birth_var.get().strip()
@@ -146,6 +513,10 @@ class PsychoSemanticTestApp:
         except:
             messagebox.showwarning("Помилка", "Введіть дату у форматі ДД.ММ.РРРР.")
             return
+        missing = self.config.language_errors(lang)
+        if missing:
+            messagebox.showwarning("Помилка", "У config.json немає стимулів для обраної мови:\n" + "\n".join(missing))
+            return
         self.person_info = {
             'fio': fio,
             'birth': birth,
@@ -178,8 +549,8 @@ class PsychoSemanticTestApp:
         if lang:
             lang = lang.get()
         else:
-            lang = self.config.get("languages", ["ua"])[0]
-        instruct_text = self.config.get("instructions", {}).get(lang, "Немає інструкції для цієї мови.")
+            lang = self.config.languages[0]
+        instruct_text = self.config.instructions.get(lang, "Немає інструкції для цієї мови.")
         font_title = ("Arial", 40, "bold")
         font_instr = ("Arial", 26)
         title = "Інструкція до тесту" if lang == "ua" else "Инструкция к тесту"
@@ -192,119 +563,84 @@ class PsychoSemanticTestApp:
         self.clear_widgets()
         self.show_countdown(3, self.start_adaptation)
 
-    def show_countdown(self, seconds, callback):
+    def show_countdown(self, seconds, callback, deadline=None):
         self.clear_widgets()
         w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
         lbl = tk.Label(self.master, text=f"Підготовка...\n{seconds}", font=("Arial", 36, "bold"), fg="#FFD700", bg=self.bg_color)
         lbl.place(relx=0.5, rely=0.5, anchor="center")
+        deadline = (deadline or time.perf_counter()) + 1.0
         if seconds > 1:
-            self.master.after(1000, lambda: self.show_countdown(seconds-1, callback))
+            self.scheduler.at(deadline, lambda: self.show_countdown(seconds-1, callback, deadline))
         else:
-            self.master.after(1000, callback)
+            self.scheduler.at(deadline, callback)
 
     def start_adaptation(self):
         self.stage = "adaptation"
         self.test_start_time = time.perf_counter()
         self.last_pause_time = self.test_start_time
         self.log("INFO", "--- Адаптаційний блок ---")
-        buf = self.buffer_symbols
-        count = self.config.get("adaptation_buffer_count", 30)
-        block = [buf] * count
-        self._run_adaptation_block(block, next_callback=self.repeat_missed_adaptation)
-
-    def repeat_missed_adaptation(self):
-        self.stage = "adaptation_repeat"
-        self.log("INFO", "--- Повторення пропущених адаптаційних стимулів ---")
-        block = []
-        max_attempts = self.config.get("max_miss_attempts", 5)
-        for (stim, cat), data in self.missed_stimuli.items():
-            if cat == "buffer" and data["valid_count"] < 3 and data["attempts"] < max_attempts:
-                remaining = min(3 - data["valid_count"], max_attempts - data["attempts"])
-                block.extend([stim] * remaining)
-        random.shuffle(block)
-        if block:
-            self.log("INFO", f"Повторення адаптаційних стимулів: {len(block)}")
-            self._run_adaptation_block(block, next_callback=self.after_adaptation)
-        else:
-            self.log("INFO", "Пропущені адаптаційні стимули відсутні або досягнуто 3 валідні реакції")
-            self.missed_stimuli = {k: v for k, v in self.missed_stimuli.items() if v["valid_count"] < 3 and v["attempts"] < max_attempts}
-            self.after_adaptation()
+        self._run_adaptation_block(self.plan.block("adaptation"), next_callback=self.after_adaptation)
 
-    def _run_adaptation_block(self, block, next_callback):
-        self.clear_widgets()
-        self.current_block = block
-        self.block_results = []
-        self.current_idx = 0
+    def _run_adaptation_block(self, block, next_callback, start_idx=0):
+        self.renderer.attach()
+        self.current_block = list(block)
+        self.current_idx = start_idx
         self.block_next_callback = next_callback
-        hide_cursor(self.master)
+        if start_idx == 0:
+            self._checkpoint_block("adaptation")
+        self._start_retries(start_idx)
+        self.realtime.enter_block()
         self._next_adaptation_stimulus()
 
     def _next_adaptation_stimulus(self):
         current_time = time.perf_counter()
-        pause_interval_sec = self.config.get("pause_interval_min", 5) * 60
+        pause_interval_sec = self.config.pause_interval_min * 60
         if self.test_start_time and (current_time - self.last_pause_time) >= pause_interval_sec:
-            self._show_pause_screen()
+            self._show_pause_screen(self._next_adaptation_stimulus)
             return
         if self.current_idx >= len(self.current_block):
-            self.results[self.stage] = self.block_results
+            self.scheduler.cancel_all()
+            self.worker.flush(fsync=True)
             show_cursor(self.master)
+            self._leave_realtime_block()
+            self._end_retries()
             self.block_next_callback()
             return
-        stim = self.current_block[self.current_idx]
+        trial = self.current_block[self.current_idx]
         self.current_idx += 1
         self.sequence_position += 1  # ЗМІНА ВІД 17.07.2025: Оновлення позиції для POS
-        self._show_adaptation_stimulus(stim)
+        self._show_adaptation_stimulus(trial)
 
-    def _show_adaptation_stimulus(self, stim):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
+    def _show_adaptation_stimulus(self, trial):
+        # ЗМІНА ВІД 18.10.2026: Тривалості, маска та колір беруться з плану сесії, без config.get і random у колбеках
         self.reaction_captured = False
-        self.stimulus_shown_time = time.perf_counter()
-        self.stimulus_value = stim
-        self.stimulus_cat = "buffer"
+        self.stimulus_shown_time = self.renderer.show_blank()
+        self._timing_phase("probe", self.stimulus_shown_time, trial.probe_ms)
+        self.stimulus_value = trial.stimulus
+        self.stimulus_cat = trial.category
         self.stimulus_logged = False
         self.master.bind("<space>", self._on_space_adaptation)
-        self.master.bind("<KeyRelease-space>", self._on_space_release_adaptation)
         show_ts = datetime.datetime.now().isoformat(timespec='milliseconds')
-        self.log("SHOW", f"{self.stage}|{stim}|buffer|start|{show_ts}")
-        stim_dur = self._get_probe_duration("buffer")
-        mask_dur = self.config.get("mask_duration_ms", 100)
-        pause_ms = self.config.get("adaptation_pause_ms", 1000)
-        self.stimulus_timer = self.master.after(stim_dur, lambda: self._show_mask_adaptation(stim))
-        self.mask_timer = self.master.after(stim_dur + mask_dur, lambda: self._show_pause_adaptation(stim, pause_ms))
-        self.pause_timer = self.master.after(stim_dur + mask_dur + pause_ms, lambda: self._close_reaction_adaptation(stim))
-
-    def _show_mask_adaptation(self, stim):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
-        mask_txt = self._generate_mask()
-        rect_pad = self.config.get("mask_frame", {}).get("pad", 32)
-        rect_color = self.config.get("mask_frame", {}).get("color", "#FFFFFF")
-        rect_width = self.config.get("mask_frame", {}).get("width", 8)
-        text_id = canvas.create_text(w//2, h//2, text=mask_txt, fill="white", font=self.font_mask)
-        bbox = canvas.bbox(text_id)
-        if bbox:
-            x0, y0, x1, y1 = bbox
-            canvas.create_rectangle(x0-rect_pad, y0-rect_pad, x1+rect_pad, y1+rect_pad, outline=rect_color, width=rect_width)
-            canvas.lift(text_id)
-
-    def _show_pause_adaptation(self, stim, pause_ms):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
+        self.log("SHOW", f"{self.stage}|{trial.stimulus}|buffer|start|{show_ts}")
+        self.scheduler.at(self.stimulus_shown_time + trial.probe_ms / 1000, lambda: self._show_mask_adaptation(trial))
+
+    def _show_mask_adaptation(self, trial):
+        onset = self.renderer.show_mask(trial.mask)
+        self._timing_phase("mask", onset, trial.mask_ms, prev="probe")
+        self.scheduler.at(onset + trial.mask_ms / 1000, lambda: self._show_pause_adaptation(trial))
+
+    def _show_pause_adaptation(self, trial):
+        onset = self.renderer.show_blank()
+        self._timing_phase("pause", onset, trial.pause_ms, prev="mask")
+        self.scheduler.at(onset + trial.pause_ms / 1000, lambda: self._close_reaction_adaptation(trial))
 
     def _on_space_adaptation(self, event):
         if self.reaction_captured or self.stimulus_logged:
             return
-        self.press_time = time.perf_counter()
+        press_time = self.keys.press(event)
+        if press_time is None:
+            return
+        self.press_time = press_time
         t_react = int((self.press_time - self.stimulus_shown_time) * 1000)
         react_ts = datetime.datetime.now().isoformat(timespec='milliseconds')
         stim_key = (self.stimulus_value, self.stimulus_cat)
@@ -314,70 +650,47 @@ class PsychoSemanticTestApp:
         if t_react < 50 or t_react > 2000:
             reason = "Передчасна реакція" if t_react < 50 else "Запізніла реакція"
             self.log("MISS", f"{self.stage}|{self.stimulus_value}|buffer|{t_react}|{reason}|{react_ts}")
-            res = {"stimulus": self.stimulus_value, "category": "buffer", "reaction": None, "t": t_react, "miss": True, "reason": reason, "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
+            self._record_trial(None, True, reason, t_react)
         else:
             self.log("REACTION", f"{self.stage}|{self.stimulus_value}|buffer|{t_react}|OK|{react_ts}")
-            res = {"stimulus": self.stimulus_value, "category": "buffer", "reaction": t_react, "miss": False, "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
+            self._record_trial(t_react, False)
             self.missed_stimuli[stim_key]["valid_count"] += 1
-        self.block_results.append(res)
         self.stimulus_logged = True
         self.reaction_captured = True
         self.master.unbind("<space>")
+        self._watch_release()
 
-    def _on_space_release_adaptation(self, event):
-        if not self.stimulus_logged:
-            return
-        release_time = time.perf_counter()
-        if self.press_time:
-            press_duration_ms = int((release_time - self.press_time) * 1000)
-            for res in self.block_results[-1:]:
-                if res["stimulus"] == self.stimulus_value and res["category"] == self.stimulus_cat:
-                    res["press_duration"] = press_duration_ms
-                    self.log("REACTION", f"{self.stage}|{self.stimulus_value}|buffer|press_duration={press_duration_ms}")
-        self.press_time = None
-        self.master.unbind("<KeyRelease-space>")
-
-    def _close_reaction_adaptation(self, stim):
+    def _close_reaction_adaptation(self, trial):
         self.reaction_captured = True
         self.master.unbind("<space>")
-        self.master.unbind("<KeyRelease-space>")
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
+        self._timing_close(self.renderer.show_blank())
         if not self.stimulus_logged:
             stim_key = (self.stimulus_value, self.stimulus_cat)
             if stim_key not in self.missed_stimuli:
                 self.missed_stimuli[stim_key] = {"valid_count": 0, "attempts": 0}
             self.missed_stimuli[stim_key]["attempts"] += 1
             self.log("MISS", f"{self.stage}|{self.stimulus_value}|buffer|no_response|Пропуск|{datetime.datetime.now().isoformat(timespec='milliseconds')}")
-            res = {"stimulus": self.stimulus_value, "category": self.stimulus_cat, "reaction": None, "t": None, "miss": True, "reason": "no_response", "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
-            self.block_results.append(res)
-        post_reaction_delay = self.config.get("post_reaction_delay_ms", 300)
-        self.master.after(post_reaction_delay, self._next_adaptation_stimulus)
+            self._record_trial(None, True, "no_response")
+        self.trials.set_timing(self.current_row, self.trial_timing)
+        self._schedule_retry()
+        self._checkpoint_trial(self.current_row)
+        post_reaction_delay = self.config.post_reaction_delay_ms
+        self.scheduler.after(post_reaction_delay, self._next_adaptation_stimulus)
+        self.realtime.collect()
 
     def after_adaptation(self):
-        block_data = self.results.get("adaptation", [])
-        reacts = [d["reaction"] for d in block_data if d["reaction"] is not None]
-        miss_count = len([d for d in block_data if d["reaction"] is None])
-        n = len(block_data)
+        rows = self.trials.select(["adaptation"])
+        reaction = self.trials.column("reaction")
+        reacts = [reaction[i] for i in rows if reaction[i] != INT_NONE]
+        miss_count = len(rows) - len(reacts)
+        n = len(rows)
+        reaction.release()
         miss_pct = (miss_count / n) * 100 if n else 100
         m = int(sum(reacts)/len(reacts)) if reacts else 0
-        min_pause = 600
-        if miss_pct <= 15 and m < 700:
-            min_pause = 600
-        elif miss_pct <= 15 and 700 <= m <= 950:
-            min_pause = ((m + 300) // 100) * 100
-        else:
-            min_pause = max(1000, min(((m + 500) // 100) * 100, 1100))
-        max_pause = min(min_pause + 500, 1100)
-        self.config["pause_range_ms"] = {
-            "default": [min_pause, max_pause],
-            "neutral": [min_pause, max_pause],
-            "sensitive": [min_pause + 100, max_pause],
-            "cognitive": [min_pause + 200, max_pause]
-        }
+        # ЗМІНА ВІД 18.10.2026: Адаптовані паузи — у явному стані self.timing, config залишається незмінним
+        min_pause, max_pause = self.timing.adapt(m, miss_pct)
+        self.plan.resolve_pauses(self.timing.pause_ranges)
+        self.plan.save(self.plan_file)
         self.log("INFO", f"Адаптація завершена: середній час={m} мс, пропуски={miss_pct:.1f}%, нова пауза={min_pause}-{max_pause} мс")
         self.start_preparation()
 
@@ -385,327 +698,247 @@ class PsychoSemanticTestApp:
         self.master.unbind("<Return>")
         self.log("INFO", "=== Початок тесту ===")
         self.stage = "preparation"
-        block = []
-        for w in self.config['relaxation_words'][self.lang]:
-            block += [w] * self.config.get("preparation_repeats", 3)
-        random.shuffle(block)
-        self._run_simple_block(block, next_callback=self.start_calibration)
+        self._run_simple_block(self.plan.block("preparation"), next_callback=self.start_calibration)
 
     def start_calibration(self):
         self.stage = "calibration"
         self.log("INFO", "--- Калібрування ---")
-        buf = self.buffer_symbols
-        block = []
-        neutral_count = self.config.get("calibration_neutral_count", 6)
-        buffer_per_neutral = self.config.get("calibration_buffer_per_neutral", 0.67)
-        neutral_words = self.config['neutral_words'][self.lang][:neutral_count]
-        for stim in neutral_words:
-            if random.random() < buffer_per_neutral:
-                block.append((buf, "buffer"))
-            block.append((stim, "neutral"))
-        random.shuffle(block)
-        self.log("INFO", f"Калібрувальний блок: {len(neutral_words)} нейтральних, {len(block) - len(neutral_words)} буферних")
-        self._run_stimulus_block(block, next_callback=self.repeat_missed_calibration)
-
-    def repeat_missed_calibration(self):
-        self.stage = "calibration_repeat"
-        self.log("INFO", "--- Повторення пропущених калібрувальних стимулів ---")
-        block = []
-        max_attempts = self.config.get("max_miss_attempts", 5)
-        for (stim, cat), data in self.missed_stimuli.items():
-            if cat in ["neutral", "buffer"] and data["valid_count"] < 3 and data["attempts"] < max_attempts:
-                remaining = min(3 - data["valid_count"], max_attempts - data["attempts"])
-                block.extend([(stim, cat)] * remaining)
-        random.shuffle(block)
-        final_block = []
-        buf = self.buffer_symbols
-        for stim, cat in block:
-            final_block.append((buf, "buffer"))
-            final_block.append((stim, cat))
-            final_block.append((buf, "buffer"))
-        if final_block:
-            self.log("INFO", f"Повторення калібрувальних стимулів: {len(block)}")
-            self._run_stimulus_block(final_block, next_callback=self.start_reference)
-        else:
-            self.log("INFO", "Пропущені калібрувальні стимули відсутні або досягнуто 3 валідні реакції")
-            self.missed_stimuli = {k: v for k, v in self.missed_stimuli.items() if v["valid_count"] < 3 and v["attempts"] < max_attempts}
-            self.start_reference()
+        block = self.plan.block("calibration")
+        neutral_count = sum(1 for trial in block if trial.category == "neutral")
+        self.log("INFO", f"Калібрувальний блок: {neutral_count} нейтральних, {len(block) - neutral_count} буферних")
+        self._run_stimulus_block(block, next_callback=self.start_reference)
 
     def start_reference(self):
         self.stage = "reference"
         self.log("INFO", "--- Реперний блок ---")
-        block = []
-        words = []
-        for cat in ["sensitive", "neutral", "cognitive"]:
-            words += [(w, cat) for w in self.config["reference_words"][self.lang][cat]]
-        n_rep = self.config.get("reference_test_config", {}).get("repetitions", 3)
-        words = words * n_rep
-        random.shuffle(words)
-        buf = self.buffer_symbols
-        for stim, cat in words:
-            block.append((buf, "buffer"))
-            block.append((stim, cat))
-            block.append((buf, "buffer"))
-        self.log("INFO", f"Реперний блок: {len(words)} стимулів, {len(block) - len(words)} буферних")
-        self._run_stimulus_block(block, next_callback=self.repeat_missed_reference)
-
-    def repeat_missed_reference(self):
-        self.stage = "reference_repeat"
-        self.log("INFO", "--- Повторення пропущених реперних стимулів ---")
-        block = []
-        max_attempts = self.config.get("max_miss_attempts", 5)
-        for (stim, cat), data in self.missed_stimuli.items():
-            if cat in ["sensitive", "neutral", "cognitive", "buffer"] and data["valid_count"] < 3 and data["attempts"] < max_attempts:
-                remaining = min(3 - data["valid_count"], max_attempts - data["attempts"])
-                block.extend([(stim, cat)] * remaining)
-        random.shuffle(block)
-        final_block = []
-        buf = self.buffer_symbols
-        for stim, cat in block:
-            final_block.append((buf, "buffer"))
-            final_block.append((stim, cat))
-            final_block.append((buf, "buffer"))
-        if final_block:
-            self.log("INFO", f"Повторення реперних стимулів: {len(block)}")
-            self._run_stimulus_block(final_block, next_callback=self.start_main)
-        else:
-            self.log("INFO", "Пропущені реперні стимули відсутні або досягнуто 3 валідні реакції")
-            self.missed_stimuli = {k: v for k, v in self.missed_stimuli.items() if v["valid_count"] < 3 and v["attempts"] < max_attempts}
-            self.start_main()
+        block = self.plan.block("reference")
+        words = len(block) // 3
+        self.log("INFO", f"Реперний блок: {words} стимулів, {len(block) - words} буферних")
+        self._run_stimulus_block(block, next_callback=self.start_main)
 
     def start_main(self):
         self.stage = "main"
         self.log("INFO", "--- Основний тест ---")
-        block = []
-        words = self.stimuli_main * self.config.get("test_repeats", 3)
-        random.shuffle(words)
-        buf = self.buffer_symbols
-        for stim, cat in words:
-            block.append((buf, "buffer"))
-            block.append((stim, cat))
-            block.append((buf, "buffer"))
-        self.log("INFO", f"Основний блок: {len(words)} стимулів, {len(block) - len(words)} буферних")
-        self._run_stimulus_block(block, next_callback=self.repeat_missed_main)
-
-    def repeat_missed_main(self):
-        self.stage = "main_repeat"
-        self.log("INFO", "--- Повторення пропущених основних стимулів ---")
-        block = []
-        max_attempts = self.config.get("max_miss_attempts", 5)
-        for (stim, cat), data in self.missed_stimuli.items():
-            if cat in ["sensitive", "neutral", "positive", "buffer"] and data["valid_count"] < 3 and data["attempts"] < max_attempts:
-                remaining = min(3 - data["valid_count"], max_attempts - data["attempts"])
-                block.extend([(stim, cat)] * remaining)
-        random.shuffle(block)
-        final_block = []
-        buf = self.buffer_symbols
-        for stim, cat in block:
-            final_block.append((buf, "buffer"))
-            final_block.append((stim, cat))
-            final_block.append((buf, "buffer"))
-        if final_block:
-            self.log("INFO", f"Повторення основних стимулів: {len(block)}")
-            self._run_stimulus_block(final_block, next_callback=self.finish_test)
-        else:
-            self.log("INFO", "Пропущені основні стимули відсутні або досягнуто 3 валідні реакції")
-            self.missed_stimuli = {k: v for k, v in self.missed_stimuli.items() if v["valid_count"] < 3 and v["attempts"] < max_attempts}
+        block = self.plan.block("main")
+        words = len(block) // 3
+        self.log("INFO", f"Основний блок: {words} стимулів, {len(block) - words} буферних")
+        self._run_stimulus_block(block, next_callback=self.after_main)
+
+    def after_main(self):
+        # ЗМІНА ВІД 18.10.2026: Адаптивний розподіл (allocation.py): після кожного раунду невизначені стимули отримують
+        # ще по показу в кінці основного блоку, визначені вибувають. Раунд дописується в план до першої його проби,
+        # тож продовжена сесія доходить до того самого рішення
+        if not self.allocator.enabled:
             self.finish_test()
+            return
+        stimuli = list(dict.fromkeys(self.stimuli_main))
+        decisions = self.allocator.decisions(self.trials, stimuli)
+        items = self.allocator.next_round(decisions, stimuli)
+        if items:
+            self.current_block.extend(self.plan.extend_block("main", items))
+            self.plan.save(self.plan_file)
+            open_count = sum(1 for d in decisions if d["status"] == "open")
+            self.log("INFO", f"Адаптивний розподіл, раунд {self.plan.rounds['main']}: невизначених стимулів {open_count}, додано показів {len(items)}")
+            self._run_stimulus_block(self.current_block, self.after_main, self.current_idx)
+            return
+        self.allocation = self.allocator.summary(decisions, stimuli, self.plan.rounds.get("main", 0))
+        self.plan.allocation = self.allocation
+        self.plan.save(self.plan_file)
+        tested = [row for row in self.allocation["stimuli"] if row[1] not in UNTESTED]
+        rules = collections.Counter(row[4] for row in tested)
+        self.log("INFO", f"Адаптивний розподіл завершено: раундів {self.allocation['rounds']}, показів тестованих стимулів "
+                         f"{sum(row[2] for row in tested)} (бюджет {self.allocation['budget']}), визначено {rules['decided']}, "
+                         f"ліміт показів {rules['max_repeats']}, вичерпано бюджет {rules['budget']}")
+        self.finish_test()
 
 # Продовження в частині 3
     # Частина 3: Методи обробки стимулів, аналізу даних і формування звіту
 # Для об’єднання: розмістіть цей код після частини 2 у файлі main011-s.py
 # Залежності: методи з частин 1 і 2, tkinter, datetime, random, statistics, scipy.stats
 
-    def _run_simple_block(self, block, next_callback):
-        self.clear_widgets()
+    def _run_simple_block(self, block, next_callback, start_idx=0):
+        self.renderer.attach()
         self.current_block = block
-        self.block_results = []
-        self.current_idx = 0
+        self.current_idx = start_idx
         self.block_next_callback = next_callback
-        hide_cursor(self.master)
+        if start_idx == 0:
+            self._checkpoint_block("simple")
+        self.realtime.enter_block()
         self._next_simple_stimulus()
 
     def _next_simple_stimulus(self):
         if self.current_idx >= len(self.current_block):
-            self.results[self.stage] += self.block_results
+            self.scheduler.cancel_all()
+            self.worker.flush(fsync=True)
             show_cursor(self.master)
+            self._leave_realtime_block()
             self.block_next_callback()
             return
-        stim = self.current_block[self.current_idx]
+        trial = self.current_block[self.current_idx]
         self.current_idx += 1
-        self._show_relax_stimulus(stim)
-
-    def _show_relax_stimulus(self, stim):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
-        canvas.create_text(w//2, h//2, text=stim, fill="white", font=self.font_probe)
-        self.log("SHOW", f"{self.stage}|{stim}|relax|start")
-        stim_dur = self.config.get("preparation_probe_duration_ms", 60)
-        self.master.after(stim_dur, lambda: self._show_relax_mask(stim))
-
-    def _show_relax_mask(self, stim):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
-        mask_txt = self._generate_mask()
-        rect_pad = self.config.get("mask_frame", {}).get("pad", 32)
-        rect_color = self.config.get("mask_frame", {}).get("color", "#FFFFFF")
-        rect_width = self.config.get("mask_frame", {}).get("width", 8)
-        text_id = canvas.create_text(w//2, h//2, text=mask_txt, fill="white", font=self.font_mask)
-        bbox = canvas.bbox(text_id)
-        if bbox:
-            x0, y0, x1, y1 = bbox
-            canvas.create_rectangle(x0-rect_pad, y0-rect_pad, x1+rect_pad, y1+rect_pad, outline=rect_color, width=rect_width)
-            canvas.lift(text_id)
-        mask_ms = self.config.get("mask_duration_ms", 100)
-        self.master.after(mask_ms, lambda: self._relax_pause())
-
-    def _relax_pause(self):
-        pause_ms = random.randint(*self.config.get("preparation_pause_range_ms", [1000, 2000]))
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
-        self.master.after(pause_ms, self._next_simple_stimulus)
-
-    def _run_stimulus_block(self, block, next_callback):
-        self.clear_widgets()
-        self.current_block = block
-        self.block_results = []
-        self.current_idx = 0
+        self._show_relax_stimulus(trial)
+
+    def _show_relax_stimulus(self, trial):
+        self.renderer.show_probe(trial.stimulus)
+        self.log("SHOW", f"{self.stage}|{trial.stimulus}|relax|start")
+        self.scheduler.at(time.perf_counter() + trial.probe_ms / 1000, lambda: self._show_relax_mask(trial))
+
+    def _show_relax_mask(self, trial):
+        self.renderer.show_mask(trial.mask)
+        self.scheduler.at(time.perf_counter() + trial.mask_ms / 1000, lambda: self._relax_pause(trial))
+
+    def _relax_pause(self, trial):
+        self._checkpoint_trial(None)
+        self.renderer.show_blank()
+        self.scheduler.at(time.perf_counter() + trial.pause_ms / 1000, self._next_simple_stimulus)
+        self.realtime.collect()
+
+    def _run_stimulus_block(self, block, next_callback, start_idx=0):
+        self.renderer.attach()
+        self.current_block = list(block)
+        self.current_idx = start_idx
         self.block_next_callback = next_callback
-        hide_cursor(self.master)
+        if start_idx == 0:
+            self._checkpoint_block("stimulus")
+        self._start_retries(start_idx)
+        self.realtime.enter_block()
         self._next_stimulus()
 
     def _next_stimulus(self):
         current_time = time.perf_counter()
-        pause_interval_sec = self.config.get("pause_interval_min", 5) * 60
+        pause_interval_sec = self.config.pause_interval_min * 60
         if self.test_start_time and (current_time - self.last_pause_time) >= pause_interval_sec:
-            self._show_pause_screen()
+            self._show_pause_screen(self._next_stimulus)
             return
         if self.current_idx >= len(self.current_block):
-            self.results[self.stage] += self.block_results
+            self.scheduler.cancel_all()
+            self.worker.flush(fsync=True)
             show_cursor(self.master)
+            self._leave_realtime_block()
+            self._end_retries()
             self.block_next_callback()
             return
-        stim, cat = self.current_block[self.current_idx]
+        trial = self.current_block[self.current_idx]
         self.current_idx += 1
         self.sequence_position += 1  # ЗМІНА ВІД 17.07.2025: Оновлення позиції для POS
-        self._show_timed_stimulus(stim, cat)
-
-    def _show_timed_stimulus(self, stim, cat):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
+        self._show_timed_stimulus(trial)
+
+    def _start_retries(self, start_idx):
+        # ЗМІНА ВІД 18.10.2026: Пропущені стимули повторюються в тому ж блоці, а не окремим етапом *_repeat.
+        # Лічильник показів, що лишилися в блоці, будується раз на блок, далі оновлюється за O(1) на пробу
+        if start_idx == 0:
+            self.retry_count = 0
+            self.retry_logged = 0
+        self.retries = []
+        self.retry_categories = self.RETRY_CATEGORIES.get(self.stage, ())
+        if self.stage == "main" and self.allocator.enabled:
+            # Пропуски тестованих стимулів добирають раунди адаптивного розподілу
+            self.retry_categories = UNTESTED
+        self.retry_pending = collections.Counter((trial.stimulus, trial.category) for trial in self.current_block[start_idx:])
+
+    def _schedule_retry(self):
+        # Після кожної проби: якщо решти показів стимулу в блоці не вистачить до VALID_TARGET валідних реакцій,
+        # а спроби ще лишилися, повтор вставляється у випадкове місце серед ще не показаних проб (з буферами)
+        key = (self.stimulus_value, self.stimulus_cat)
+        self.retry_pending[key] -= 1
+        if self.stimulus_cat not in self.retry_categories:
+            return
+        data = self.missed_stimuli[key]
+        need = min(self.VALID_TARGET - data["valid_count"], self.config.max_miss_attempts - data["attempts"])
+        for _ in range(need - self.retry_pending[key]):
+            pos, trials = self.plan.retry(self.stage, self.current_block, self.current_idx, *key, self.retry_count)
+            self.current_block[pos:pos] = trials
+            self.retry_count += 1
+            self.retries.append([pos, [trial.row() for trial in trials]])
+            self.retry_pending.update((trial.stimulus, trial.category) for trial in trials)
+
+    def _end_retries(self):
+        # Блок закінчується, коли вичерпано і план, і вставлені повтори; далі відстежуються лише незавершені стимули
+        # Основний блок з адаптивним розподілом закінчується після кожного раунду — лог лише при нових повторах
+        if self.retry_count > self.retry_logged:
+            self.log("INFO", f"Повторів пропущених стимулів у блоці: {self.retry_count}")
+            self.retry_logged = self.retry_count
+        max_attempts = self.config.max_miss_attempts
+        self.missed_stimuli = {k: v for k, v in self.missed_stimuli.items()
+                               if v["valid_count"] < self.VALID_TARGET and v["attempts"] < max_attempts}
+
+    def _show_timed_stimulus(self, trial):
         self.reaction_captured = False
-        self.stimulus_shown_time = time.perf_counter()
-        self.stimulus_value = stim
-        self.stimulus_cat = cat
+        self.stimulus_value = trial.stimulus
+        self.stimulus_cat = trial.category
         self.stimulus_logged = False
         self.master.bind("<space>", self._on_space)
-        self.master.bind("<KeyRelease-space>", self._on_space_release)
         show_ts = datetime.datetime.now().isoformat(timespec='milliseconds')
-        fill_color = self.config.get("stroop_colors", {}).get(self.lang, {}).get(stim, "white") if cat == "cognitive" else "white"
-        self.log("SHOW", f"{self.stage}|{stim}|{cat}|start|{show_ts}|color={fill_color}")
-        canvas.create_text(w//2, h//2, text=stim, fill=fill_color, font=self.font_probe)
-        self.stimulus_duration = self._get_probe_duration(cat)
-        self.mask_duration = self.config.get("mask_duration_ms", 100)
-        self.reaction_window_ms = self.config.get("reaction_window_ms", 2000)
-        pause_range = self.config.get("pause_range_ms", {}).get(cat, self.config.get("pause_range_ms", {}).get("default", [500, 1500]))
-        pause_ms = random.randint(*pause_range)
-        self.pause_ms = pause_ms
-        self.stimulus_timer = self.master.after(self.stimulus_duration, lambda: self._show_mask_after_stimulus(stim, cat))
-        self.mask_timer = self.master.after(self.stimulus_duration + self.mask_duration, lambda: self._show_pause_after_mask(stim, cat))
-
-    def _show_mask_after_stimulus(self, stim, cat):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
-        mask_txt = self._generate_mask()
-        rect_pad = self.config.get("mask_frame", {}).get("pad", 32)
-        rect_color = self.config.get("mask_frame", {}).get("color", "#FFFFFF")
-        rect_width = self.config.get("mask_frame", {}).get("width", 8)
-        text_id = canvas.create_text(w//2, h//2, text=mask_txt, fill="white", font=self.font_mask)
-        bbox = canvas.bbox(text_id)
-        if bbox:
-            x0, y0, x1, y1 = bbox
-            canvas.create_rectangle(x0-rect_pad, y0-rect_pad, x1+rect_pad, y1+rect_pad, outline=rect_color, width=rect_width)
-            canvas.lift(text_id)
-
-    def _show_pause_after_mask(self, stim, cat):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
-        self.pause_timer = self.master.after(self.pause_ms, lambda: self._close_reaction_window(stim, cat))
-
-    def _show_pause_screen(self):
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        self.pause_canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        self.pause_canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
+        self.log("SHOW", f"{self.stage}|{trial.stimulus}|{trial.category}|start|{show_ts}|color={trial.color}")
+        self.stimulus_duration = trial.probe_ms
+        self.stimulus_shown_time = self.renderer.show_probe(trial.stimulus, trial.color)
+        self._timing_phase("probe", self.stimulus_shown_time, self.stimulus_duration)
+        self.mask_duration = trial.mask_ms
+        self.reaction_window_ms = self.config.reaction_window_ms
+        self.pause_ms = trial.pause_ms
+        self.scheduler.at(self.stimulus_shown_time + self.stimulus_duration / 1000, lambda: self._show_mask_after_stimulus(trial))
+
+    def _show_mask_after_stimulus(self, trial):
+        onset = self.renderer.show_mask(trial.mask)
+        self._timing_phase("mask", onset, self.mask_duration, prev="probe")
+        self.scheduler.at(onset + self.mask_duration / 1000, lambda: self._show_pause_after_mask(trial))
+
+    def _show_pause_after_mask(self, trial):
+        onset = self.renderer.show_blank()
+        self._timing_phase("pause", onset, self.pause_ms, prev="mask")
+        self.scheduler.at(onset + self.pause_ms / 1000, lambda: self._close_reaction_window(trial))
+
+    def _show_pause_screen(self, resume):
         pause_text = "Пауза: {} сек" if self.lang == "ua" else "Перерыв: {} сек"
-        self.pause_text_id = self.pause_canvas.create_text(w//2, h//2, text=pause_text.format(10), fill=self.info_color, font=self.font_info)
+        self.renderer.show_info(pause_text.format(10))
         self.log("INFO", "Пауза: початок (10 секунд)")
         self.last_pause_time = time.perf_counter()
         self.pause_remaining = 10
+        self.pause_deadline = self.last_pause_time
+        self.pause_resume = resume
         self._update_pause_countdown()
+        # Повне збирання сміття — у 10-секундній перерві, а не посеред проби
+        self.realtime.collect(full=True)
 
     def _update_pause_countdown(self):
         if self.pause_remaining <= 0:
             self.log("INFO", "Пауза: кінець")
-            self.clear_widgets()
-            self._next_stimulus()
+            self.renderer.show_blank()
+            self.pause_resume()
             return
-        self.pause_canvas.itemconfig(self.pause_text_id, text=("Пауза: {} сек" if self.lang == "ua" else "Перерыв: {} сек").format(self.pause_remaining))
+        self.renderer.show_info(("Пауза: {} сек" if self.lang == "ua" else "Перерыв: {} сек").format(self.pause_remaining))
         self.pause_remaining -= 1
-        self.master.after(1000, self._update_pause_countdown)
+        self.pause_deadline += 1.0
+        self.scheduler.at(self.pause_deadline, self._update_pause_countdown)
 
-    def _close_reaction_window(self, stim, cat):
+    def _close_reaction_window(self, trial):
         self.reaction_captured = True
         self.master.unbind("<space>")
-        self.master.unbind("<KeyRelease-space>")
-        if hasattr(self, 'stimulus_timer') and self.stimulus_timer is not None:
-            self.master.after_cancel(self.stimulus_timer)
-            self.stimulus_timer = None
-        if hasattr(self, 'mask_timer') and self.mask_timer is not None:
-            self.master.after_cancel(self.mask_timer)
-            self.mask_timer = None
-        if hasattr(self, 'pause_timer') and self.pause_timer is not None:
-            self.master.after_cancel(self.pause_timer)
-            self.pause_timer = None
-        self.clear_widgets()
-        w, h = self.master.winfo_screenwidth(), self.master.winfo_screenheight()
-        canvas = tk.Canvas(self.master, bg=self.bg_color, highlightthickness=0)
-        canvas.pack(fill="both", expand=True)
-        hide_cursor(self.master)
+        self.scheduler.cancel_all()
+        self._timing_close(self.renderer.show_blank())
         if not self.stimulus_logged:
             stim_key = (self.stimulus_value, self.stimulus_cat)
             if stim_key not in self.missed_stimuli:
                 self.missed_stimuli[stim_key] = {"valid_count": 0, "attempts": 0}
             self.missed_stimuli[stim_key]["attempts"] += 1
             self.log("MISS", f"{self.stage}|{self.stimulus_value}|{self.stimulus_cat}|no_response|Пропуск|{datetime.datetime.now().isoformat(timespec='milliseconds')}")
-            res = {"stimulus": self.stimulus_value, "category": self.stimulus_cat, "reaction": None, "t": None, "miss": True, "reason": "no_response", "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
-            self.block_results.append(res)
-        post_reaction_delay = self.config.get("post_reaction_delay_ms", 300)
-        self.master.after(post_reaction_delay, self._next_stimulus)
+            self._record_trial(None, True, "no_response")
+        self.trials.set_timing(self.current_row, self.trial_timing)
+        self._schedule_retry()
+        self._checkpoint_trial(self.current_row)
+        post_reaction_delay = self.config.post_reaction_delay_ms
+        self.scheduler.after(post_reaction_delay, self._next_stimulus)
+        self.realtime.collect()
 
     def _on_space(self, event):
         if self.reaction_captured or self.stimulus_logged:
             return
-        self.press_time = time.perf_counter()
+        # ЗМІНА ВІД 18.10.2026: Час натискання — з event.time (KeyInput), а не момент виклику колбека, тож черга подій
+        # Tk не додається до часу реакції; автоповтор і клавіша, затиснута ще до стимулу, реакцією не є
+        press_time = self.keys.press(event)
+        if press_time is None:
+            return
+        self.press_time = press_time
         t_react = int((self.press_time - self.stimulus_shown_time) * 1000)
         react_ts = datetime.datetime.now().isoformat(timespec='milliseconds')
         stim_key = (self.stimulus_value, self.stimulus_cat)
@@ -714,61 +947,156 @@ class PsychoSemanticTestApp:
         self.missed_stimuli[stim_key]["attempts"] += 1
         if t_react < 50:
             self.log("MISS", f"{self.stage}|{self.stimulus_value}|{self.stimulus_cat}|{t_react}|Передчасна реакція|{react_ts}")
-            res = {"stimulus": self.stimulus_value, "category": self.stimulus_cat, "reaction": None, "t": t_react, "miss": True, "reason": "premature", "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
+            self._record_trial(None, True, "premature", t_react)
         elif t_react > self.reaction_window_ms:
             self.log("MISS", f"{self.stage}|{self.stimulus_value}|{self.stimulus_cat}|{t_react}|Запізніла реакція|{react_ts}")
-            res = {"stimulus": self.stimulus_value, "category": self.stimulus_cat, "reaction": None, "t": t_react, "miss": True, "reason": "late", "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
+            self._record_trial(None, True, "late", t_react)
         else:
             self.log("REACTION", f"{self.stage}|{self.stimulus_value}|{self.stimulus_cat}|{t_react}|OK|{react_ts}")
-            res = {"stimulus": self.stimulus_value, "category": self.stimulus_cat, "reaction": t_react, "miss": False, "press_duration": None, "stage": self.stage, "sequence_position": self.sequence_position}  # ЗМІНА ВІД 17.07.2025: Додано sequence_position
+            self._record_trial(t_react, False)
             self.missed_stimuli[stim_key]["valid_count"] += 1
-        self.block_results.append(res)
         self.stimulus_logged = True
         self.reaction_captured = True
         self.master.unbind("<space>")
+        self._watch_release()
+
+    def _watch_release(self):
+        # ЗМІНА ВІД 18.10.2026: Тривалість натискання (КАЗ) — за часом справжнього відпускання з KeyInput (автоповтор
+        # відфільтровано); записується й тоді, коли клавішу відпущено вже після закриття вікна реакції
+        row, stage, stimulus, category = self.current_row, self.stage, self.stimulus_value, self.stimulus_cat
+
+        def released(press_duration_ms):
+            self.trials.set_press_duration(row, press_duration_ms)
+            self.worker.press_duration(row, press_duration_ms)
+            self.log("REACTION", f"{stage}|{stimulus}|{category}|press_duration={press_duration_ms}")
+            if self.checkpoint_row is not None and row <= self.checkpoint_row:
+                # Проба вже в контрольній точці без тривалості — окремий запис, щоб її не втратило продовження сесії
+                self._checkpoint({"ev": "press", "trial": row, "press_duration": press_duration_ms})
+
+        self.keys.on_release(released)
+
+    def _record_trial(self, reaction, miss, reason=None, t=None):
+        # ЗМІНА ВІД 18.10.2026: Проба записується рядком у TrialStore; sequence_position для аналізу POS
+        self.current_row = self.trials.append(self.stage, self.stimulus_value, self.stimulus_cat, reaction, t, miss, reason, self.sequence_position)
+
+    def _timing_ms(self, ts):
+        return round((ts - self.test_start_time) * 1000, 3)
+
+    def _timing_phase(self, phase, onset, duration_ms, prev=None):
+        # ЗМІНА ВІД 18.10.2026: Заплановані та виміряні onset/offset фаз проби (мс від початку тесту)
+        if prev is None:
+            self.trial_timing = {}
+            self.current_row = None
+            sched_on = self._timing_ms(self.scheduler.fired_deadline or onset)
+        else:
+            self.trial_timing[prev]["off"] = self._timing_ms(onset)
+            sched_on = self.trial_timing[prev]["sched_off"]
+        on = self._timing_ms(onset)
+        self.trial_timing[phase] = {"sched_on": sched_on, "on": on, "sched_off": round(on + duration_ms, 3), "off": None}
 
-    def _on_space_release(self, event):
-        if not self.stimulus_logged:
-            return
-        release_time = time.perf_counter()
-        if self.press_time:
-            press_duration_ms = int((release_time - self.press_time) * 1000)
-            for res in self.block_results[-1:]:
-                if res["stimulus"] == self.stimulus_value and res["category"] == self.stimulus_cat:
-                    res["press_duration"] = press_duration_ms
-                    self.log("REACTION", f"{self.stage}|{self.stimulus_value}|{self.stimulus_cat}|press_duration={press_duration_ms}")
-        self.press_time = None
-        self.master.unbind("<KeyRelease-space>")
-
-    def _get_probe_duration(self, cat):
-        return self.config.get("probe_duration_ms", {}).get(cat, self.config.get("probe_duration_ms", {}).get("default", 60))
-
-    def _generate_mask(self):
-        return ''.join(random.choices("0123456789", k=32))
+    def _timing_close(self, ts):
+        if "pause" in self.trial_timing:
+            self.trial_timing["pause"]["off"] = self._timing_ms(ts)
 
     def _on_escape(self):
+        self.scheduler.cancel_all()
+        self._save_trials()
+        self._close_log()
         show_cursor(self.master)
         self.master.destroy()
 
+    def _on_quit(self):
+        self._close_log()
+        self.master.quit()
+
     def _start_session(self):
-        self.session_id = f"{self.person_info['uuid']}_{self.person_info['start_time'].replace(' ', '_').replace(':', '-')}"
+        self._open_session(f"{self.person_info['uuid']}_{self.person_info['start_time'].replace(' ', '_').replace(':', '-')}")
+        self.log("INFO", "Розпочато нову сесію тесту")
+        # ЗМІНА ВІД 18.10.2026: Увесь порядок проб і їхні параметри визначаються тут, до першого стимулу
+        self.plan = SessionPlan.compile(self.config, self.stimuli_main, self.lang, self.config.session_seed, self.allocator.repeats)
+        self.plan.save(self.plan_file)
+        self.renderer.set_masks(self.plan.masks)
+        self.log("INFO", f"План сесії: seed={self.plan.seed}, проб={sum(len(block) for block in self.plan.stages.values())}")
+        if self.startup_ms is not None:
+            self.log("INFO" if self.startup_ms < 1000 else "WARNING", f"Час запуску до форми даних: {self.startup_ms:.0f} мс")
+        with open(os.path.join(self.session_folder, "person.json"), "w", encoding='utf-8') as f:
+            json.dump(self.person_info, f, ensure_ascii=False, indent=2)
+
+    def _open_session(self, session_id):
+        self.session_id = session_id
         self.session_folder = os.path.join("results", self.session_id)
         safe_mkdir(self.session_folder)
         self.log_file = os.path.join(self.session_folder, f"log-{self.session_id}.txt")
         self.report_file = os.path.join(self.session_folder, f"report-{self.session_id}.txt")
-        self.log("INFO", "Розпочато нову сесію тесту")
-        with open(os.path.join(self.session_folder, "person.json"), "w", encoding='utf-8') as f:
-            json.dump(self.person_info, f, ensure_ascii=False, indent=2)
+        self.trials_file = os.path.join(self.session_folder, f"trials-{self.session_id}.bin")
+        self.checkpoint_file = os.path.join(self.session_folder, f"checkpoint-{self.session_id}.jsonl")
+        self.plan_file = os.path.join(self.session_folder, f"plan-{self.session_id}.json")
+        # ЗМІНА ВІД 18.10.2026: Лог, контрольні точки, trials-*.bin і звіт пише робочий процес сесії (session_worker.py);
+        # цей процес лише показує стимули, ловить натискання і кладе події в канал
+        self.worker = SessionWorker(self.session_folder, self.session_id, self.config)
+        self._acquire_realtime()
+
+    def _acquire_realtime(self):
+        # ЗМІНА ВІД 18.10.2026: Режим реального часу (realtime.py) вмикається після запуску робочого процесу сесії
+        # і фонового потоку його черги (SessionWorker.__init__), щоб ядро й пріоритет отримав лише головний потік;
+        # у лог — те, що вдалося отримати насправді
+        status = self.realtime.acquire()
+        if status:
+            self.log("INFO", f"Режим реального часу: GC={status['gc']}, CPU={status['cpu']}, пріоритет={status['priority']}")
+
+    def _leave_realtime_block(self):
+        stats = self.realtime.leave_block()
+        if stats is not None:
+            self.log("INFO", f"Режим реального часу: збирань GC у паузах={stats[0]}, найдовше={stats[1]:.2f} мс")
+
+    def _checkpoint(self, rec):
+        # ЗМІНА ВІД 18.10.2026: Контрольні точки серіалізує і дописує робочий процес сесії, як і лог;
+        # fsync — на межах блоків і кожні checkpoint_fsync_trials проб, теж у ньому
+        rec["seq"] = self.sequence_position
+        rec["ms"] = self._timing_ms(time.perf_counter())
+        self.worker.checkpoint(rec)
+
+    def _checkpoint_block(self, kind):
+        missed = [[stim, cat, data["valid_count"], data["attempts"]] for (stim, cat), data in self.missed_stimuli.items()]
+        self._checkpoint({"ev": "block", "stage": self.stage, "kind": kind, "missed": missed,
+                          "pause_range_ms": self.timing.pause_ranges if self.timing.adapted else None})
+
+    def _checkpoint_trial(self, row):
+        # Викликається після закриття вікна реакції, у паузі перед наступною пробою
+        rec = {"ev": "trial", "i": self.current_idx}
+        # Сирий потік натискань від попередньої контрольної точки: [тип, event.time, мс від початку тесту, автоповтор]
+        keys = self.keys.take_events()
+        if keys:
+            rec["keys"] = [[kind, raw, self._timing_ms(t), repeat] for kind, raw, t, repeat in keys]
+        if row is not None:
+            data = self.missed_stimuli[(self.stimulus_value, self.stimulus_cat)]
+            rec["row"] = self.trials.record(row)
+            self.checkpoint_row = row
+            rec["missed"] = [self.stimulus_value, self.stimulus_cat, data["valid_count"], data["attempts"]]
+        if self.retries:
+            # Повтори, вставлені після цієї проби: [позиція в блоці, рядки проб плану]
+            rec["retries"] = self.retries
+            self.retries = []
+        self._checkpoint(rec)
+        self.checkpoint_count += 1
+        if self.checkpoint_count % self.config.checkpoint_fsync_trials == 0:
+            self.worker.flush(fsync=True)
 
     def log(self, type_, msg):
         ts = now()
         rec = f"{ts}|{type_}|{msg}"
         self.log_data.append(rec)
-        try:
-            with open(self.log_file, "a", encoding='utf-8') as f:
-                f.write(rec + "\n")
-        except Exception as e:
-            self.log_data.append(f"{now()}|ERROR|Log write error: {e}")
+        if self.worker is not None:
+            self.worker.log(rec)
+
+    def _close_log(self):
+        if self.worker is not None:
+            self.worker.close()
+
+    def _save_trials(self):
+        # trials-*.bin пише робочий процес зі свого дзеркала таблиці проб
+        if self.worker is not None:
+            self.worker.save_trials()
 
     def clear_widgets(self):
         for widget in self.master.winfo_children():
@@ -777,510 +1105,70 @@ class PsychoSemanticTestApp:
     def show_report_screen(self):
         self.clear_widgets()
         show_cursor(self.master)
-        report_txt = self._generate_report()
+        # ЗМІНА ВІД 18.10.2026: Звіт (txt/csv/json/html, report.py), індекс сесій і норми будує робочий процес сесії;
+        # вікно тим часом не зависає, а показує, що звіт формується
+        tk.Label(self.master, text="Формування звіту...", font=self.font_info, fg=self.info_color,
+                 bg=self.bg_color).place(relx=0.5, rely=0.5, anchor="center")
+        self._poll_report()
+
+    def _poll_report(self):
+        # Коротке очікування на черзі відповідей, щоб цикл подій не крутився вхолосту
+        reply = self.worker.reply(timeout=0.01)
+        if reply is None:
+            self.master.after(40, self._poll_report)
+            return
+        kind, value = reply
+        if kind == "error":
+            self.log_data.append(value)
+            self.master.after_idle(self._poll_report)
+            return
+        report_txt = None
+        if kind == "report":
+            try:
+                with open(self.report_file, encoding="utf-8") as f:
+                    report_txt = f.read(12001)
+            except Exception as e:
+                value = e
+        if report_txt is None:
+            # Робочий процес не впорався — таблиця проб і звіт пишуться тут, як до його появи
+            self.log("ERROR", f"Report write error: {value}")
+            report_txt = self._write_report_here()
+        self._show_report_text(report_txt)
+
+    def _write_report_here(self):
+        try:
+            self.trials.save(self.trials_file)
+            self._write_report(report_outputs(os.path.splitext(self.report_file)[0]))
+            with open(self.report_file, encoding="utf-8") as f:
+                return f.read(12001)
+        except Exception as e:
+            self.log("ERROR", f"Report write error: {e}")
+            return self._generate_report()
+
+    def _show_report_text(self, report_txt):
+        self.clear_widgets()
         frame = tk.Frame(self.master, bg=self.bg_color)
         frame.pack(expand=True, fill="both")
         tk.Label(frame, text="Результати тесту:", font=self.font_info, fg=self.info_color, bg=self.bg_color).pack(pady=20)
         txt_box = tk.Text(frame, font=("Consolas", 14), bg="#111", fg="#fff", wrap="none", width=120, height=30)
         txt_box.pack(expand=True, fill="both", padx=30, pady=10)
-        txt_box.insert("1.0", report_txt[:12000] + ("\n...\n[Скорочено]" if len(report_txt) > 12000 else ""))
+        txt_box.insert("1.0", report_txt[:12000] + (f"\n...\n[Скорочено, повний звіт: {self.report_file}]" if len(report_txt) > 12000 else ""))
         txt_box.config(state="disabled")
-        tk.Button(frame, text="Завершити", font=self.font_info, command=self.master.quit).pack(pady=20)
-        try:
-            with open(self.report_file, "w", encoding='utf-8') as f:
-                f.write(report_txt)
-        except Exception as e:
-            self.log("ERROR", f"Report write error: {e}")
+        tk.Button(frame, text="Завершити", font=self.font_info, command=self._on_quit).pack(pady=20)
 
     def finish_test(self):
         self.test_end_time = time.perf_counter()
         self.test_end_time_str = now()  # ЗМІНА ВІД 17.07.2025: Зберігаємо час завершення для звіту
+        self._save_trials()
+        self.worker.finish(self.test_end_time_str, self.startup_ms, self.person_info)
         self.show_report_screen()
 
-    def _analyze_respondent_state(self, all_data):
-        state_stats = {}
-        adaptation_cv = None
-        for block in ["adaptation", "main"]:
-            block_data = [d for d in all_data if d["stage"] in [block, f"{block}_repeat"]]
-            reacts = [d["reaction"] for d in block_data if d["reaction"]]
-            miss_count = len([d for d in block_data if d["miss"]])
-            n = len(block_data)
-            miss_pct = (miss_count / n * 100) if n else 0
-            mean = statistics.mean(reacts) if reacts else 0
-            sd = statistics.stdev(reacts) if len(reacts) > 1 else 0
-            cv = (sd / mean * 100) if mean else 0
-            conclusion = "Готовність" if block == "adaptation" and cv < 10 and miss_pct < 5 else "Стабільність" if block == "main" and cv < 15 and miss_pct < 5 else "Нестабільність"
-            if block == "adaptation":
-                adaptation_cv = cv
-            fatigue = ""
-            if block == "main" and adaptation_cv is not None and cv > adaptation_cv * 1.25:
-                fatigue = "Попередження: можлива втома (CV зросло на >25%)"
-            state_stats[block] = {"mean": mean, "cv": cv, "miss_pct": miss_pct, "conclusion": conclusion, "fatigue": fatigue}
-        return state_stats
-
-    def _analyze_by_category(self, all_data):
-        if not all_data:
-            self.log("WARNING", "Немає даних для аналізу за категоріями")
-            return {}
-        cats = set([d["category"] for d in all_data if d["category"]])
-        neutral_reacts = [d["reaction"] for d in all_data if d["category"]=="neutral" and d["reaction"]]
-        neutral_mean = statistics.mean(neutral_reacts) if neutral_reacts else 1
-        neutral_sd = statistics.stdev(neutral_reacts) if len(neutral_reacts) > 1 else 0
-        neutral_press_durations = [d["press_duration"] for d in all_data if d["category"]=="neutral" and d["press_duration"]]
-        neutral_press_mean = statistics.mean(neutral_press_durations) if neutral_press_durations else 0
-        cat_stats = {}
-        for cat in cats:
-            reacts = [d["reaction"] for d in all_data if d["category"]==cat and d["reaction"]]
-            press_durations = [d["press_duration"] for d in all_data if d["category"]==cat and d["press_duration"]]
-            miss_count = len([d for d in all_data if d["category"]==cat and d["miss"]])
-            n = len([d for d in all_data if d["category"]==cat])
-            if reacts:
-                mean = statistics.mean(reacts)
-                sd = statistics.stdev(reacts) if len(reacts) > 1 else 0
-                reacts = [r for r in reacts if abs(r - mean) <= 3 * sd] if sd > 0 else reacts
-            mean = statistics.mean(reacts) if reacts else 0
-            sd = statistics.stdev(reacts) if len(reacts) > 1 else 0
-            cv = (sd / mean * 100) if mean else 0
-            if press_durations:
-                press_mean = statistics.mean(press_durations)
-                press_sd = statistics.stdev(press_durations) if len(press_durations) > 1 else 0
-                press_durations = [p for p in press_durations if abs(p - press_mean) <= 3 * press_sd] if press_sd > 0 else press_durations
-            press_mean = statistics.mean(press_durations) if press_durations else 0
-            press_sd = statistics.stdev(press_durations) if len(press_durations) > 1 else 0
-            press_effect = ((neutral_press_mean - press_mean) / neutral_press_mean * 100) if neutral_press_mean and press_mean else 0
-            effect = ((neutral_mean - mean) / neutral_mean * 100) if neutral_mean else 0
-            z = ((neutral_mean - mean) / neutral_sd) if neutral_sd and mean else 0
-            t_stat, pval = ttest_ind(reacts, neutral_reacts, equal_var=False) if reacts and neutral_reacts else (0, 1)
-            press_t_stat, press_pval = ttest_ind(press_durations, neutral_press_durations, equal_var=False) if press_durations and neutral_press_durations else (0, 1)
-            after_reacts = []
-            for i, d in enumerate(all_data):
-                if d["category"] == cat and not d["miss"] and i + 1 < len(all_data):
-                    next_d = all_data[i + 1]
-                    if next_d["category"] == "buffer" and not next_d["miss"]:
-                        after_reacts.append(next_d["reaction"])
-            after_mean = statistics.mean(after_reacts) if after_reacts else 0
-            after_sd = statistics.stdev(after_reacts) if len(after_reacts) > 1 else 0
-            after_effect = ((after_mean - neutral_mean) / neutral_mean * 100) if neutral_mean and after_mean else 0
-            z_after = ((after_mean - neutral_mean) / neutral_sd) if neutral_sd and after_mean else 0
-            after_t_stat, after_pval = ttest_ind(after_reacts, neutral_reacts, equal_var=False) if after_reacts and neutral_reacts else (0, 1)
-            cat_stats[cat] = {
-                "mean": mean, "sd": sd, "cv": cv, "n": n, "miss": miss_count,
-                "effect": effect, "z": z, "pval": pval,
-                "after": {"mean": after_mean, "sd": after_sd, "effect": after_effect, "z": z_after, "pval": after_pval},
-                "press_mean": press_mean, "press_sd": press_sd, "press_effect": press_effect, "press_pval": press_pval
-            }
-        return cat_stats
-
-    def _calculate_recognition_metrics(self, stats, neutral_stats):
-        # ЗМІНА ВІД 17.07.2025: Новий метод для розрахунку метрик впізнання (Смирнов, Костандов, Лурія)
-        kz = stats["mean"] / neutral_stats.get("mean", 1) if neutral_stats.get("mean", 1) else 1  # Кз (Смирнов)
-        kd = neutral_stats.get("mean", 1) / stats["mean"] if stats["mean"] else 1  # Кд (Костандов)
-        kaz = stats["press_mean"] / neutral_stats.get("press_mean", 1) if neutral_stats.get("press_mean", 1) else 1  # КАЗ (Лурія)
-        char = stats["miss"] / stats["n"] if stats["n"] else 0  # ЧАР (Лурія)
-        delta_tmr = stats["after"]["mean"] - neutral_stats.get("mean", 0) if stats["after"]["mean"] else 0  # Післядія
-        pos = stats.get("sequence_irregularity", 0)  # POS (аналіз послідовності)
-        iv = (kz * 0.4 + (1/kd if kd else 0) * 0.3 + kaz * 0.2 + char * 0.1) * 100  # Композитний індекс (ІВ)
-        
-        # Відсоток впізнання
-        smi_percent = 0
-        if kz > 1.5:
-            smi_percent = 90
-        elif kz > 1.2:
-            smi_percent = 80
-        elif kz > 1.0:
-            smi_percent = 50
-        smi_interpret = "Високе впізнання" if smi_percent >= 80 else "Ймовірне впізнання" if smi_percent >= 50 else "Слабке впізнання" if smi_percent >= 20 else "Невпізнаний"
-        
-        kos_percent = 0
-        if kd < 0.6:
-            kos_percent = 90
-        elif kd < 0.8:
-            kos_percent = 80
-        elif kd < 1.0:
-            kos_percent = 50
-        kos_interpret = "Високе впізнання" if kos_percent >= 80 else "Ймовірне впізнання" if kos_percent >= 50 else "Слабке впізнання" if kos_percent >= 20 else "Невпізнаний"
-        
-        lur_percent = 0
-        if kaz > 1.5 or char > 0.2:
-            lur_percent = 90
-        elif kaz > 1.2 or char > 0.1:
-            lur_percent = 80
-        elif kaz > 1.0 or char > 0.05:
-            lur_percent = 50
-        lur_interpret = "Високе впізнання" if lur_percent >= 80 else "Ймовірне впізнання" if lur_percent >= 50 else "Слабке впізнання" if lur_percent >= 20 else "Невпізнаний"
-        
-        return {
-            "kz": kz, "kd": kd, "kaz": kaz, "char": char, "delta_tmr": delta_tmr, "pos": pos, "iv": iv,
-            "smi_percent": smi_percent, "smi_interpret": smi_interpret,
-            "kos_percent": kos_percent, "kos_interpret": kos_interpret,
-            "lur_percent": lur_percent, "lur_interpret": lur_interpret
-        }
-
-    def _analyze_by_stimulus(self, all_data, cat, neutral_stats):
-        stims = set([d["stimulus"] for d in all_data if d["category"]==cat])
-        neutral_reacts = [d["reaction"] for d in all_data if d["category"]=="neutral" and d["reaction"]]
-        neutral_mean = neutral_stats.get("mean", 1)
-        neutral_sd = neutral_stats.get("sd", 0)
-        neutral_press_durations = [d["press_duration"] for d in all_data if d["category"]=="neutral" and d["press_duration"]]
-        neutral_press_mean = statistics.mean(neutral_press_durations) if neutral_press_durations else 0
-        stats = []
-        for stim in stims:
-            reacts = [d["reaction"] for d in all_data if d["category"]==cat and d["stimulus"]==stim and d["reaction"]]
-            press_durations = [d["press_duration"] for d in all_data if d["category"]==cat and d["stimulus"]==stim and d["press_duration"]]
-            miss_count = len([d for d in all_data if d["category"]==cat and d["stimulus"]==stim and d["miss"]])
-            n = len([d for d in all_data if d["category"]==cat and d["stimulus"]==stim])
-            miss_pct = (miss_count / n * 100) if n else 0
-            consecutive_misses = 0
-            max_consecutive_misses = 0
-            sequence_positions = []
-            for i, d in enumerate(all_data):
-                if d["category"] == cat and d["stimulus"] == stim:
-                    if d["miss"]:
-                        consecutive_misses += 1
-                        max_consecutive_misses = max(max_consecutive_misses, consecutive_misses)
-                    else:
-                        consecutive_misses = 0
-                    sequence_positions.append(d.get("sequence_position", 0))
-            if reacts:
-                mean = statistics.mean(reacts)
-                sd = statistics.stdev(reacts) if len(reacts) > 1 else 0
-                reacts = [r for r in reacts if abs(r - mean) <= 3 * sd] if sd > 0 else reacts
-            mean = statistics.mean(reacts) if reacts else 0
-            sd = statistics.stdev(reacts) if len(reacts) > 1 else 0
-            cv = (sd / mean * 100) if mean else 0
-            if press_durations:
-                press_mean = statistics.mean(press_durations)
-                press_sd = statistics.stdev(press_durations) if len(press_durations) > 1 else 0
-                press_durations = [p for p in press_durations if abs(p - press_mean) <= 3 * press_sd] if press_sd > 0 else press_durations
-            press_mean = statistics.mean(press_durations) if press_durations else 0
-            press_sd = statistics.stdev(press_durations) if len(press_durations) > 1 else 0
-            press_effect = ((neutral_press_mean - press_mean) / neutral_press_mean * 100) if neutral_press_mean and press_mean else 0
-            effect = ((neutral_mean - mean) / neutral_mean * 100) if neutral_mean else 0
-            z = ((neutral_mean - mean) / neutral_sd) if neutral_sd and mean else 0
-            t_stat, pval = ttest_ind(reacts, neutral_reacts, equal_var=False) if reacts and neutral_reacts else (0, 1)
-            press_t_stat, press_pval = ttest_ind(press_durations, neutral_press_durations, equal_var=False) if press_durations and neutral_press_durations else (0, 1)
-            after_reacts = []
-            for i, d in enumerate(all_data):
-                if d["category"] == cat and d["stimulus"] == stim and not d["miss"] and i + 1 < len(all_data):
-                    next_d = all_data[i + 1]
-                    if next_d["category"] == "buffer" and not next_d["miss"]:
-                        after_reacts.append(next_d["reaction"])
-            after_mean = statistics.mean(after_reacts) if after_reacts else 0
-            after_sd = statistics.stdev(after_reacts) if len(after_reacts) > 1 else 0
-            after_effect = ((after_mean - neutral_mean) / neutral_mean * 100) if neutral_mean and after_mean else 0
-            z_after = ((after_mean - neutral_mean) / neutral_sd) if neutral_sd and after_mean else 0
-            after_t_stat, after_pval = ttest_ind(after_reacts, neutral_reacts, equal_var=False) if after_reacts and neutral_reacts else (0, 1)
-            sequence_irregularity = cv * 0.5 + miss_pct * 0.3 + max_consecutive_misses * 10
-            stim_stats = {
-                "stimulus": stim, "category": cat, "mean": mean, "sd": sd, "cv": cv, "n": n, "miss": miss_count, "miss_pct": miss_pct,
-                "effect": effect, "z": z, "pval": pval,
-                "after": {"mean": after_mean, "sd": after_sd, "effect": after_effect, "z": z_after, "pval": after_pval},
-                "press_mean": press_mean, "press_sd": press_sd, "press_effect": press_effect, "press_pval": press_pval,
-                "consecutive_misses": max_consecutive_misses, "sequence_irregularity": sequence_irregularity
-            }
-            stim_stats.update(self._calculate_recognition_metrics(stim_stats, neutral_stats))  # ЗМІНА ВІД 17.07.2025: Додано метрики впізнання
-            stats.append(stim_stats)
-            if miss_pct > 50:
-                self.log("WARNING", f"Стимул {stim} ({cat}) має {miss_pct:.1f}% пропусків, позначено як невалідний")
-        return stats
-
-    def _format_table(self, headers, table_data, col_widths):
-        # ЗМІНА ВІД 17.07.2025: Новий метод для форматування таблиць із динамічною шириною
-        header_row = " | ".join(f"{headers[key]:<{col_widths[key]}}" for key in headers)
-        rows = [header_row, "-" * len(header_row)]
-        for data in table_data:
-            row = " | ".join(f"{str(data[key])[:col_widths[key]]:<{col_widths[key]}}" for key in headers)
-            rows.append(row)
-        return rows
-
-    def _generate_report(self):
-        # ЗМІНА ВІД 17.07.2025: Додано таблиці значущості, розділено висновки та примітки
-        report_lines = []
-        report_lines.append("=" * 60)
-        report_lines.append("                   ЗВІТ ПРО ТЕСТУВАННЯ                    ")
-        report_lines.append("=" * 60)
-        report_lines.append("")
-
-        # Блок 1: Інформація про тестування
-        report_lines.append("1. Інформація про тестування")
-        report_lines.append(f"UUID респондента: {self.person_info['uuid']}")
-        report_lines.append(f"Дата і час початку тестування: {self.person_info['start_time']}")
-        report_lines.append(f"Дата і час завершення тестування: {self.test_end_time_str}")
-        report_lines.append("")
-
-        # Блок 2: Результати тестування
-        main_data = [d for d in sum([self.results.get(block, []) for block in ["main", "main_repeat"]], [])]
-        neutral_stats = self._analyze_by_category(main_data).get("neutral", {})
-        stats_by_stim = self._analyze_by_stimulus(main_data, "sensitive", neutral_stats)
-        if not stats_by_stim:
-            report_lines.append("Немає даних для сенситивних стимулів")
-            return "\n".join(report_lines)
-
-        # Основна таблиця (Композитний індекс впізнання)
-        table_data_composite = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            table_data_composite.append({
-                "stimulus": st["stimulus"],
-                "params": f"Кз={st['kz']:.2f}, Кд={st['kd']:.2f}, КАЗ={st['kaz']:.2f}, ЧАР={st['char']:.2f}, ΔТМР={st['delta_tmr']:.2f}, POS={st['pos']:.1f}",
-                "iv": f"{st['iv']:.1f}",
-                "interpret": "Високе впізнання" if st["iv"] >= 80 else "Ймовірне впізнання" if st["iv"] >= 50 else "Слабке впізнання" if st["iv"] >= 20 else "Невпізнаний"
-            })
-        table_data_composite.sort(key=lambda x: float(x["iv"]), reverse=True)
-        report_lines.append("2. Результати тестування (Композитний індекс впізнання)")
-        report_lines.append("-" * 80)
-        headers_composite = {"stimulus": "Сенситивний стимул", "params": "Параметри", "iv": "Відсоток впізнання (%)", "interpret": "Інтерпретація"}
-        col_widths_composite = {key: len(str(value)) for key, value in headers_composite.items()}
-        for data in table_data_composite:
-            col_widths_composite["stimulus"] = max(col_widths_composite["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_composite["params"] = max(col_widths_composite["params"], len(str(data["params"])))
-            col_widths_composite["iv"] = max(col_widths_composite["iv"], len(str(data["iv"])))
-            col_widths_composite["interpret"] = max(col_widths_composite["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_composite, table_data_composite, col_widths_composite))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Таблиця Смирнова (впізнання)
-        table_data_smirnov = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            table_data_smirnov.append({
-                "stimulus": st["stimulus"],
-                "params": f"Кз={st['kz']:.2f}",
-                "percent": f"{st['smi_percent']:.1f}",
-                "interpret": st["smi_interpret"]
-            })
-        table_data_smirnov.sort(key=lambda x: float(x["percent"]), reverse=True)
-        report_lines.append("Результати тестування (Смирнов, впізнання)")
-        report_lines.append("-" * 80)
-        headers_smirnov = {"stimulus": "Сенситивний стимул", "params": "Параметри", "percent": "Відсоток впізнання (%)", "interpret": "Інтерпретація"}
-        col_widths_smirnov = {key: len(str(value)) for key, value in headers_smirnov.items()}
-        for data in table_data_smirnov:
-            col_widths_smirnov["stimulus"] = max(col_widths_smirnov["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_smirnov["params"] = max(col_widths_smirnov["params"], len(str(data["params"])))
-            col_widths_smirnov["percent"] = max(col_widths_smirnov["percent"], len(str(data["percent"])))
-            col_widths_smirnov["interpret"] = max(col_widths_smirnov["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_smirnov, table_data_smirnov, col_widths_smirnov))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Таблиця Костандова (впізнання)
-        table_data_kostandov = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            table_data_kostandov.append({
-                "stimulus": st["stimulus"],
-                "params": f"Кд={st['kd']:.2f}",
-                "percent": f"{st['kos_percent']:.1f}",
-                "interpret": st["kos_interpret"]
-            })
-        table_data_kostandov.sort(key=lambda x: float(x["percent"]), reverse=True)
-        report_lines.append("Результати тестування (Костандов, впізнання)")
-        report_lines.append("-" * 80)
-        headers_kostandov = {"stimulus": "Сенситивний стимул", "params": "Параметри", "percent": "Відсоток впізнання (%)", "interpret": "Інтерпретація"}
-        col_widths_kostandov = {key: len(str(value)) for key, value in headers_kostandov.items()}
-        for data in table_data_kostandov:
-            col_widths_kostandov["stimulus"] = max(col_widths_kostandov["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_kostandov["params"] = max(col_widths_kostandov["params"], len(str(data["params"])))
-            col_widths_kostandov["percent"] = max(col_widths_kostandov["percent"], len(str(data["percent"])))
-            col_widths_kostandov["interpret"] = max(col_widths_kostandov["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_kostandov, table_data_kostandov, col_widths_kostandov))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Таблиця Лурії (впізнання)
-        table_data_luria = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            table_data_luria.append({
-                "stimulus": st["stimulus"],
-                "params": f"КАЗ={st['kaz']:.2f}, ЧАР={st['char']:.2f}",
-                "percent": f"{st['lur_percent']:.1f}",
-                "interpret": st["lur_interpret"]
-            })
-        table_data_luria.sort(key=lambda x: float(x["percent"]), reverse=True)
-        report_lines.append("Результати тестування (Лурія, впізнання)")
-        report_lines.append("-" * 80)
-        headers_luria = {"stimulus": "Сенситивний стимул", "params": "Параметри", "percent": "Відсоток впізнання (%)", "interpret": "Інтерпретація"}
-        col_widths_luria = {key: len(str(value)) for key, value in headers_luria.items()}
-        for data in table_data_luria:
-            col_widths_luria["stimulus"] = max(col_widths_luria["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_luria["params"] = max(col_widths_luria["params"], len(str(data["params"])))
-            col_widths_luria["percent"] = max(col_widths_luria["percent"], len(str(data["percent"])))
-            col_widths_luria["interpret"] = max(col_widths_luria["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_luria, table_data_luria, col_widths_luria))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Таблиця Смирнова (значущість) # ЗМІНА ВІД 17.07.2025
-        table_data_smirnov_significance = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            smi_percent = 0
-            if st["kz"] > 1.5:
-                smi_percent = 90
-            elif st["kz"] > 1.2:
-                smi_percent = 80
-            elif st["kz"] > 1.0:
-                smi_percent = 50
-            smi_interpret = "Висока значущість" if smi_percent >= 80 else "Ймовірна значущість" if smi_percent >= 50 else "Слабка значущість" if smi_percent >= 20 else "Незначущий"
-            table_data_smirnov_significance.append({
-                "stimulus": st["stimulus"],
-                "params": f"Кз={st['kz']:.2f}",
-                "percent": f"{smi_percent:.1f}",
-                "interpret": smi_interpret
-            })
-        table_data_smirnov_significance.sort(key=lambda x: float(x["percent"]), reverse=True)
-        report_lines.append("Результати тестування (Смирнов, значущість)")
-        report_lines.append("-" * 80)
-        headers_smirnov_significance = {"stimulus": "Сенситивний стимул", "params": "Параметри", "percent": "Відсоток значущості (%)", "interpret": "Інтерпретація"}
-        col_widths_smirnov_significance = {key: len(str(value)) for key, value in headers_smirnov_significance.items()}
-        for data in table_data_smirnov_significance:
-            col_widths_smirnov_significance["stimulus"] = max(col_widths_smirnov_significance["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_smirnov_significance["params"] = max(col_widths_smirnov_significance["params"], len(str(data["params"])))
-            col_widths_smirnov_significance["percent"] = max(col_widths_smirnov_significance["percent"], len(str(data["percent"])))
-            col_widths_smirnov_significance["interpret"] = max(col_widths_smirnov_significance["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_smirnov_significance, table_data_smirnov_significance, col_widths_smirnov_significance))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Таблиця Костандова (значущість) # ЗМІНА ВІД 17.07.2025
-        table_data_kostandov_significance = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            kos_percent = 0
-            if st["kd"] < 0.6:
-                kos_percent = 90
-            elif st["kd"] < 0.8:
-                kos_percent = 80
-            elif st["kd"] < 1.0:
-                kos_percent = 50
-            kos_interpret = "Висока значущість" if kos_percent >= 80 else "Ймовірна значущість" if kos_percent >= 50 else "Слабка значущість" if kos_percent >= 20 else "Незначущий"
-            table_data_kostandov_significance.append({
-                "stimulus": st["stimulus"],
-                "params": f"Кд={st['kd']:.2f}",
-                "percent": f"{kos_percent:.1f}",
-                "interpret": kos_interpret
-            })
-        table_data_kostandov_significance.sort(key=lambda x: float(x["percent"]), reverse=True)
-        report_lines.append("Результати тестування (Костандов, значущість)")
-        report_lines.append("-" * 80)
-        headers_kostandov_significance = {"stimulus": "Сенситивний стимул", "params": "Параметри", "percent": "Відсоток значущості (%)", "interpret": "Інтерпретація"}
-        col_widths_kostandov_significance = {key: len(str(value)) for key, value in headers_kostandov_significance.items()}
-        for data in table_data_kostandov_significance:
-            col_widths_kostandov_significance["stimulus"] = max(col_widths_kostandov_significance["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_kostandov_significance["params"] = max(col_widths_kostandov_significance["params"], len(str(data["params"])))
-            col_widths_kostandov_significance["percent"] = max(col_widths_kostandov_significance["percent"], len(str(data["percent"])))
-            col_widths_kostandov_significance["interpret"] = max(col_widths_kostandov_significance["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_kostandov_significance, table_data_kostandov_significance, col_widths_kostandov_significance))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Таблиця Лурії (значущість) # ЗМІНА ВІД 17.07.2025
-        table_data_luria_significance = []
-        for st in stats_by_stim:
-            if st["miss_pct"] > 50:
-                continue
-            lur_percent = 0
-            if st["kaz"] > 1.5 or st["char"] > 0.2:
-                lur_percent = 90
-            elif st["kaz"] > 1.2 or st["char"] > 0.1:
-                lur_percent = 80
-            elif st["kaz"] > 1.0 or st["char"] > 0.05:
-                lur_percent = 50
-            lur_interpret = "Висока значущість" if lur_percent >= 80 else "Ймовірна значущість" if lur_percent >= 50 else "Слабка значущість" if lur_percent >= 20 else "Незначущий"
-            table_data_luria_significance.append({
-                "stimulus": st["stimulus"],
-                "params": f"КАЗ={st['kaz']:.2f}, ЧАР={st['char']:.2f}",
-                "percent": f"{lur_percent:.1f}",
-                "interpret": lur_interpret
-            })
-        table_data_luria_significance.sort(key=lambda x: float(x["percent"]), reverse=True)
-        report_lines.append("Результати тестування (Лурія, значущість)")
-        report_lines.append("-" * 80)
-        headers_luria_significance = {"stimulus": "Сенситивний стимул", "params": "Параметри", "percent": "Відсоток значущості (%)", "interpret": "Інтерпретація"}
-        col_widths_luria_significance = {key: len(str(value)) for key, value in headers_luria_significance.items()}
-        for data in table_data_luria_significance:
-            col_widths_luria_significance["stimulus"] = max(col_widths_luria_significance["stimulus"], len(str(data["stimulus"][:15])))
-            col_widths_luria_significance["params"] = max(col_widths_luria_significance["params"], len(str(data["params"])))
-            col_widths_luria_significance["percent"] = max(col_widths_luria_significance["percent"], len(str(data["percent"])))
-            col_widths_luria_significance["interpret"] = max(col_widths_luria_significance["interpret"], len(str(data["interpret"])))
-        report_lines.extend(self._format_table(headers_luria_significance, table_data_luria_significance, col_widths_luria_significance))
-        report_lines.append("-" * 80)
-        report_lines.append("")
-
-        # Визначення ширини найдовшої таблиці
-        composite_header = " | ".join(f"{headers_composite[key]:<{col_widths_composite[key]}}" for key in headers_composite)
-        smirnov_header = " | ".join(f"{headers_smirnov[key]:<{col_widths_smirnov[key]}}" for key in headers_smirnov)
-        kostandov_header = " | ".join(f"{headers_kostandov[key]:<{col_widths_kostandov[key]}}" for key in headers_kostandov)
-        luria_header = " | ".join(f"{headers_luria[key]:<{col_widths_luria[key]}}" for key in headers_luria)
-        smirnov_significance_header = " | ".join(f"{headers_smirnov_significance[key]:<{col_widths_smirnov_significance[key]}}" for key in headers_smirnov_significance)
-        kostandov_significance_header = " | ".join(f"{headers_kostandov_significance[key]:<{col_widths_kostandov_significance[key]}}" for key in headers_kostandov_significance)
-        luria_significance_header = " | ".join(f"{headers_luria_significance[key]:<{col_widths_luria_significance[key]}}" for key in headers_luria_significance)
-        max_table_width = max(len(composite_header), len(smirnov_header), len(kostandov_header), len(luria_header),
-                             len(smirnov_significance_header), len(kostandov_significance_header), len(luria_significance_header))  # ЗМІНА ВІД 17.07.2025: Додано ширину нових таблиць
-
-        # Блок 3: Висновки
-        report_lines.append("3. Висновки результатів тестування")
-        report_lines.append("3.1. Висновок щодо впізнання")  # ЗМІНА ВІД 17.07.2025
-        high_recognition = [st["stimulus"] for st in table_data_composite if float(st["iv"]) >= 80]
-        probable_recognition = [st["stimulus"] for st in table_data_composite if 50 <= float(st["iv"]) < 80]
-        recognition_conclusion = "Респондент демонструє "
-        if high_recognition:
-            recognition_conclusion += f"високе впізнання для стимулів: {', '.join(high_recognition)}. "
-        if probable_recognition:
-            recognition_conclusion += f"Ймовірне впізнання для стимулів: {', '.join(probable_recognition)}. "
-        recognition_conclusion += "Емоційно значущі стимули мають вищі Кз, КАЗ та нижчі Кд, що свідчить про швидшу обробку (Костандов, 2004). "
-        recognition_conclusion += "Високий ЧАР вказує на емоційну значущість (Лурія). "
-        recognition_conclusion += "Композитний індекс (ІВ) підтверджує стабільність впізнання (Смирнов, 1995)."
-        wrapped_recognition_conclusion = textwrap.wrap(recognition_conclusion, width=max_table_width)
-        report_lines.extend(wrapped_recognition_conclusion)
-        report_lines.append("")
-
-        report_lines.append("3.2. Висновок щодо значущості")  # ЗМІНА ВІД 17.07.2025
-        high_significance = [st["stimulus"] for st in table_data_composite if float(st["iv"]) >= 80]
-        probable_significance = [st["stimulus"] for st in table_data_composite if 50 <= float(st["iv"]) < 80]
-        significance_conclusion = "Респондент демонструє "
-        if high_significance:
-            significance_conclusion += f"високу значущість для стимулів: {', '.join(high_significance)}. "
-        if probable_significance:
-            significance_conclusion += f"Ймовірну значущість для стимулів: {', '.join(probable_significance)}. "
-        significance_conclusion += "Високі значення Кз і КАЗ свідчать про емоційну значущість стимулів (Смирнов, 1995; Лурія). "
-        significance_conclusion += "Низькі Кд вказують на швидшу обробку значущих стимулів (Костандов, 2004). "
-        significance_conclusion += "Композитний індекс (ІВ) підтверджує стабільність оцінки значущості."
-        wrapped_significance_conclusion = textwrap.wrap(significance_conclusion, width=max_table_width)
-        report_lines.extend(wrapped_significance_conclusion)
-        report_lines.append("")
-
-        # Блок 4: Примітки
-        report_lines.append("4. Примітки")
-        report_lines.append("4.1. Параметри таблиць впізнання")  # ЗМІНА ВІД 17.07.2025
-        report_lines.append("- Кз (Смирнов, 1995): Коефіцієнт значущості, відношення середнього часу реакції до нейтрального. Кз > 1.2 вказує на впізнання.")
-        report_lines.append("- Кд (Костандов, 2004): Коефіцієнт диференціації, відношення нейтрального часу до реакції. Кд < 0.8 свідчить про швидше впізнання.")
-        report_lines.append("- КАЗ (Лурія): Коефіцієнт афективної значущості, відношення тривалості натискання до нейтрального. КАЗ > 1.2 вказує на емоційне впізнання.")
-        report_lines.append("- ЧАР (Лурія): Частота атипових реакцій, частка пропусків. ЧАР > 0.2 свідчить про емоційну значущість.")
-        report_lines.append("- ΔТМР: Післядія, різниця середнього часу реакції після стимулу та нейтрального.")
-        report_lines.append("- POS: Аналіз послідовності, враховує позицію стимулу в тесті.")
-        report_lines.append("- ІВ: Композитний індекс впізнання, зважена сума Кз, Кд, КАЗ, ЧАР.")
-        report_lines.append("")
-        report_lines.append("4.2. Параметри таблиць значущості")  # ЗМІНА ВІД 17.07.2025
-        report_lines.append("- Кз (Смирнов, 1995): Коефіцієнт значущості, відношення середнього часу реакції до нейтрального. Кз > 1.2 вказує на значущість.")
-        report_lines.append("- Кд (Костандов, 2004): Коефіцієнт диференціації, відношення нейтрального часу до реакції. Кд < 0.8 свідчить про значущість.")
-        report_lines.append("- КАЗ (Лурія): Коефіцієнт афективної значущості, відношення тривалості натискання до нейтрального. КАЗ > 1.2 вказує на значущість.")
-        report_lines.append("- ЧАР (Лурія): Частота атипових реакцій, частка пропусків. ЧАР > 0.1 свідчить про значущість.")
-        report_lines.append("")
-
-        return "\n".join(report_lines)
-
 if __name__ == "__main__":
     root = tk.Tk()
     app = PsychoSemanticTestApp(root)
+    # ЗМІНА ВІД 18.10.2026: Закриття вікна хрестиком — як Escape: проби зберігаються, черга лога дописується до кінця
+    root.protocol("WM_DELETE_WINDOW", app._on_escape)
     root.mainloop()
+    app._close_log()
 
 # Кінець файлу main011-s.py
\ No newline at end of file
@@ -0,0 +1,295 @@
+# Популяційні норми: розподіли часу реакції, тривалості натискання та ефектів стимулів (Кз, КАЗ, ЧАР, ΔТМР)
+# по всіх архівних сесіях — окремо для кожного стимулу і для категорії в цілому.
+# Кожен розподіл — моменти Велфорда плюс логарифмічна гістограма з відносною точністю RELATIVE_ACCURACY
+# (наближені квантилі). Обидві частини зливаються точно, тож нова сесія додається за O(1), а норми кількох
+# станцій об'єднуються командою merge
+# Запуск: python norms.py build [results] [--norms results/norms.json] [--workers N]
+#         python norms.py merge norms-a.json norms-b.json -o norms.json
+#         python norms.py show [--norms results/norms.json] [--category sensitive]
+# Залежності: math, analysis.py, batch_report.py
+
+import argparse
+import concurrent.futures
+import json
+import math
+import os
+import sys
+from analysis import TrialAnalysis
+from batch_report import SessionReanalysis, discover_sessions, load_session, session_inputs, write_atomic
+
+NORMS_NAME = "norms.json"
+NORMS_VERSION = 1
+RELATIVE_ACCURACY = 0.01
+# Менше сесій у нормі стимулу — перцентиль рахується за нормою категорії
+MIN_NORM_SESSIONS = 20
+# Значення в кожній пробі
+TRIAL_METRICS = ("rt", "press")
+# Одне значення на стимул за сесію
+SESSION_METRICS = ("kz", "kaz", "char", "delta_tmr")
+
+class Distribution:
+    __slots__ = ("n", "mean", "m2", "zero", "pos", "neg")
+    GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    LOG_GAMMA = math.log(GAMMA)
+    # |x| нижче за це вважається нулем (ЧАР без пропусків, ΔТМР без післядії)
+    MIN_VALUE = 1e-9
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.zero = 0
+        self.pos = {}
+        self.neg = {}
+
+    def _bin(self, x):
+        return math.ceil(math.log(abs(x)) / self.LOG_GAMMA)
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if abs(x) < self.MIN_VALUE:
+            self.zero += 1
+        else:
+            bins = self.pos if x > 0 else self.neg
+            i = self._bin(x)
+            bins[i] = bins.get(i, 0) + 1
+
+    def merge(self, other):
+        # Формула Чана для моментів; гістограми складаються побінно
+        if not other.n:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.zero += other.zero
+        for mine, theirs in ((self.pos, other.pos), (self.neg, other.neg)):
+            for i, count in theirs.items():
+                mine[i] = mine.get(i, 0) + count
+
+    @property
+    def sd(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def count_le(self, x):
+        # Кількість значень ≤ x; значення в тому ж біні, що й x, рахуються наполовину
+        if abs(x) < self.MIN_VALUE:
+            return sum(self.neg.values()) + self.zero / 2
+        i = self._bin(x)
+        if x > 0:
+            below = sum(self.neg.values()) + self.zero + sum(c for j, c in self.pos.items() if j < i)
+            return below + self.pos.get(i, 0) / 2
+        return sum(c for j, c in self.neg.items() if j > i) + self.neg.get(i, 0) / 2
+
+    def quantile(self, q):
+        if not self.n:
+            return None
+        rank = q * (self.n - 1)
+        seen = 0
+        for i in sorted(self.neg, reverse=True):
+            seen += self.neg[i]
+            if seen > rank:
+                return -2 * self.GAMMA ** i / (self.GAMMA + 1)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for i in sorted(self.pos):
+            seen += self.pos[i]
+            if seen > rank:
+                return 2 * self.GAMMA ** i / (self.GAMMA + 1)
+        return 2 * self.GAMMA ** max(self.pos) / (self.GAMMA + 1)
+
+    def to_json(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "zero": self.zero,
+                "pos": sorted(self.pos.items()), "neg": sorted(self.neg.items())}
+
+    @classmethod
+    def from_json(cls, data):
+        dist = cls()
+        dist.n, dist.mean, dist.m2, dist.zero = data["n"], data["mean"], data["m2"], data["zero"]
+        dist.pos = {i: c for i, c in data["pos"]}
+        dist.neg = {i: c for i, c in data["neg"]}
+        return dist
+
+class Norms:
+    # table: (категорія, стимул) -> {метрика: Distribution}; стимул None — норма всієї категорії
+    def __init__(self):
+        self.sessions = set()
+        self.table = {}
+
+    def _dist(self, key, metric):
+        dists = self.table.get(key)
+        if dists is None:
+            dists = self.table[key] = {}
+        dist = dists.get(metric)
+        if dist is None:
+            dist = dists[metric] = Distribution()
+        return dist
+
+    def _add(self, key, metric, values):
+        # Без значень (усі проби стимулу — пропуски) порожній розподіл не створюється
+        if not values:
+            return
+        dist = self._dist(key, metric)
+        for x in values:
+            dist.add(x)
+
+    def add_session(self, session_id, analysis, stats):
+        # analysis — TrialAnalysis основного етапу, stats — стимули з метриками (_analyze_all_stimuli)
+        if session_id in self.sessions:
+            return False
+        self.sessions.add(session_id)
+        for (cat, stim), group in analysis.by_stimulus.items():
+            if cat == "buffer":
+                continue
+            for key in ((cat, stim), (cat, None)):
+                self._add(key, "rt", group.reacts.values)
+                self._add(key, "press", group.press_durations.values)
+        for st in stats:
+            for key in ((st["category"], st["stimulus"]), (st["category"], None)):
+                for metric in SESSION_METRICS:
+                    self._add(key, metric, [st[metric]])
+        return True
+
+    def session_part(self, session_id, analysis, stats):
+        # Внесок сесії, що вже є в нормі, — щоб порівнювати респондента з нормою без нього самого
+        if session_id not in self.sessions:
+            return None
+        part = Norms()
+        part.add_session(session_id, analysis, stats)
+        return part
+
+    def merge(self, other):
+        overlap = self.sessions & other.sessions
+        if overlap:
+            raise ValueError(f"Сесії вже є в нормі: {', '.join(sorted(overlap)[:5])}{'...' if len(overlap) > 5 else ''}")
+        self.sessions |= other.sessions
+        for key, dists in other.table.items():
+            for metric, dist in dists.items():
+                if dist.n:
+                    self._dist(key, metric).merge(dist)
+
+    def _counts(self, key, metric, value, exclude):
+        dist = self.table.get(key, {}).get(metric)
+        if dist is None:
+            return 0, 0
+        n, le = dist.n, dist.count_le(value)
+        own = exclude.table.get(key, {}).get(metric) if exclude is not None else None
+        if own is not None:
+            n, le = n - own.n, le - own.count_le(value)
+        return n, le
+
+    def percentile(self, category, stimulus, metric, value, exclude=None):
+        # (перцентиль, n, "стимул" | "категорія") або None, якщо норми немає
+        n, le = self._counts((category, stimulus), metric, value, exclude)
+        level = "стимул"
+        if n < MIN_NORM_SESSIONS:
+            n, le = self._counts((category, None), metric, value, exclude)
+            level = "категорія"
+        if not n:
+            return None
+        return le / n * 100, n, level
+
+    def save(self, path):
+        data = {"version": NORMS_VERSION, "relative_accuracy": RELATIVE_ACCURACY, "sessions": sorted(self.sessions),
+                "table": [[cat, stim, {metric: dist.to_json() for metric, dist in dists.items()}]
+                          for (cat, stim), dists in self.table.items()]}
+        write_atomic(path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != NORMS_VERSION or data.get("relative_accuracy") != RELATIVE_ACCURACY:
+            raise ValueError(f"{path}: несумісний формат норм")
+        norms = cls()
+        norms.sessions = set(data["sessions"])
+        norms.table = {(cat, stim): {metric: Distribution.from_json(dist) for metric, dist in dists.items()}
+                       for cat, stim, dists in data["table"]}
+        return norms
+
+def session_norms(folder):
+    # Виконується у процесі-обробнику: норма з однієї сесії, яку головний процес зливає із загальною
+    try:
+        inputs = session_inputs(folder)
+        if "trials" not in inputs and "log" not in inputs:
+            return folder, "skipped", "немає trials-*.bin і log-*.txt"
+        loaded = load_session(inputs)
+        if loaded is None:
+            return folder, "skipped", "у log-*.txt немає проб"
+        trials, person_info, end_time, _ = loaded
+        session = SessionReanalysis(None, trials, person_info, end_time)
+        analysis = TrialAnalysis(trials, ["main", "main_repeat"])
+        if not analysis.n:
+            return folder, "skipped", "немає проб основного етапу"
+        part = Norms()
+        part.add_session(os.path.basename(folder), analysis, session._analyze_all_stimuli(analysis))
+        return folder, "done", part
+    except Exception as e:
+        return folder, "error", f"{type(e).__name__}: {e}"
+
+def build(results_dir, norms_path, workers):
+    norms = Norms.load(norms_path) if os.path.exists(norms_path) else Norms()
+    pending = [folder for folder in discover_sessions(results_dir) if os.path.basename(folder) not in norms.sessions]
+    counts = {"done": 0, "skipped": 0, "error": 0}
+    chunksize = max(1, len(pending) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for folder, status, result in pool.map(session_norms, pending, chunksize=chunksize):
+            counts[status] += 1
+            if status == "done":
+                norms.merge(result)
+            else:
+                print(f"{status.upper()}: {folder}: {result}", file=sys.stderr)
+    if counts["done"] or not os.path.exists(norms_path):
+        norms.save(norms_path)
+    return norms, counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Популяційні норми за архівом results/")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="додати до норм сесії, яких у них ще немає")
+    build_parser.add_argument("results_dir", nargs="?", default="results")
+    build_parser.add_argument("--norms", help=f"файл норм (за замовчуванням <results_dir>/{NORMS_NAME})")
+    build_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    merge_parser = commands.add_parser("merge", help="об'єднати норми кількох станцій")
+    merge_parser.add_argument("inputs", nargs="+")
+    merge_parser.add_argument("-o", "--output", required=True)
+    show_parser = commands.add_parser("show", help="моменти й квантилі норм")
+    show_parser.add_argument("--norms", default=os.path.join("results", NORMS_NAME))
+    show_parser.add_argument("--category")
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        norms, counts = build(args.results_dir, args.norms or os.path.join(args.results_dir, NORMS_NAME), args.workers)
+        print(f"Сесій у нормі: {len(norms.sessions)}, додано: {counts['done']}, пропущено: {counts['skipped']}, помилок: {counts['error']}")
+        return 1 if counts["error"] else 0
+    if args.command == "merge":
+        norms = Norms()
+        for path in args.inputs:
+            try:
+                norms.merge(Norms.load(path))
+            except ValueError as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                return 1
+        norms.save(args.output)
+        print(f"Сесій у нормі: {len(norms.sessions)}")
+        return 0
+    norms = Norms.load(args.norms)
+    print(f"Сесій у нормі: {len(norms.sessions)}")
+    for (cat, stim), dists in sorted(norms.table.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+        if args.category and cat != args.category:
+            continue
+        for metric, dist in dists.items():
+            if not dist.n:
+                # Порожні розподіли могли зберегтися нормами попередніх версій
+                print(f"{cat} | {stim or '<категорія>'} | {metric} | n=0, M=-, SD=-, P10=-, P50=-, P90=-")
+                continue
+            quantiles = ", ".join(f"P{int(q * 100)}={dist.quantile(q):.2f}" for q in (0.1, 0.5, 0.9))
+            print(f"{cat} | {stim or '<категорія>'} | {metric} | n={dist.n}, M={dist.mean:.2f}, SD={dist.sd:.2f}, {quantiles}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
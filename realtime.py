@@ -0,0 +1,110 @@
+# Режим реального часу для презентації проб (config.json "realtime_mode", за замовчуванням вимкнено):
+# циклічний GC заморожується й вимикається на час блоку, а збирання виконується лише в паузах
+# (post_reaction_delay_ms після проби та екран перерви); головний потік закріплюється за ядром
+# і просить підвищений пріоритет планувальника. Що з цього вдалося отримати — повертає acquire() для лога
+# Запуск: імпортується main012-s.py
+# Залежності: gc, os, sys, time, ctypes (лише Windows)
+
+import gc
+import os
+import sys
+import time
+
+# Пріоритет, якщо SCHED_FIFO недоступний (немає CAP_SYS_NICE / RLIMIT_RTPRIO)
+FALLBACK_NICE = -10
+# Windows: HIGH_PRIORITY_CLASS, а не REALTIME — останній без прав адміністратора однаково знижується до HIGH
+WIN_HIGH_PRIORITY_CLASS = 0x80
+
+def _os_error(e):
+    return e.strerror or type(e).__name__
+
+class RealtimeMode:
+    def __init__(self, settings):
+        self.enabled = settings["enabled"]
+        self.cpu = settings["cpu"]
+        self.priority = settings["priority"]
+        self.in_block = False
+        self.collections = 0
+        self.collect_ms_max = 0.0
+
+    def acquire(self):
+        # Викликається один раз у головному потоці після запуску фонових записувачів лога:
+        # affinity і пріоритет у Linux діють на потік, тож запис на диск лишається на інших ядрах
+        if not self.enabled:
+            return {}
+        return {"gc": "заморожено в блоках, збирання в паузах", "cpu": self._pin(), "priority": self._raise_priority()}
+
+    def _pin(self):
+        if self.cpu is None:
+            return "не задано"
+        if hasattr(os, "sched_setaffinity"):
+            allowed = os.sched_getaffinity(0)
+            if self.cpu not in allowed:
+                return f"ядро {self.cpu} недоступне (доступні: {', '.join(map(str, sorted(allowed)))})"
+            try:
+                os.sched_setaffinity(0, {self.cpu})
+            except OSError as e:
+                return f"відмовлено ({_os_error(e)})"
+            return f"ядро {self.cpu}"
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), 1 << self.cpu):
+                return f"відмовлено (WinError {kernel32.GetLastError()})"
+            return f"ядро {self.cpu}"
+        return f"не підтримується ({sys.platform})"
+
+    def _raise_priority(self):
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), WIN_HIGH_PRIORITY_CLASS):
+                return f"звичайний (WinError {kernel32.GetLastError()})"
+            return "HIGH_PRIORITY_CLASS"
+        refused = []
+        if hasattr(os, "sched_setscheduler"):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+                return f"SCHED_FIFO {self.priority}"
+            except OSError as e:
+                refused.append(f"SCHED_FIFO: {_os_error(e)}")
+        try:
+            os.setpriority(os.PRIO_PROCESS, 0, FALLBACK_NICE)
+            return f"nice {FALLBACK_NICE}" + (f" ({'; '.join(refused)})" if refused else "")
+        except (OSError, AttributeError) as e:
+            refused.append(f"nice: {_os_error(e)}")
+        return f"звичайний ({'; '.join(refused)})"
+
+    def enter_block(self):
+        # Повне збирання до першої проби, далі все живе — у постійному поколінні, поза оглядом GC
+        if not self.enabled or self.in_block:
+            return
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        self.in_block = True
+        self.collections = 0
+        self.collect_ms_max = 0.0
+
+    def collect(self, full=False):
+        # Лише в паузах між пробами: молодші покоління — після кожної проби, повне — на екрані перерви
+        if not self.in_block:
+            return
+        t0 = time.perf_counter()
+        if full:
+            gc.unfreeze()
+            gc.collect()
+            gc.freeze()
+        else:
+            gc.collect(1)
+        self.collections += 1
+        self.collect_ms_max = max(self.collect_ms_max, (time.perf_counter() - t0) * 1000)
+
+    def leave_block(self):
+        # (збирань, найдовше в мс) за блок або None, якщо режим не діяв
+        if not self.in_block:
+            return None
+        gc.unfreeze()
+        gc.enable()
+        self.in_block = False
+        return self.collections, self.collect_ms_max
@@ -0,0 +1,232 @@
+# Модель звіту та її рендерери: текст, CSV, JSON і самодостатній HTML
+# Звіт — послідовність блоків (заголовки, рядки, абзаци, таблиці), які будує SessionAnalysisMixin.
+# write_report проходить блоки один раз і передає кожен усім рендерерам, що пишуть прямо у файли;
+# текстовий рендерер дає той самий report-*.txt, що й раніше, CSV і JSON читаються без розбору тексту
+# Залежності: csv, html, io, json, os, textwrap
+
+import csv
+import html
+import io
+import json
+import os
+import textwrap
+
+RULE_WIDTH = 80
+
+class Text:
+    # Рядки як є; порожній рядок — відступ між блоками
+    __slots__ = ("lines",)
+
+    def __init__(self, *lines):
+        self.lines = lines
+
+class Heading:
+    __slots__ = ("text", "level")
+
+    def __init__(self, text, level=2):
+        self.text = text
+        self.level = level
+
+class Paragraph:
+    # У тексті переноситься за шириною width (найширша таблиця звіту), в HTML — суцільний абзац
+    __slots__ = ("text", "width")
+
+    def __init__(self, text, width):
+        self.text = text
+        self.width = width
+
+class Table:
+    # headers — {ключ: назва стовпця}, rows — словники відформатованих комірок;
+    # caps — обрізання комірок стовпця в тексті (назва стимулу — 15 символів);
+    # records — ті самі рядки з числовими значеннями для CSV/JSON
+    __slots__ = ("name", "title", "headers", "rows", "caps", "rules", "records", "widths")
+
+    def __init__(self, name, title, headers, rows, caps=None, rules=True, records=None):
+        self.name = name
+        self.title = title
+        self.headers = headers
+        self.rows = rows
+        self.caps = caps or {}
+        self.rules = rules
+        self.records = records
+        self.widths = {}
+        for key, label in headers.items():
+            cap = self.caps.get(key)
+            width = len(str(label))
+            for row in rows:
+                width = max(width, len(str(row[key])[:cap]))
+            self.widths[key] = width
+
+    @property
+    def text_width(self):
+        return sum(self.widths.values()) + 3 * (len(self.widths) - 1)
+
+class TextRenderer:
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+
+    def _line(self, line):
+        # Рядки розділяються "\n" без завершального переводу рядка — як "\n".join у попередній версії
+        if not self.first:
+            self.f.write("\n")
+        self.f.write(line)
+        self.first = False
+
+    def begin(self, meta):
+        pass
+
+    def block(self, block):
+        if isinstance(block, Text):
+            for line in block.lines:
+                self._line(line)
+        elif isinstance(block, Heading):
+            self._line(block.text)
+        elif isinstance(block, Paragraph):
+            for line in textwrap.wrap(block.text, width=block.width):
+                self._line(line)
+        elif isinstance(block, Table):
+            widths = block.widths
+            if block.title:
+                self._line(block.title)
+            if block.rules:
+                self._line("-" * RULE_WIDTH)
+            header_row = " | ".join(f"{block.headers[key]:<{widths[key]}}" for key in block.headers)
+            self._line(header_row)
+            self._line("-" * len(header_row))
+            for row in block.rows:
+                self._line(" | ".join(f"{str(row[key])[:widths[key]]:<{widths[key]}}" for key in block.headers))
+            if block.rules:
+                self._line("-" * RULE_WIDTH)
+
+    def end(self):
+        pass
+
+class CsvRenderer:
+    # Один рядок на стимул з усіма числовими метриками — з таблиць, що мають records
+    def __init__(self, f):
+        self.writer = csv.writer(f)
+        self.meta = None
+        self.columns = None
+
+    def begin(self, meta):
+        self.meta = meta
+
+    def block(self, block):
+        if not isinstance(block, Table) or block.records is None:
+            return
+        for record in block.records:
+            if self.columns is None:
+                self.columns = ["session_id"] + list(record)
+                self.writer.writerow(self.columns)
+            self.writer.writerow([self.meta.get("session_id")] + [record.get(key) for key in self.columns[1:]])
+
+    def end(self):
+        pass
+
+class JsonRenderer:
+    # {"meta": {...}, "blocks": [...]}; пишеться по блоку, без збирання всього документа в пам'яті
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def begin(self, meta):
+        self.f.write('{"meta": ' + json.dumps(meta, ensure_ascii=False) + ', "blocks": [')
+
+    def block(self, block):
+        if isinstance(block, Text):
+            lines = [line for line in block.lines if line]
+            if not lines:
+                return
+            data = {"type": "text", "lines": lines}
+        elif isinstance(block, Heading):
+            data = {"type": "heading", "level": block.level, "text": block.text.strip()}
+        elif isinstance(block, Paragraph):
+            data = {"type": "paragraph", "text": block.text}
+        else:
+            data = {"type": "table", "name": block.name, "title": block.title,
+                    "columns": block.headers, "rows": block.rows}
+            if block.records is not None:
+                data["records"] = block.records
+        self.f.write((",\n" if self.count else "\n") + json.dumps(data, ensure_ascii=False))
+        self.count += 1
+
+    def end(self):
+        self.f.write("\n]}\n")
+
+HTML_STYLE = ("body{font-family:Arial,sans-serif;margin:2em;background:#fff;color:#111}"
+              "table{border-collapse:collapse;margin:0.5em 0 1.5em}"
+              "th,td{border:1px solid #999;padding:0.25em 0.6em;text-align:left}"
+              "th{background:#eee}h1{font-size:1.6em}h2{font-size:1.25em;margin-top:1.5em}h3{font-size:1.05em}")
+
+class HtmlRenderer:
+    # Один файл без зовнішніх ресурсів; відкривається в будь-якому браузері
+    def __init__(self, f):
+        self.f = f
+
+    def begin(self, meta):
+        self.f.write('<!DOCTYPE html>\n<html lang="uk">\n<head>\n<meta charset="utf-8">\n'
+                     f"<title>Звіт {html.escape(str(meta.get('session_id') or ''))}</title>\n"
+                     f"<style>{HTML_STYLE}</style>\n</head>\n<body>\n")
+
+    def block(self, block):
+        w = self.f.write
+        if isinstance(block, Text):
+            for line in block.lines:
+                if line and set(line) != {"="}:
+                    w(f"<p>{html.escape(line)}</p>\n")
+        elif isinstance(block, Heading):
+            w(f"<h{block.level}>{html.escape(block.text.strip())}</h{block.level}>\n")
+        elif isinstance(block, Paragraph):
+            w(f"<p>{html.escape(block.text)}</p>\n")
+        else:
+            if block.title:
+                w(f"<h3>{html.escape(block.title)}</h3>\n")
+            w("<table>\n<tr>" + "".join(f"<th>{html.escape(str(label))}</th>" for label in block.headers.values()) + "</tr>\n")
+            for row in block.rows:
+                w("<tr>" + "".join(f"<td>{html.escape(str(row[key]))}</td>" for key in block.headers) + "</tr>\n")
+            w("</table>\n")
+
+    def end(self):
+        self.f.write("</body>\n</html>\n")
+
+RENDERERS = {"txt": TextRenderer, "csv": CsvRenderer, "json": JsonRenderer, "html": HtmlRenderer}
+
+def report_outputs(base_path, formats=RENDERERS):
+    # "results/<id>/report-<id>" -> {"txt": ".../report-<id>.txt", "csv": ..., ...}
+    return {fmt: f"{base_path}.{fmt}" for fmt in formats}
+
+def write_report(meta, blocks, outputs):
+    # outputs — {формат: шлях}; кожен файл пишеться у .tmp і замінює попередній лише після успішного завершення
+    files = {}
+    try:
+        renderers = []
+        for fmt, path in outputs.items():
+            files[path] = open(path + ".tmp", "w", encoding="utf-8", newline="" if fmt == "csv" else None)
+            renderers.append(RENDERERS[fmt](files[path]))
+        for renderer in renderers:
+            renderer.begin(meta)
+        for block in blocks:
+            for renderer in renderers:
+                renderer.block(block)
+        for renderer in renderers:
+            renderer.end()
+    except BaseException:
+        for path, f in files.items():
+            f.close()
+            os.remove(path + ".tmp")
+        raise
+    for path, f in files.items():
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        os.replace(path + ".tmp", path)
+
+def render_text(meta, blocks):
+    f = io.StringIO()
+    renderer = TextRenderer(f)
+    renderer.begin(meta)
+    for block in blocks:
+        renderer.block(block)
+    renderer.end()
+    return f.getvalue()
@@ -0,0 +1,101 @@
+# Ресемплінг для ефектів стимулів: бутстреп-довірчі інтервали для ефекту (%), z і ΔТМР
+# та перестановочні p-значення для різниці середніх зі стимулом і нейтральною базовою лінією.
+# Вибірки генеруються матрицями індексів NumPy одразу для всіх стимулів з однаковою кількістю реакцій;
+# ітерації діляться на блоки з окремими потоками SeedSequence, тож результат залежить лише від seed
+# і не залежить від кількості процесів
+# Залежності: numpy (необов'язково — без нього ресемплінг недоступний), concurrent.futures
+
+import concurrent.futures
+import math
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Ітерацій в одному блоці; блоки — одиниця розподілу між процесами
+CHUNK_ITERATIONS = 2500
+
+def available():
+    return np is not None
+
+def _percentile_ci(samples, confidence):
+    tail = (1 - confidence) / 2 * 100
+    # Рядки з одних NaN (стимул без реакцій після нього) дають NaN без попередження
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        low, high = np.nanpercentile(samples, [tail, 100 - tail], axis=-1)
+    return low, high
+
+def _by_size(samples):
+    # {k: [номери вибірок розміру k]}; вибірки одного розміру обробляються однією матрицею індексів
+    sizes = {}
+    for i, values in enumerate(samples):
+        if values:
+            sizes.setdefault(len(values), []).append(i)
+    return sizes
+
+def _chunk(stimuli, after, neutral, iterations, seed_seq):
+    # Один блок ітерацій: бутстреп-статистики (стимули × ітерації) і кількість перестановок з |d| ≥ |d_спост|
+    rng = np.random.default_rng(seed_seq)
+    n_neutral = len(neutral)
+    neutral_boot = neutral[rng.integers(0, n_neutral, (iterations, n_neutral))]
+    neutral_mean = neutral_boot.mean(axis=1)
+    with np.errstate(all="ignore"):
+        neutral_sd = neutral_boot.std(axis=1, ddof=1)
+    stimulus_mean = np.full((len(stimuli), iterations), np.nan)
+    after_mean = np.full((len(after), iterations), np.nan)
+    rt_extreme = np.zeros(len(stimuli), dtype=np.int64)
+    after_extreme = np.zeros(len(after), dtype=np.int64)
+    neutral_total = neutral.sum()
+    for samples, boot_mean, extreme in ((stimuli, stimulus_mean, rt_extreme), (after, after_mean, after_extreme)):
+        for k, rows in _by_size(samples).items():
+            values = np.array([samples[i] for i in rows], dtype=float)
+            boot_mean[rows] = values[:, rng.integers(0, k, (iterations, k))].mean(axis=2)
+            # Перестановка: випадкові k з об'єднаної вибірки (k + n_neutral) стають «стимулом»
+            pooled = np.concatenate([values, np.broadcast_to(neutral, (len(rows), n_neutral))], axis=1)
+            chosen = rng.random((iterations, k + n_neutral)).argsort(axis=1)[:, :k]
+            chosen_sum = pooled[:, chosen].sum(axis=2)
+            total = (values.sum(axis=1) + neutral_total)[:, None]
+            perm_diff = chosen_sum / k - (total - chosen_sum) / n_neutral
+            observed = np.abs(values.mean(axis=1) - neutral.mean())[:, None]
+            extreme[rows] = (np.abs(perm_diff) >= observed - 1e-9).sum(axis=1)
+    return neutral_mean, neutral_sd, stimulus_mean, after_mean, rt_extreme, after_extreme
+
+def resample_effects(stimuli, after, neutral, iterations=10000, seed=0, confidence=0.95, workers=1):
+    # stimuli / after — для кожного стимулу реакції (після обрізання 3 SD) і реакції на буфер після нього;
+    # neutral — обрізана базова лінія. Повертає для кожного стимулу словник ДІ та p (None, якщо даних немає)
+    neutral = np.asarray(neutral, dtype=float)
+    results = [dict.fromkeys(("effect_ci", "z_ci", "delta_tmr_ci", "p_perm", "delta_tmr_p_perm")) for _ in stimuli]
+    if len(neutral) < 2 or not stimuli:
+        return results
+    chunks = [min(CHUNK_ITERATIONS, iterations - start) for start in range(0, iterations, CHUNK_ITERATIONS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    args = [(stimuli, after, neutral, size, seed_seq) for size, seed_seq in zip(chunks, seeds)]
+    if workers > 1 and len(chunks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_chunk, *zip(*args)))
+    else:
+        parts = [_chunk(*a) for a in args]
+    neutral_mean = np.concatenate([p[0] for p in parts])
+    neutral_sd = np.concatenate([p[1] for p in parts])
+    stimulus_mean = np.concatenate([p[2] for p in parts], axis=1)
+    after_mean = np.concatenate([p[3] for p in parts], axis=1)
+    rt_extreme = sum(p[4] for p in parts)
+    after_extreme = sum(p[5] for p in parts)
+    with np.errstate(all="ignore"):
+        effect = (neutral_mean - stimulus_mean) / neutral_mean * 100
+        z = np.where(neutral_sd > 0, (neutral_mean - stimulus_mean) / neutral_sd, np.nan)
+        delta = after_mean - neutral_mean
+    cis = {"effect_ci": _percentile_ci(effect, confidence), "z_ci": _percentile_ci(z, confidence),
+           "delta_tmr_ci": _percentile_ci(delta, confidence)}
+    for i, result in enumerate(results):
+        if stimuli[i]:
+            result["p_perm"] = float((1 + rt_extreme[i]) / (1 + iterations))
+        if after[i]:
+            result["delta_tmr_p_perm"] = float((1 + after_extreme[i]) / (1 + iterations))
+        for key, (low, high) in cis.items():
+            if not math.isnan(low[i]):
+                result[key] = (float(low[i]), float(high[i]))
+    return results
@@ -0,0 +1,276 @@
+# Індекс сесій results/ у SQLite для швидких запитів по багатьох сесіях
+# Таблиці: respondents, sessions, stimuli, trials (усі проби) і metrics (Кз, Кд, КАЗ, ЧАР, ІВ... для кожного стимулу
+# основного етапу). Індексування інкрементне: сесії з незмінними файлами (розмір і mtime, як у batch_report.py)
+# пропускаються, змінені перезаписуються; розбір іде паралельно, запис — пакетами в одній транзакції.
+# Застосунок додає кожну завершену сесію сам (finish_test)
+# Запуск: python session_index.py ingest [results] [--db results/index.sqlite] [--workers N] [--prune]
+#         python session_index.py query СТИМУЛ [--min-kz 1.2] [--days 30] [--since 2026-09-18] [--db ...]
+# Залежності: sqlite3, analysis.py, batch_report.py
+
+import argparse
+import concurrent.futures
+import datetime
+import os
+import sqlite3
+import sys
+from analysis import TrialAnalysis, INT_NONE
+from batch_report import CODE_SOURCES, SessionReanalysis, discover_sessions, file_digest, inputs_fingerprint, load_session, session_inputs
+
+INDEX_NAME = "index.sqlite"
+# Зміна схеми — перебудова індексу з нуля
+SCHEMA_VERSION = 1
+# Сесій в одній транзакції під час пакетного індексування
+COMMIT_EVERY = 500
+METRIC_FIELDS = ["n", "miss", "miss_pct", "mean", "sd", "z", "pval", "press_mean",
+                 "kz", "kd", "kaz", "char", "delta_tmr", "pos", "iv"]
+
+SCHEMA = f"""
+CREATE TABLE respondents (
+    id INTEGER PRIMARY KEY,
+    fio TEXT NOT NULL,
+    birth TEXT NOT NULL,
+    UNIQUE (fio, birth)
+);
+CREATE TABLE sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    respondent_id INTEGER NOT NULL REFERENCES respondents(id),
+    uuid TEXT,
+    lang TEXT,
+    start_time TEXT,
+    start_ts TEXT,
+    end_time TEXT,
+    source TEXT NOT NULL,
+    trials INTEGER NOT NULL,
+    warnings TEXT,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE stimuli (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    category TEXT NOT NULL,
+    UNIQUE (text, category)
+);
+CREATE TABLE trials (
+    session_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    stimulus_id INTEGER NOT NULL,
+    reaction INTEGER,
+    t INTEGER,
+    press_duration INTEGER,
+    miss INTEGER NOT NULL,
+    reason TEXT,
+    sequence_position INTEGER NOT NULL,
+    PRIMARY KEY (session_id, row)
+) WITHOUT ROWID;
+CREATE TABLE metrics (
+    session_id INTEGER NOT NULL,
+    stimulus_id INTEGER NOT NULL,
+    {", ".join(f"{name} REAL" for name in METRIC_FIELDS)},
+    PRIMARY KEY (session_id, stimulus_id)
+) WITHOUT ROWID;
+CREATE INDEX sessions_start ON sessions (start_ts);
+CREATE INDEX sessions_respondent ON sessions (respondent_id);
+CREATE INDEX metrics_stimulus_kz ON metrics (stimulus_id, kz);
+CREATE INDEX trials_stimulus ON trials (stimulus_id);
+"""
+
+def connect(db_path):
+    # Індекс може одночасно оновлювати застосунок і пакетне індексування — WAL і очікування блокування
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        with conn:
+            for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall():
+                conn.execute(f"DROP TABLE {name}")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+def code_digest():
+    return "|".join(file_digest(path) for path in CODE_SOURCES + [os.path.abspath(__file__)])
+
+def iso_time(value):
+    # "18.10.2026 11:08:07 EEST" -> "2026-10-18T11:08:07"; рядки, що сортуються як дати
+    try:
+        return datetime.datetime.strptime(value[:19], "%d.%m.%Y %H:%M:%S").isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def extract_session(folder, fingerprint):
+    # Виконується у процесі-обробнику: лише читання файлів і аналіз, без доступу до бази
+    try:
+        inputs = session_inputs(folder)
+        if "trials" not in inputs and "log" not in inputs:
+            return folder, "skipped", "немає trials-*.bin і log-*.txt"
+        loaded = load_session(inputs)
+        if loaded is None:
+            return folder, "skipped", "у log-*.txt немає проб"
+        trials, person_info, end_time, notes = loaded
+        c = trials.columns
+        s = trials.strings
+        value = lambda name, i: None if c[name][i] == INT_NONE else c[name][i]
+        trial_rows = [(i, s["stage"][c["stage"][i]], s["stimulus"][c["stimulus"][i]], s["category"][c["category"][i]],
+                       value("reaction", i), value("t", i), value("press_duration", i), c["miss"][i],
+                       s["reason"][c["reason"][i]], c["sequence_position"][i]) for i in range(len(trials))]
+        session = SessionReanalysis(None, trials, person_info, end_time)
+        session.warnings.extend(notes)
+        analysis = TrialAnalysis(trials, ["main", "main_repeat"])
+        metric_rows = []
+        if analysis.n:
+            metric_rows = [(st["stimulus"], st["category"], *(st[name] for name in METRIC_FIELDS))
+                           for st in session._analyze_all_stimuli(analysis)]
+        record = {"name": os.path.basename(folder), "person": person_info,
+                  "end_time": end_time, "source": "trials" if "trials" in inputs else "log",
+                  "trials": len(trials), "warnings": "\n".join(session.warnings), "fingerprint": fingerprint}
+        return folder, "done", (record, trial_rows, metric_rows)
+    except Exception as e:
+        return folder, "error", f"{type(e).__name__}: {e}"
+
+class IndexWriter:
+    # Кеші ідентифікаторів респондентів і стимулів на час одного запуску: при пакетному індексуванні
+    # більшість стимулів повторюється в кожній сесії
+    def __init__(self, conn):
+        self.conn = conn
+        self.stimuli = {(text, cat): id_ for id_, text, cat in conn.execute("SELECT id, text, category FROM stimuli")}
+        self.respondents = {(fio, birth): id_ for id_, fio, birth in conn.execute("SELECT id, fio, birth FROM respondents")}
+
+    def _id(self, cache, table, columns, key):
+        id_ = cache.get(key)
+        if id_ is None:
+            id_ = self.conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES (?, ?)", key).lastrowid
+            cache[key] = id_
+        return id_
+
+    def stimulus_id(self, text, category):
+        return self._id(self.stimuli, "stimuli", ("text", "category"), (text, category))
+
+    def respondent_id(self, person):
+        return self._id(self.respondents, "respondents", ("fio", "birth"), (person.get("fio", ""), person.get("birth", "")))
+
+    def delete(self, name):
+        row = self.conn.execute("SELECT id FROM sessions WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM trials WHERE session_id = ?", row)
+            self.conn.execute("DELETE FROM metrics WHERE session_id = ?", row)
+            self.conn.execute("DELETE FROM sessions WHERE id = ?", row)
+
+    def write(self, record, trial_rows, metric_rows):
+        person = record["person"]
+        self.delete(record["name"])
+        session_id = self.conn.execute(
+            "INSERT INTO sessions (name, respondent_id, uuid, lang, start_time, start_ts, end_time, source, trials, warnings, fingerprint)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record["name"], self.respondent_id(person), person.get("uuid"), person.get("lang"), person.get("start_time"),
+             iso_time(person.get("start_time")), record["end_time"], record["source"], record["trials"],
+             record["warnings"], record["fingerprint"])).lastrowid
+        stimulus_id = self.stimulus_id
+        self.conn.executemany("INSERT INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              [(session_id, i, stage, stimulus_id(stim, cat), *rest)
+                               for i, stage, stim, cat, *rest in trial_rows])
+        self.conn.executemany(f"INSERT INTO metrics VALUES ({', '.join('?' * (len(METRIC_FIELDS) + 2))})",
+                              [(session_id, stimulus_id(stim, cat), *values) for stim, cat, *values in metric_rows])
+
+def index_session(db_path, folder):
+    # Одна сесія одразу після завершення тесту; викликається із застосунку
+    inputs = session_inputs(folder)
+    _, status, result = extract_session(folder, inputs_fingerprint(inputs, "", code_digest()))
+    if status != "done":
+        raise ValueError(result)
+    conn = connect(db_path)
+    try:
+        with conn:
+            IndexWriter(conn).write(*result)
+    finally:
+        conn.close()
+
+def ingest(results_dir, db_path, workers, prune=False):
+    conn = connect(db_path)
+    digest = code_digest()
+    known = dict(conn.execute("SELECT name, fingerprint FROM sessions"))
+    folders = discover_sessions(results_dir)
+    pending = []
+    for folder in folders:
+        fingerprint = inputs_fingerprint(session_inputs(folder), "", digest)
+        if known.get(os.path.basename(folder)) != fingerprint:
+            pending.append((folder, fingerprint))
+    counts = {"done": 0, "unchanged": len(folders) - len(pending), "skipped": 0, "error": 0, "pruned": 0}
+    writer = IndexWriter(conn)
+    if prune:
+        names = {os.path.basename(folder) for folder in folders}
+        with conn:
+            for name in known.keys() - names:
+                writer.delete(name)
+                counts["pruned"] += 1
+    chunksize = max(1, len(pending) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(extract_session, [folder for folder, _ in pending], [fp for _, fp in pending], chunksize=chunksize)
+        try:
+            for folder, status, result in results:
+                counts[status] += 1
+                if status != "done":
+                    print(f"{status.upper()}: {folder}: {result}", file=sys.stderr)
+                    continue
+                writer.write(*result)
+                if counts["done"] % COMMIT_EVERY == 0:
+                    conn.commit()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    conn.execute("ANALYZE")
+    conn.close()
+    return len(folders), counts
+
+def query_stimulus(conn, stimulus, min_kz=None, since=None, category=None):
+    # Сесії, де стимул мав Кз ≥ min_kz, починаючи з since (ISO-рядок дати); найновіші першими
+    sql = ("SELECT s.name, s.start_time, r.fio, st.category, m.kz, m.iv, m.miss_pct FROM metrics m"
+           " JOIN stimuli st ON st.id = m.stimulus_id JOIN sessions s ON s.id = m.session_id"
+           " JOIN respondents r ON r.id = s.respondent_id WHERE st.text = ?")
+    params = [stimulus]
+    if category is not None:
+        sql += " AND st.category = ?"
+        params.append(category)
+    if min_kz is not None:
+        sql += " AND m.kz >= ?"
+        params.append(min_kz)
+    if since is not None:
+        sql += " AND s.start_ts >= ?"
+        params.append(since)
+    return conn.execute(sql + " ORDER BY s.start_ts DESC", params).fetchall()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Індекс сесій results/ у SQLite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = commands.add_parser("ingest", help="додати нові та змінені сесії до індексу")
+    ingest_parser.add_argument("results_dir", nargs="?", default="results")
+    ingest_parser.add_argument("--db", help=f"файл індексу (за замовчуванням <results_dir>/{INDEX_NAME})")
+    ingest_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ingest_parser.add_argument("--prune", action="store_true", help="видалити з індексу сесії, яких уже немає на диску")
+    query_parser = commands.add_parser("query", help="сесії, де стимул мав заданий Кз")
+    query_parser.add_argument("stimulus")
+    query_parser.add_argument("--category")
+    query_parser.add_argument("--min-kz", type=float)
+    query_parser.add_argument("--days", type=int, help="лише сесії за останні N днів")
+    query_parser.add_argument("--since", help="лише сесії від дати РРРР-ММ-ДД")
+    query_parser.add_argument("--db", default=os.path.join("results", INDEX_NAME))
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        total, counts = ingest(args.results_dir, args.db or os.path.join(args.results_dir, INDEX_NAME), args.workers, args.prune)
+        print(f"Сесій: {total}, додано/оновлено: {counts['done']}, без змін: {counts['unchanged']}, "
+              f"пропущено: {counts['skipped']}, видалено: {counts['pruned']}, помилок: {counts['error']}")
+        return 1 if counts["error"] else 0
+    since = args.since
+    if args.days is not None:
+        since = (datetime.datetime.now() - datetime.timedelta(days=args.days)).isoformat(timespec="seconds")
+    conn = connect(args.db)
+    rows = query_stimulus(conn, args.stimulus, args.min_kz, since, args.category)
+    for name, start_time, fio, category, kz, iv, miss_pct in rows:
+        print(f"{start_time} | {fio} | {category} | Кз={kz:.2f} | ІВ={iv:.1f} | пропуски {miss_pct:.1f}% | {name}")
+    print(f"Знайдено сесій: {len(rows)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
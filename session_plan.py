@@ -0,0 +1,184 @@
+# План сесії: повний упорядкований список проб, скомпільований із seed до першого стимулу
+# Для кожної проби наперед визначені стимул, категорія, тривалості проби/маски/паузи, номер маски з пулу та колір Струпа;
+# під час показу застосунок лише індексує план. Повтори пропущених стимулів вставляються в блок, що триває, а додаткові
+# раунди адаптивного розподілу — в кінець основного блоку; і ті, й інші беруться з потоків, виведених з того ж seed,
+# тож сесію з тими самими відповідями можна відтворити точно
+# Залежності: random, json, os
+
+import json
+import os
+import random
+
+MASK_DIGITS = "0123456789"
+MASK_LENGTH = 32
+STAGE_KINDS = {"adaptation": "adaptation", "adaptation_repeat": "adaptation", "preparation": "simple"}
+# Блоки, складені з трійок буфер-стимул-буфер: повтор вставляється лише між трійками
+WRAPPED_STAGES = ("reference", "main")
+
+class PlannedTrial:
+    __slots__ = ("stimulus", "category", "probe_ms", "mask_ms", "pause_ms", "pause_u", "mask", "color")
+    FIELDS = list(__slots__)
+
+    def __init__(self, stimulus, category, probe_ms, mask_ms, pause_ms, pause_u, mask, color):
+        self.stimulus = stimulus
+        self.category = category
+        self.probe_ms = probe_ms
+        self.mask_ms = mask_ms
+        self.pause_ms = pause_ms
+        # Частка діапазону паузи; діапазони основних етапів відомі лише після адаптації
+        self.pause_u = pause_u
+        self.mask = mask
+        self.color = color
+
+    def row(self):
+        return [getattr(self, name) for name in self.FIELDS]
+
+class SessionPlan:
+    def __init__(self, config, lang, seed):
+        # config — перевірений Settings з settings.py
+        self.config = config
+        self.lang = lang
+        self.seed = seed
+        self.stages = {}
+        # Пул рядків маски; рендерер створює й вимірює їх один раз, проба зберігає лише номер
+        self.masks = []
+        # Адаптовані діапазони пауз {категорія: [мін, макс]}; None — до завершення адаптації
+        self.pause_ranges = None
+        # Адаптивний розподіл (allocation.py): кількість доданих раундів за етапом і правила зупинки стимулів
+        self.rounds = {}
+        self.allocation = None
+
+    def stage_rng(self, stage):
+        # Окремий потік на кожен повтор і раунд: не залежить від того, скільки чисел витрачено до нього
+        return random.Random(f"{self.seed}/{stage}")
+
+    def block(self, stage):
+        return self.stages.get(stage, [])
+
+    def _trial(self, rng, stage, stimulus, category):
+        cfg = self.config
+        mask = rng.randrange(len(self.masks))
+        kind = STAGE_KINDS.get(stage, "stimulus")
+        if kind == "adaptation":
+            return PlannedTrial(stimulus, category, cfg.probe_duration_ms[category], cfg.mask_duration_ms, cfg.adaptation_pause_ms, None, mask, "white")
+        if kind == "simple":
+            pause_ms = rng.randint(*cfg.preparation_pause_range_ms)
+            return PlannedTrial(stimulus, category, cfg.preparation_probe_duration_ms, cfg.mask_duration_ms, pause_ms, None, mask, "white")
+        color = cfg.stroop_colors.get(self.lang, {}).get(stimulus, "white") if category == "cognitive" else "white"
+        trial = PlannedTrial(stimulus, category, cfg.probe_duration_ms[category], cfg.mask_duration_ms, None, rng.random(), mask, color)
+        if self.pause_ranges is not None:
+            self._resolve(trial)
+        return trial
+
+    def _resolve(self, trial):
+        lo, hi = self.pause_ranges.get(trial.category, self.pause_ranges["default"])
+        if hi < lo:
+            raise ValueError(f"Порожній діапазон паузи для {trial.category}: {lo}-{hi} мс")
+        trial.pause_ms = lo + int(trial.pause_u * (hi - lo + 1))
+
+    def _wrap_buffers(self, rng, stage, items):
+        buf = self.config.buffer_symbols
+        block = []
+        for stim, cat in items:
+            block.append(self._trial(rng, stage, buf, "buffer"))
+            block.append(self._trial(rng, stage, stim, cat))
+            block.append(self._trial(rng, stage, buf, "buffer"))
+        return block
+
+    @classmethod
+    def compile(cls, config, stimuli_main, lang, seed=None, repeats=None):
+        # repeats(категорія) — показів стимулу в основному блоці; None — test_repeats для всіх
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        plan = cls(config, lang, seed)
+        rng = random.Random(seed)
+        plan.masks = ["".join(rng.choices(MASK_DIGITS, k=MASK_LENGTH)) for _ in range(config.mask_pool_size)]
+        buf = config.buffer_symbols
+        plan.stages["adaptation"] = [plan._trial(rng, "adaptation", buf, "buffer") for _ in range(config.adaptation_buffer_count)]
+        words = []
+        for w in config.relaxation_words[lang]:
+            words += [w] * config.preparation_repeats
+        rng.shuffle(words)
+        plan.stages["preparation"] = [plan._trial(rng, "preparation", w, "relax") for w in words]
+        items = []
+        for stim in config.neutral_words[lang][:config.calibration_neutral_count]:
+            if rng.random() < config.calibration_buffer_per_neutral:
+                items.append((buf, "buffer"))
+            items.append((stim, "neutral"))
+        rng.shuffle(items)
+        plan.stages["calibration"] = [plan._trial(rng, "calibration", stim, cat) for stim, cat in items]
+        items = []
+        for cat in ["sensitive", "neutral", "cognitive"]:
+            items += [(w, cat) for w in config.reference_words[lang][cat]]
+        items = items * config.reference_test_config["repetitions"]
+        rng.shuffle(items)
+        plan.stages["reference"] = plan._wrap_buffers(rng, "reference", items)
+        # Покази йдуть колами по stimuli.txt: за сталої кількості порядок той самий, що й у list(stimuli_main) * test_repeats
+        counts = [repeats(cat) if repeats else config.test_repeats for _, cat in stimuli_main]
+        items = [item for r in range(max(counts, default=0)) for item, count in zip(stimuli_main, counts) if r < count]
+        rng.shuffle(items)
+        plan.stages["main"] = plan._wrap_buffers(rng, "main", items)
+        return plan
+
+    def resolve_pauses(self, pause_ranges):
+        # Після адаптації: паузи всіх ще не показаних проб з адаптованих діапазонів
+        self.pause_ranges = pause_ranges
+        for trials in self.stages.values():
+            for trial in trials:
+                if trial.pause_u is not None:
+                    self._resolve(trial)
+
+    def retry(self, stage, block, start, stimulus, category, k):
+        # Повтор пропущеного стимулу (k — номер повтору в блоці, кожен з власного потоку seed): (позиція, проби).
+        # Позиція — випадкова межа серед ще не показаних проб block[start:]; сам повтор обгорнутий буферами,
+        # крім адаптації, де блок складається лише з буферів
+        rng = self.stage_rng(f"{stage}/retry/{k}")
+        unit = 3 if stage in WRAPPED_STAGES else 1
+        first = -(-start // unit) * unit
+        pos = first + unit * rng.randint(0, (len(block) - first) // unit)
+        if STAGE_KINDS.get(stage) == "adaptation":
+            return pos, [self._trial(rng, stage, stimulus, category)]
+        return pos, self._wrap_buffers(rng, stage, [(stimulus, category)])
+
+    def extend_block(self, stage, items):
+        # Додатковий раунд у кінець блоку етапу (адаптивний розподіл); кожен раунд — окремий потік з того ж seed.
+        # Повертає проби раунду
+        round_no = self.rounds.get(stage, 0) + 1
+        self.rounds[stage] = round_no
+        rng = self.stage_rng(f"{stage}/{round_no}")
+        items = list(items)
+        rng.shuffle(items)
+        block = self._wrap_buffers(rng, stage, items)
+        self.stages[stage].extend(block)
+        return block
+
+    def save(self, path):
+        data = {"seed": self.seed, "lang": self.lang, "masks": self.masks, "fields": PlannedTrial.FIELDS,
+                "pause_ranges": self.pause_ranges, "rounds": self.rounds, "allocation": self.allocation,
+                "stages": {stage: [trial.row() for trial in trials] for stage, trials in self.stages.items()}}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, config):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        plan = cls(config, data["lang"], data["seed"])
+        plan.pause_ranges = data["pause_ranges"]
+        plan.rounds = data.get("rounds", {})
+        plan.allocation = data.get("allocation")
+        plan.masks = data["masks"]
+        index = [data["fields"].index(name) for name in PlannedTrial.FIELDS]
+        plan.stages = {stage: [PlannedTrial(*(row[i] for i in index)) for row in rows] for stage, rows in data["stages"].items()}
+        return plan
+
+def read_allocation(path):
+    # Правила зупинки адаптивного розподілу з файла плану для звіту; None — режим не діяв або плану немає
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("allocation")
@@ -0,0 +1,304 @@
+# Робочий процес сесії: презентаційний процес (main012-s.py) лише показує стимули й ловить натискання,
+# а лог, контрольні точки, таблицю проб на диску, звіт, індекс сесій і норми веде окремий процес.
+# Події йдуть каналом multiprocessing.Queue: put у головному потоці Tk лише кладе кортеж у буфер черги,
+# серіалізацію і запис у канал виконує її фоновий потік
+# Запуск: SessionWorker(...) з main012-s.py; окремо не запускається
+# Залежності: multiprocessing, atexit, json, os, queue, datetime, collections, analysis.py;
+# у робочому процесі — batch_report.py, report.py, norms.py, session_index.py, session_plan.py
+
+import atexit
+import collections
+import datetime
+import json
+import multiprocessing
+import os
+import queue
+from analysis import TrialStore, TrialAnalysis, TimingQuality, ttest_welch
+
+# spawn, а не fork: на момент старту сесії вже працюють Tk і фонові потоки, а їхній стан у копії процесу невизначений
+CONTEXT = multiprocessing.get_context("spawn")
+BATCH_SIZE = 256
+# Етапи, з яких будуються звіт і норми
+ANALYSIS_STAGES = ("main", "main_repeat")
+# Як часто робочий процес перевіряє, чи живий презентаційний (після аварії він дописує буфер і завершується)
+PARENT_CHECK_SEC = 1.0
+
+def read_checkpoint(path):
+    # ЗМІНА ВІД 18.10.2026: Відтворення контрольних точок сесії: останній блок, позиція в ньому, проби, лічильники
+    # пропусків і повтори, вставлені в останній блок ([позиція, рядки проб плану] у порядку вставки), а також
+    # тривалості натискань, відпущених уже після запису проби ("press"). Самі блоки беруться з плану сесії.
+    # Обірваний останній рядок (аварія під час запису) ігнорується
+    state = {"stage": None, "kind": None, "idx": 0, "seq": 0, "ms": 0.0, "pause_range_ms": None,
+             "trials": TrialStore(), "missed": {}, "retries": []}
+    trials = state["trials"]
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            rec = json.loads(line)
+            state["seq"] = rec["seq"]
+            state["ms"] = rec["ms"]
+            if rec["ev"] == "block":
+                state.update(stage=rec["stage"], kind=rec["kind"], idx=0, pause_range_ms=rec["pause_range_ms"], retries=[])
+                state["missed"] = {(stim, cat): {"valid_count": valid, "attempts": attempts} for stim, cat, valid, attempts in rec["missed"]}
+            elif rec["ev"] == "trial":
+                state["idx"] = rec["i"]
+                state["retries"].extend(rec.get("retries", ()))
+                row = rec.get("row")
+                if row:
+                    _append_row(trials, row)
+                    stim, cat, valid, attempts = rec["missed"]
+                    state["missed"][(stim, cat)] = {"valid_count": valid, "attempts": attempts}
+            elif rec["ev"] == "press":
+                trials.set_press_duration(rec["trial"], rec["press_duration"])
+    return state
+
+def _append_row(trials, row):
+    i = trials.append(row["stage"], row["stimulus"], row["category"], row["reaction"], row["t"], row["miss"],
+                      row["reason"], row["sequence_position"])
+    if row["press_duration"] is not None:
+        trials.set_press_duration(i, row["press_duration"])
+    trials.set_timing(i, row["timing"])
+
+def _now():
+    # Той самий формат, що й now() у main012-s.py
+    return datetime.datetime.now().strftime("%d.%m.%Y %H:%M:%S EEST")
+
+class SessionWorker:
+    # Сторона презентаційного процесу: лише черга в один бік і відповіді наприкінці сесії
+    def __init__(self, folder, session_id, config):
+        self.channel = CONTEXT.Queue(maxsize=config.log_queue_size)
+        self.replies = CONTEXT.Queue()
+        self.overflow = collections.deque()
+        # Не daemon: такий процес multiprocessing завершує примусово на виході інтерпретатора, разом із ще не
+        # записаними подіями. close() через atexit спрацьовує раніше за завершення дочірніх процесів
+        self.process = CONTEXT.Process(target=run, name="session-worker",
+                                       args=(self.channel, self.replies, os.path.abspath(folder), session_id, config))
+        self.process.start()
+        atexit.register(self.close)
+        # Фоновий потік черги стартує з першим put: тут, до режиму реального часу, щоб він не успадкував
+        # закріплене ядро і пріоритет головного потоку
+        self.flush()
+
+    def send(self, msg):
+        # Переповнений канал ніколи не блокує стимульний колбек: надлишок чекає в overflow і не губиться
+        while self.overflow:
+            try:
+                self.channel.put_nowait(self.overflow[0])
+            except queue.Full:
+                self.overflow.append(msg)
+                return
+            self.overflow.popleft()
+        try:
+            self.channel.put_nowait(msg)
+        except queue.Full:
+            self.overflow.append(msg)
+
+    def log(self, rec):
+        self.send(("log", rec))
+
+    def checkpoint(self, rec):
+        self.send(("checkpoint", rec))
+
+    def press_duration(self, row, press_duration_ms):
+        self.send(("press", row, press_duration_ms))
+
+    def flush(self, fsync=False):
+        self.send(("flush", fsync))
+
+    def save_trials(self):
+        self.send(("save",))
+
+    def finish(self, test_end_time_str, startup_ms, person_info):
+        self.send(("finish", test_end_time_str, startup_ms, person_info))
+
+    def reply(self, timeout):
+        # ("error", рядок логу), ("report", None) або ("failed", текст помилки); None — відповіді ще немає
+        try:
+            return self.replies.get(timeout=timeout)
+        except queue.Empty:
+            if self.process.is_alive():
+                return None
+            return "failed", f"робочий процес сесії завершився (код {self.process.exitcode})"
+
+    def close(self):
+        if not self.process.is_alive():
+            # Інакше вихід з програми чекатиме, поки фоновий потік черги допише канал, який уже ніхто не читає
+            self.channel.cancel_join_thread()
+            return
+        self.overflow.append(None)
+        while self.overflow:
+            try:
+                self.channel.put(self.overflow[0], timeout=PARENT_CHECK_SEC)
+            except queue.Full:
+                # Робочий процес упав із повним каналом: чекати далі нікому, вихід не повинен зависнути
+                if not self.process.is_alive():
+                    self.channel.cancel_join_thread()
+                    return
+                continue
+            self.overflow.popleft()
+        self.process.join()
+
+class _Session:
+    # Сторона робочого процесу: файли сесії і дзеркало таблиці проб, зібране з контрольних точок
+    def __init__(self, replies, folder, session_id, config):
+        self.replies = replies
+        self.folder = folder
+        self.session_id = session_id
+        self.config = config
+        self.log_file = os.path.join(folder, f"log-{session_id}.txt")
+        self.checkpoint_file = os.path.join(folder, f"checkpoint-{session_id}.jsonl")
+        self.trials_file = os.path.join(folder, f"trials-{session_id}.bin")
+        self.report_file = os.path.join(folder, f"report-{session_id}.txt")
+        # Продовжена сесія: дзеркало починається з тих самих проб, що й у презентаційному процесі
+        self.trials = read_checkpoint(self.checkpoint_file)["trials"] if os.path.exists(self.checkpoint_file) else TrialStore()
+        # ЗМІНА ВІД 18.10.2026: Статистика наростає по пробі, тож наприкінці сесії лишається тільки підсумок за групами
+        self.analysis = TrialAnalysis(self.trials, ANALYSIS_STAGES)
+        self.timing_quality = TimingQuality(self.trials, config.timing_tolerance_ms)
+        self.log_lines = []
+        self.checkpoint_lines = []
+        # Час останнього запису лога від застосунку: ним позначаються рядки, які додає сам робочий процес
+        self.last_stamp = None
+
+    def log(self, rec):
+        self.log_lines.append(rec)
+
+    def checkpoint(self, rec):
+        self.checkpoint_lines.append(json.dumps(rec, ensure_ascii=False))
+        if rec.get("row"):
+            _append_row(self.trials, rec["row"])
+            i = len(self.trials) - 1
+            self.analysis.append(i)
+            self.timing_quality.append(i)
+        elif rec["ev"] == "block" and self.analysis.n:
+            self._log_interim()
+
+    def press(self, row, press_duration_ms):
+        # Відпускання до закриття вікна реакції приходить раніше за рядок проби — тоді тривалість уже в самому рядку
+        if row < len(self.trials):
+            self.trials.set_press_duration(row, press_duration_ms)
+            self.analysis.set_press_duration(row, press_duration_ms)
+
+    def _log_interim(self):
+        # Проміжні результати основних етапів на початку кожного блоку: видно в лозі ще до кінця сесії
+        try:
+            stats = self.analysis.category_stats()
+        except Exception as e:
+            self.log(f"{self._stamp()}|ERROR|Interim stats error: {e}")
+            return
+        parts = [f"{cat} n={s['n']} RT={s['mean']:.0f}±{s['sd']:.0f} ефект={s['effect']:.1f}% пропусків={s['miss']}"
+                 for cat, s in sorted(stats.items())]
+        self.log(f"{self._stamp()}|INFO|Проміжні результати: {'; '.join(parts)}")
+
+    def _stamp(self):
+        if self.log_lines:
+            return self.log_lines[-1].split("|", 1)[0]
+        return self.last_stamp or _now()
+
+    def flush(self, fsync=False):
+        self.write(fsync)
+
+    def write(self, fsync=False):
+        for path, lines in ((self.log_file, self.log_lines), (self.checkpoint_file, self.checkpoint_lines)):
+            if not lines and not fsync:
+                continue
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    if lines:
+                        f.write("\n".join(lines) + "\n")
+                    if fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            except Exception as e:
+                self.replies.put(("error", f"{_now()}|ERROR|Log write error: {e}"))
+            if path == self.log_file and lines:
+                self.last_stamp = lines[-1].split("|", 1)[0]
+            lines.clear()
+
+    def save(self):
+        try:
+            self.trials.save(self.trials_file)
+        except Exception as e:
+            self.log(f"{_now()}|ERROR|Trials write error: {e}")
+
+    def finish(self, test_end_time_str, startup_ms, person_info):
+        from batch_report import SessionReanalysis
+        from report import report_outputs
+        from session_plan import read_allocation
+        norms = self._load_norms()
+        host = SessionReanalysis(self.config, self.trials, person_info, test_end_time_str, self.session_id, norms)
+        host.startup_ms = startup_ms
+        host.analysis = self.analysis
+        host.timing_quality = self.timing_quality
+        host.allocation = read_allocation(os.path.join(self.folder, f"plan-{self.session_id}.json"))
+        try:
+            host._write_report(report_outputs(os.path.splitext(self.report_file)[0]))
+            self.replies.put(("report", None))
+        except Exception as e:
+            self.replies.put(("failed", str(e)))
+        self._log_warnings(host, test_end_time_str)
+        self.write(fsync=True)
+        self._index_session()
+        self._update_norms(host, norms)
+        self._log_warnings(host, test_end_time_str)
+        self.write(fsync=True)
+
+    def _log_warnings(self, host, stamp):
+        # Попередження аналізу (SessionReanalysis.log) — у лог сесії з часом завершення тесту, як їх писав застосунок
+        for warning in host.warnings:
+            self.log(f"{stamp}|{warning}")
+        host.warnings.clear()
+
+    def _load_norms(self):
+        # Популяційні норми results/norms.json для блоку перцентилів у звіті (norms.py)
+        try:
+            from norms import Norms, NORMS_NAME
+            path = os.path.join(os.path.dirname(self.folder), NORMS_NAME)
+            return Norms.load(path) if os.path.exists(path) else Norms()
+        except Exception as e:
+            self.log(f"{_now()}|ERROR|Norms load error: {e}")
+            return None
+
+    def _update_norms(self, host, norms):
+        # Сесія додається до норм уже після звіту, тож респондент порівнюється з нормою без себе
+        if norms is None:
+            return
+        try:
+            from norms import NORMS_NAME
+            analysis = self.analysis
+            if analysis.n and norms.add_session(self.session_id, analysis, host._analyze_all_stimuli(analysis)):
+                norms.save(os.path.join(os.path.dirname(self.folder), NORMS_NAME))
+        except Exception as e:
+            self.log(f"{_now()}|ERROR|Norms update error: {e}")
+
+    def _index_session(self):
+        # Завершена сесія одразу потрапляє в results/index.sqlite (session_index.py)
+        try:
+            from session_index import index_session, INDEX_NAME
+            index_session(os.path.join(os.path.dirname(self.folder), INDEX_NAME), self.folder)
+        except Exception as e:
+            self.log(f"{_now()}|ERROR|Session index error: {e}")
+
+def run(channel, replies, folder, session_id, config):
+    # Цикл робочого процесу: події пакетами до BATCH_SIZE, запис на диск після кожного пакета; None — кінець сесії
+    ttest_welch.preload()
+    session = _Session(replies, folder, session_id, config)
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            items = [channel.get(timeout=PARENT_CHECK_SEC)]
+        except queue.Empty:
+            if parent is None or parent.is_alive():
+                continue
+            items = [None]
+        while len(items) < BATCH_SIZE and items[-1] is not None:
+            try:
+                items.append(channel.get_nowait())
+            except queue.Empty:
+                break
+        for item in items:
+            if item is None:
+                session.write(fsync=True)
+                return
+            getattr(session, item[0])(*item[1:])
+        session.write()
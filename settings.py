@@ -0,0 +1,249 @@
+# Налаштування тесту: config.json перевіряється за схемою один раз під час запуску
+# і перетворюється на незмінний об'єкт Settings; на гарячому шляху проби — лише доступ до атрибутів.
+# Стан, що змінюється під час сесії (діапазони пауз після адаптації), винесено в окремий AdaptiveTiming
+# Залежності: json, difflib, types
+
+import difflib
+import json
+import types
+
+class ConfigError(ValueError):
+    pass
+
+# Категорії, для яких таблиці тривалостей розгортаються наперед; решта бере значення "default"
+CATEGORIES = ("buffer", "relax", "neutral", "sensitive", "cognitive", "positive")
+REFERENCE_CATEGORIES = ("sensitive", "neutral", "cognitive")
+
+def _fail(key, expected, value):
+    raise ConfigError(f"config.json: {key}: очікується {expected}, отримано {value!r}")
+
+def _int(key, value, minimum=None):
+    if isinstance(value, bool) or not isinstance(value, int):
+        _fail(key, "ціле число", value)
+    if minimum is not None and value < minimum:
+        _fail(key, f"ціле число ≥ {minimum}", value)
+    return value
+
+def _number(key, value, minimum=None, maximum=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        _fail(key, "число", value)
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        _fail(key, f"число в межах [{minimum}, {maximum if maximum is not None else '∞'}]", value)
+    return value
+
+def _flag(key, value):
+    if not isinstance(value, bool):
+        _fail(key, "true або false", value)
+    return value
+
+def _text(key, value):
+    if not isinstance(value, str) or not value:
+        _fail(key, "непорожній рядок", value)
+    return value
+
+def _range(key, value):
+    if not isinstance(value, list) or len(value) != 2:
+        _fail(key, "[мін, макс] у мс", value)
+    lo, hi = _int(f"{key}[0]", value[0], 0), _int(f"{key}[1]", value[1], 0)
+    if hi < lo:
+        _fail(key, "мін ≤ макс", value)
+    return (lo, hi)
+
+def _mapping(key, value):
+    if not isinstance(value, dict):
+        _fail(key, "об'єкт {...}", value)
+    return value
+
+def _words(key, value):
+    if not isinstance(value, list) or not all(isinstance(w, str) and w for w in value):
+        _fail(key, "список непорожніх рядків", value)
+    return tuple(value)
+
+class _CategoryTable(dict):
+    # Невідома категорія (наприклад, нова у stimuli.txt) бере значення "default"
+    def __missing__(self, category):
+        return self["default"]
+
+def _category_table(key, value, item):
+    table = _CategoryTable({cat: item(f"{key}.{cat}", v) for cat, v in _mapping(key, value).items()})
+    # Таблиця без "default" (лише окремі категорії) бере його зі схеми, як і до перевірки за схемою
+    if "default" not in table:
+        table["default"] = item(f"{key}.default", SCHEMA[key][0]["default"])
+    for cat in CATEGORIES:
+        table.setdefault(cat, table["default"])
+    return types.MappingProxyType(table)
+
+def _per_language(key, value, item):
+    return types.MappingProxyType({lang: item(f"{key}.{lang}", v) for lang, v in _mapping(key, value).items()})
+
+def _mask_frame(key, value):
+    value = _mapping(key, value)
+    return types.MappingProxyType({"pad": _int(f"{key}.pad", value.get("pad", 32), 0),
+                                   "color": _text(f"{key}.color", value.get("color", "#FFFFFF")),
+                                   "width": _int(f"{key}.width", value.get("width", 8), 0)})
+
+def _realtime_mode(key, value):
+    value = _mapping(key, value)
+    cpu = value.get("cpu")
+    # priority — для SCHED_FIFO у Linux (1..99); без дозволу на нього застосунок просить лише nice
+    priority = _int(f"{key}.priority", value.get("priority", 10), 1)
+    if priority > 99:
+        _fail(f"{key}.priority", "ціле число в межах [1, 99]", priority)
+    return types.MappingProxyType({"enabled": _flag(f"{key}.enabled", value.get("enabled", False)),
+                                   "cpu": None if cpu is None else _int(f"{key}.cpu", cpu, 0),
+                                   "priority": priority})
+
+def _thresholds(key, value):
+    if not isinstance(value, list):
+        _fail(key, "список порогів", value)
+    return tuple(_number(f"{key}[{i}]", v, 0.01) for i, v in enumerate(value))
+
+def _adaptive_allocation(key, value):
+    value = _mapping(key, value)
+    # min_repeats ≥ 2: з одного показу немає SD для інтервалу Кз і t-тесту
+    min_repeats = _int(f"{key}.min_repeats", value.get("min_repeats", 2), 2)
+    max_repeats = _int(f"{key}.max_repeats", value.get("max_repeats", 6), 1)
+    if max_repeats < min_repeats:
+        _fail(f"{key}.max_repeats", f"ціле число ≥ min_repeats ({min_repeats})", max_repeats)
+    budget = value.get("budget")
+    alpha = _number(f"{key}.alpha", value.get("alpha", 0.05), 0, 1)
+    if not 0 < alpha < 1:
+        _fail(f"{key}.alpha", "число в межах (0, 1)", alpha)
+    return types.MappingProxyType({"enabled": _flag(f"{key}.enabled", value.get("enabled", False)),
+                                   "min_repeats": min_repeats, "max_repeats": max_repeats,
+                                   "budget": None if budget is None else _int(f"{key}.budget", budget, 0),
+                                   "alpha": alpha,
+                                   "p_band": _number(f"{key}.p_band", value.get("p_band", 4), 1),
+                                   "confidence": _number(f"{key}.confidence", value.get("confidence", 0.95), 0.5, 0.999),
+                                   "kz_thresholds": _thresholds(f"{key}.kz_thresholds", value.get("kz_thresholds", [1.2, 1.5])),
+                                   "kd_thresholds": _thresholds(f"{key}.kd_thresholds", value.get("kd_thresholds", [0.8, 0.6]))})
+
+def _reference_test_config(key, value):
+    value = _mapping(key, value)
+    return types.MappingProxyType({"repetitions": _int(f"{key}.repetitions", value.get("repetitions", 3), 1)})
+
+def _reference_words(key, value):
+    words = _mapping(key, value)
+    return types.MappingProxyType({cat: _words(f"{key}.{cat}", v) for cat, v in words.items()})
+
+def _colors(key, value):
+    return types.MappingProxyType({word: _text(f"{key}.{word}", color) for word, color in _mapping(key, value).items()})
+
+def _seed(key, value):
+    return None if value is None else _int(key, value, 0)
+
+# ключ: (значення за замовчуванням, перевірка)
+SCHEMA = {
+    "log_tail_size": (1000, lambda k, v: _int(k, v, 1)),
+    "log_queue_size": (10000, lambda k, v: _int(k, v, 1)),
+    "max_miss_attempts": (5, lambda k, v: _int(k, v, 1)),
+    "timer_spin_ms": (2, lambda k, v: _number(k, v, 0)),
+    "realtime_mode": ({}, _realtime_mode),
+    "border_width": (20, lambda k, v: _int(k, v, 0)),
+    "border_color": ("#FFD700", _text),
+    "bg_color": ("#000000", _text),
+    "probe_font": ("Arial", _text),
+    "probe_font_size": (44, lambda k, v: _int(k, v, 1)),
+    "info_font": ("Arial", _text),
+    "info_font_size": (32, lambda k, v: _int(k, v, 1)),
+    "info_color": ("#FFFFFF", _text),
+    "mask_frame": ({}, _mask_frame),
+    "mask_duration_ms": (100, lambda k, v: _int(k, v, 1)),
+    "mask_pool_size": (16, lambda k, v: _int(k, v, 1)),
+    "buffer_symbols": ("01010010110010101001011010011001", _text),
+    "probe_duration_ms": ({"default": 60}, lambda k, v: _category_table(k, v, lambda kk, vv: _int(kk, vv, 1))),
+    "pause_range_ms": ({"default": [500, 1500]}, lambda k, v: _category_table(k, v, _range)),
+    "adaptation_pause_ms": (1000, lambda k, v: _int(k, v, 0)),
+    "adaptation_buffer_count": (30, lambda k, v: _int(k, v, 0)),
+    "preparation_probe_duration_ms": (60, lambda k, v: _int(k, v, 1)),
+    "preparation_pause_range_ms": ([1000, 2000], _range),
+    "preparation_repeats": (3, lambda k, v: _int(k, v, 0)),
+    "calibration_neutral_count": (6, lambda k, v: _int(k, v, 0)),
+    "calibration_buffer_per_neutral": (0.67, lambda k, v: _number(k, v, 0, 1)),
+    "reference_test_config": ({}, _reference_test_config),
+    "test_repeats": (3, lambda k, v: _int(k, v, 1)),
+    "adaptive_allocation": ({}, _adaptive_allocation),
+    "reaction_window_ms": (2000, lambda k, v: _int(k, v, 1)),
+    "post_reaction_delay_ms": (300, lambda k, v: _int(k, v, 0)),
+    "pause_interval_min": (5, lambda k, v: _number(k, v, 0)),
+    "checkpoint_fsync_trials": (10, lambda k, v: _int(k, v, 1)),
+    "session_seed": (None, _seed),
+    "timing_tolerance_ms": (5, lambda k, v: _number(k, v, 0)),
+    "timing_max_out_of_tolerance_pct": (5, lambda k, v: _number(k, v, 0, 100)),
+    "resampling_iterations": (10000, lambda k, v: _int(k, v, 0)),
+    "resampling_seed": (0, lambda k, v: _int(k, v, 0)),
+    "resampling_workers": (1, lambda k, v: _int(k, v, 1)),
+    "languages": (["ua"], _words),
+    "instructions": ({}, lambda k, v: _per_language(k, v, _text)),
+    "stroop_colors": ({}, lambda k, v: _per_language(k, v, _colors)),
+    "relaxation_words": ({}, lambda k, v: _per_language(k, v, _words)),
+    "neutral_words": ({}, lambda k, v: _per_language(k, v, _words)),
+    "reference_words": ({}, lambda k, v: _per_language(k, v, _reference_words)),
+}
+
+class Settings:
+    def __init__(self, data):
+        data = _mapping("<корінь>", data)
+        for key in data:
+            # Ключі з "_" на початку — коментарі у config.json
+            if key not in SCHEMA and not key.startswith("_"):
+                hint = difflib.get_close_matches(key, SCHEMA, n=1)
+                raise ConfigError(f"config.json: невідомий параметр {key!r}" + (f" (можливо, {hint[0]!r}?)" if hint else ""))
+        for key, (default, check) in SCHEMA.items():
+            object.__setattr__(self, key, check(key, data.get(key, default)))
+        object.__setattr__(self, "missing", frozenset(key for key in SCHEMA if key not in data))
+        object.__setattr__(self, "raw", json.loads(json.dumps(data)))
+        for lang, colors in self.stroop_colors.items():
+            for color in colors.values():
+                if color.lower() == self.bg_color.lower():
+                    raise ConfigError(f"Color {color} in stroop_colors matches bg_color {self.bg_color}, causing invisibility")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings незмінні; змінний стан сесії — у AdaptiveTiming")
+
+    def __reduce__(self):
+        # Для передачі в процеси batch_report: MappingProxyType не серіалізується pickle
+        return (Settings, (self.raw,))
+
+    def language_errors(self, lang):
+        # Таблиці слів, без яких сесію цією мовою не скласти; перевіряється до першого стимулу
+        errors = [f"{key}.{lang}" for key in ("relaxation_words", "neutral_words", "reference_words")
+                  if lang not in getattr(self, key)]
+        if lang in self.reference_words:
+            errors += [f"reference_words.{lang}.{cat}" for cat in REFERENCE_CATEGORIES if cat not in self.reference_words[lang]]
+        return errors
+
+def load_settings(path):
+    with open(path, encoding="utf-8") as f:
+        return Settings(json.load(f))
+
+class AdaptiveTiming:
+    # Діапазони пауз між пробами: на старті — з config.json, після адаптаційного блоку — за реакціями респондента
+    __slots__ = ("pause_ranges", "adapted")
+
+    def __init__(self, pause_ranges):
+        self.pause_ranges = {cat: list(r) for cat, r in pause_ranges.items()}
+        self.adapted = False
+
+    def adapt(self, mean_reaction, miss_pct):
+        m = mean_reaction
+        if miss_pct <= 15 and m < 700:
+            min_pause = 600
+        elif miss_pct <= 15 and 700 <= m <= 950:
+            min_pause = ((m + 300) // 100) * 100
+        else:
+            min_pause = max(1000, min(((m + 500) // 100) * 100, 1100))
+        max_pause = min(min_pause + 500, 1100)
+        # Зсув для sensitive/cognitive обмежено max_pause: за повільних реакцій діапазон інакше ставав порожнім
+        self.pause_ranges = {
+            "default": [min_pause, max_pause],
+            "neutral": [min_pause, max_pause],
+            "sensitive": [min(min_pause + 100, max_pause), max_pause],
+            "cognitive": [min(min_pause + 200, max_pause), max_pause]
+        }
+        self.adapted = True
+        return min_pause, max_pause
+
+    def restore(self, pause_ranges):
+        self.pause_ranges = pause_ranges
+        self.adapted = True
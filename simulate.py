@@ -0,0 +1,435 @@
+# Безголова симуляція: синтетичний респондент проходить увесь PsychoSemanticTestApp без дисплея і без очікування.
+# Tk замінено віджетами без вікон (headless_tk), time.perf_counter, after і datetime.now — віртуальним годинником,
+# тож сесія з усіма етапами, повтореннями пропущених, паузами й адаптацією пауз проходить за частки секунди
+# і залишає в results/ ті самі файли, що й справжня (лог, контрольні точки, проби, звіт, індекс, норми).
+# Респондент: час реакції за категорією (ex-Gaussian), пропуски, передчасні натискання, тривалість натискання
+# і повільне зростання часу реакції з утомою. Однаковий seed — однакові сесії
+# Запуск: python simulate.py [--sessions N] [--seed S] [--respondent respondent.json] [--dir .]
+# Залежності: heapq, importlib, main012-s.py, settings.py
+
+import argparse
+import datetime
+import difflib
+import heapq
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import types
+from settings import ConfigError, Settings, load_settings
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main012-s.py")
+# Захист від зациклення: звичайна сесія — кілька тисяч подій
+MAX_EVENTS = 1000000
+
+# rt_ms — [mu, sigma, tau] ex-Gaussian у мс за категорією ("default" — для решти);
+# stimulus_rt_ms — те саме для окремих слів (закладений ефект); fatigue_ms_per_min — зсув mu за хвилину сесії;
+# довге натискання (long_press_*) довше autorepeat_delay_ms породжує автоповтор X11 (0 в autorepeat_interval_ms — без нього)
+RESPONDENT_DEFAULTS = {
+    "rt_ms": {"default": [400, 50, 80], "sensitive": [460, 60, 110], "cognitive": [480, 60, 100]},
+    "stimulus_rt_ms": {},
+    "miss_rate": 0.03,
+    "premature_rate": 0.01,
+    "press_ms": [130, 30],
+    "long_press_rate": 0.02,
+    "long_press_ms": [800, 200],
+    "autorepeat_delay_ms": 500,
+    "autorepeat_interval_ms": 33,
+    "fatigue_ms_per_min": 1.5,
+    "form_ms": 20000,
+    "read_ms": 15000,
+    "fio": "Симуляція",
+    "birth": "01.01.1990",
+    "lang": "ua",
+    "resume": False,
+}
+
+def respondent_params(overrides=None):
+    overrides = overrides or {}
+    for key in overrides:
+        if key not in RESPONDENT_DEFAULTS:
+            hint = difflib.get_close_matches(key, RESPONDENT_DEFAULTS, n=1)
+            raise ValueError(f"Невідомий параметр респондента {key!r}" + (f" (можливо, {hint[0]!r}?)" if hint else ""))
+    params = dict(RESPONDENT_DEFAULTS, **overrides)
+    params["rt_ms"] = dict(RESPONDENT_DEFAULTS["rt_ms"], **overrides.get("rt_ms", {}))
+    return params
+
+class VirtualClock:
+    # Черга таймерів за віртуальним часом; подія виконується миттєво, час перестрибує до наступної
+    def __init__(self, start):
+        self.t = 0.0
+        self.start = start
+        self.queue = []
+        self.live = set()
+        self.seq = itertools.count()
+
+    def perf_counter(self):
+        return self.t
+
+    def now(self):
+        return self.start + datetime.timedelta(seconds=self.t)
+
+    def at(self, t, callback, *args):
+        key = next(self.seq)
+        heapq.heappush(self.queue, (max(t, self.t), key, callback, args))
+        self.live.add(key)
+        return key
+
+    def cancel(self, key):
+        self.live.discard(key)
+
+    def run(self, max_events=MAX_EVENTS):
+        events = 0
+        while self.queue:
+            t, key, callback, args = heapq.heappop(self.queue)
+            if key not in self.live:
+                continue
+            self.live.remove(key)
+            # Час лише зростає: після «активного очікування» до дедлайну (див. _virtual_scheduler) раніші таймери запізнюються
+            self.t = max(self.t, t)
+            callback(*args)
+            events += 1
+            if events >= max_events:
+                raise RuntimeError(f"Симуляція перевищила {max_events} подій")
+        return events
+
+    def datetime_module(self):
+        # Заміна модуля datetime в застосунку: now() — віртуальний, strptime та решта — справжні
+        clock = self
+
+        class VirtualDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now()
+
+        return types.SimpleNamespace(datetime=VirtualDatetime, timedelta=datetime.timedelta)
+
+class Messagebox:
+    # Діалоги не показуються: повідомлення накопичуються, на askyesno відповідає респондент
+    def __init__(self, answer=False):
+        self.answer = answer
+        self.messages = []
+
+    def showerror(self, title, message):
+        self.messages.append(("error", title, message))
+
+    def showwarning(self, title, message):
+        self.messages.append(("warning", title, message))
+
+    def askyesno(self, title, message):
+        self.messages.append(("askyesno", title, message))
+        return self.answer
+
+def headless_tk(clock, messagebox):
+    # Модуль на місці tkinter: лише ті віджети й методи, якими користується застосунок
+
+    class Widget:
+        def __init__(self, master=None, **options):
+            self.master = master
+            self.options = options
+            self.children = []
+            self.alive = True
+            if master is not None:
+                master.children.append(self)
+
+        def pack(self, **options):
+            pass
+
+        place = grid = pack
+
+        def config(self, **options):
+            self.options.update(options)
+
+        configure = config
+
+        def destroy(self):
+            self.alive = False
+            if self.master is not None and self in self.master.children:
+                self.master.children.remove(self)
+
+        def winfo_exists(self):
+            return self.alive
+
+        def winfo_children(self):
+            return list(self.children)
+
+        def update_idletasks(self):
+            pass
+
+    class Tk(Widget):
+        # listener(sequence) викликається на кожен bind — так респондент «бачить», що застосунок чекає на клавішу
+        def __init__(self):
+            super().__init__()
+            self.bindings = {}
+            self.all_bindings = {}
+            self.serial = itertools.count(1)
+            self.listener = None
+
+        def title(self, text):
+            pass
+
+        def attributes(self, *args):
+            pass
+
+        def winfo_screenwidth(self):
+            return 1920
+
+        def winfo_screenheight(self):
+            return 1080
+
+        def bind(self, sequence, func):
+            self.bindings[sequence] = func
+            if self.listener is not None:
+                self.listener(sequence)
+
+        def unbind(self, sequence):
+            self.bindings.pop(sequence, None)
+
+        def bind_all(self, sequence, func, add=None):
+            self.all_bindings[sequence] = func
+
+        def event_generate(self, sequence, **fields):
+            # Як у Tk: спершу прив'язка вікна, потім bind_all; time — цілі мс, як у X-сервера
+            event = types.SimpleNamespace(widget=self, time=int(clock.t * 1000), serial=next(self.serial), **fields)
+            for func in (self.bindings.get(sequence), self.all_bindings.get(sequence)):
+                if func is not None:
+                    func(event)
+
+        def after(self, ms, func, *args):
+            return clock.at(clock.t + ms / 1000, func, *args)
+
+        def after_idle(self, func, *args):
+            return clock.at(clock.t, func, *args)
+
+        def after_cancel(self, after_id):
+            clock.cancel(after_id)
+
+        def quit(self):
+            clock.queue.clear()
+            clock.live.clear()
+
+        def mainloop(self):
+            clock.run()
+
+    class Canvas(Widget):
+        def __init__(self, master=None, **options):
+            super().__init__(master, **options)
+            self.items = {}
+            self.next_id = itertools.count(1)
+
+        def _create(self, kind, coords, options):
+            item_id = next(self.next_id)
+            self.items[item_id] = dict(options, kind=kind, coords=list(coords))
+            return item_id
+
+        def create_text(self, *coords, **options):
+            return self._create("text", coords, options)
+
+        def create_rectangle(self, *coords, **options):
+            return self._create("rectangle", coords, options)
+
+        def itemconfigure(self, item_id, **options):
+            self.items[item_id].update(options)
+
+        itemconfig = itemconfigure
+
+        def coords(self, item_id, *coords):
+            self.items[item_id]["coords"] = list(coords)
+
+        def bbox(self, item_id):
+            # Наближено за розміром шрифту; прихований текст, як і в Tk, має порожній bbox
+            item = self.items[item_id]
+            if item.get("state") == "hidden":
+                return None
+            x, y = item["coords"][:2]
+            size = item.get("font", ("", 12))[1]
+            half_w, half_h = int(len(item.get("text", "")) * size * 0.3), int(size * 0.6)
+            return (x - half_w, y - half_h, x + half_w, y + half_h)
+
+        def delete(self, item_id):
+            self.items.pop(item_id, None)
+
+        def lift(self, item_id):
+            pass
+
+    class Text(Widget):
+        def __init__(self, master=None, **options):
+            super().__init__(master, **options)
+            self.content = ""
+
+        def insert(self, index, text):
+            self.content += text
+
+    class Variable:
+        def __init__(self, master=None, value=None):
+            self.value = value
+
+        def get(self):
+            return self.value
+
+        def set(self, value):
+            self.value = value
+
+    module = types.ModuleType("tkinter")
+    module.TkVersion = 8.6
+    module.Tk, module.Canvas, module.Text = Tk, Canvas, Text
+    module.Frame = module.Label = module.Entry = module.Button = module.Radiobutton = module.Checkbutton = Widget
+    module.StringVar = module.BooleanVar = Variable
+    module.messagebox = messagebox
+    return module
+
+def _virtual_scheduler(base, clock):
+    class VirtualTrialScheduler(base):
+        # Активне очікування останніх spin_ms на віртуальному годиннику — це перехід годинника до дедлайну
+        def _fire(self, token, deadline, callback):
+            if token in self.pending and deadline - clock.t <= self.spin_sec + 1e-6:
+                clock.t = max(clock.t, deadline)
+            super()._fire(token, deadline, callback)
+
+    return VirtualTrialScheduler
+
+def load_app(clock, tk_module, config, rng):
+    # Окремий екземпляр модуля застосунку на кожну сесію: глобальні time/datetime/random/tkinter — віртуальні
+    saved = {name: sys.modules.get(name) for name in ("tkinter", "tkinter.messagebox")}
+    sys.modules["tkinter"] = tk_module
+    sys.modules["tkinter.messagebox"] = tk_module.messagebox
+    try:
+        spec = importlib.util.spec_from_file_location("psychosemantic_app", APP_FILE)
+        app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(app)
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    app.time = types.SimpleNamespace(perf_counter=clock.perf_counter)
+    app.datetime = clock.datetime_module()
+    app.random = rng
+    # Час запуску до форми — віртуальний (0 мс), щоб логи й звіти однакових сесій збігалися побайтно
+    app.process_uptime = clock.perf_counter
+    app.load_config = lambda: config
+    app.TrialScheduler = _virtual_scheduler(app.TrialScheduler, clock)
+    return app
+
+class Respondent:
+    # Реагує на кожне вікно реакції (bind "<space>") і на кожен екран з Enter (форма, інструкція)
+    def __init__(self, params, rng, clock, root):
+        self.params = params
+        self.rng = rng
+        self.clock = clock
+        self.root = root
+        self.app = None
+        self.held_until = 0.0
+        root.listener = self.on_bind
+
+    def on_bind(self, sequence):
+        if sequence == "<space>":
+            self._react()
+        elif sequence == "<Return>":
+            delay = self.params["read_ms"] if self.app is not None else self.params["form_ms"]
+            self.clock.at(self.clock.t + delay / 1000, lambda: self.root.event_generate("<Return>", keysym="Return"))
+
+    def _rt_ms(self, stimulus, category):
+        p = self.params
+        mu, sigma, tau = p["stimulus_rt_ms"].get(stimulus) or p["rt_ms"].get(category) or p["rt_ms"]["default"]
+        rt = mu + p["fatigue_ms_per_min"] * self.clock.t / 60 + self.rng.gauss(0, sigma)
+        if tau > 0:
+            rt += self.rng.expovariate(1 / tau)
+        return max(0.0, rt)
+
+    def _react(self):
+        p = self.params
+        r = self.rng.random()
+        if r < p["miss_rate"]:
+            return
+        if r < p["miss_rate"] + p["premature_rate"]:
+            rt = self.rng.uniform(0, 50)
+        else:
+            rt = self._rt_ms(self.app.stimulus_value, self.app.stimulus_cat)
+        press_ms = p["long_press_ms"] if self.rng.random() < p["long_press_rate"] else p["press_ms"]
+        press = max(20.0, self.rng.gauss(*press_ms))
+        # Клавіша ще затиснута з попередньої проби — спершу відпустити, потім натиснути знову
+        start = max(self.clock.t + rt / 1000, self.held_until + 0.05)
+        self.held_until = start + press / 1000
+        self.clock.at(start, self._press, press)
+
+    def _press(self, press_ms):
+        p = self.params
+        self.root.event_generate("<space>", keysym="space")
+        if p["autorepeat_interval_ms"] > 0:
+            repeat_ms = p["autorepeat_delay_ms"]
+            while repeat_ms < press_ms:
+                self.clock.at(self.clock.t + repeat_ms / 1000, self._autorepeat)
+                repeat_ms += p["autorepeat_interval_ms"]
+        self.clock.at(self.clock.t + press_ms / 1000, lambda: self.root.event_generate("<KeyRelease-space>", keysym="space"))
+
+    def _autorepeat(self):
+        # Автоповтор X11 без detectable autorepeat: KeyRelease і KeyPress з тим самим часом
+        self.root.event_generate("<KeyRelease-space>", keysym="space")
+        self.root.event_generate("<space>", keysym="space")
+
+def simulate_session(params=None, seed=0, start=None, config=None, max_events=MAX_EVENTS):
+    # Одна сесія в поточній теці (config.json, stimuli.txt, results/); повертає підсумок сесії
+    params = respondent_params(params)
+    rng = random.Random(seed)
+    config = config or load_settings("config.json")
+    if config.session_seed is None:
+        config = Settings(dict(config.raw, session_seed=rng.randrange(2 ** 32)))
+    clock = VirtualClock(start or datetime.datetime(2026, 1, 1, 9, 0))
+    messagebox = Messagebox(params["resume"])
+    tk_module = headless_tk(clock, messagebox)
+    app_module = load_app(clock, tk_module, config, random.Random(rng.randrange(2 ** 32)))
+    wall_start = time.perf_counter()
+    root = tk_module.Tk()
+    respondent = Respondent(params, rng, clock, root)
+    app = app_module.PsychoSemanticTestApp(root)
+    respondent.app = app
+    app.fio_var.set(params["fio"])
+    app.birth_var.set(params["birth"])
+    app.lang_var.set(params["lang"])
+    app.consent_var.set(True)
+    try:
+        events = clock.run(max_events)
+        if app.test_end_time is None:
+            raise RuntimeError(f"Сесія {app.session_id} зупинилась на етапі {app.stage}: "
+                               + "; ".join(message for _, _, message in messagebox.messages))
+    finally:
+        # Кнопка «Завершити» на екрані звіту
+        app._on_quit()
+    return {"session_id": app.session_id, "folder": app.session_folder, "report": app.report_file,
+            "trials": len(app.trials), "events": events, "virtual_min": clock.t / 60,
+            "wall_sec": time.perf_counter() - wall_start, "messages": messagebox.messages}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Симуляція сесій тесту синтетичним респондентом без дисплея")
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0, help="seed першої сесії; наступні — seed+1, seed+2, ...")
+    parser.add_argument("--respondent", help="JSON з параметрами респондента (див. RESPONDENT_DEFAULTS)")
+    parser.add_argument("--dir", default=".", help="тека з config.json і stimuli.txt; сесії пишуться в <dir>/results")
+    parser.add_argument("--start", default="2026-01-01T09:00", help="віртуальний час початку першої сесії")
+    args = parser.parse_args(argv)
+    os.chdir(args.dir)
+    try:
+        overrides = {}
+        if args.respondent:
+            with open(args.respondent, encoding="utf-8") as f:
+                overrides = json.load(f)
+        params = respondent_params(overrides)
+        config = load_settings("config.json")
+    except (ConfigError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    start = datetime.datetime.fromisoformat(args.start)
+    for i in range(args.sessions):
+        # Кожна сесія — на годину пізніше: різні start_time, отже й різні session_id
+        result = simulate_session(params, args.seed + i, start + datetime.timedelta(hours=i), config)
+        print(f"{result['session_id']}: проб={result['trials']}, віртуально={result['virtual_min']:.1f} хв, "
+              f"реально={result['wall_sec']:.2f} с")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())